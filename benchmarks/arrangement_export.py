@@ -0,0 +1,82 @@
+"""Part generation modes and merged export of a multi-track arrangement.
+
+Usage::
+
+    python benchmarks/arrangement_export.py [--chords 1000] [--voices 2] [--workers 4]
+
+Generates the same seeded arrangement in-process, on a thread pool and on
+a process pool, checks the three agree and prints their times.  It then
+writes the result twice: merging the per-track sorted streams as they are
+written, and collecting and sorting every event first.  Timsort on a few
+long runs is competitive in time; merging is there to keep memory flat,
+holding one pending message per track instead of the whole piece.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from operator import itemgetter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.generator import AdvancedMusicGenerator
+from musicgen.midi import MIDIExporter
+from musicgen.smf import DEFAULT_TICKS_PER_BEAT, ORDER_SETUP, StreamingMIDIWriter
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chords", type=int, default=1000)
+    parser.add_argument("--voices", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    def generate(workers, processes=False):
+        return AdvancedMusicGenerator(args.seed).generate_arrangement(
+            args.voices, workers=workers, processes=processes, n_chords=args.chords)
+
+    print(f"{'parts':<16}{'seconds':>10}")
+    results = {}
+    for label, workers, processes in [("in-process", 1, False), ("threads", args.workers, False),
+                                      ("processes", args.workers, True)]:
+        results[label], seconds = timed(lambda: generate(workers, processes))
+        print(f"{label:<16}{seconds:>10.3f}")
+
+    arrangement = results["in-process"]
+    merged, seconds = timed(lambda: MIDIExporter().export_arrangement(arrangement, output=io.BytesIO()))
+    print(f"\n{arrangement.n_notes} notes in {len(arrangement)} tracks")
+    print(f"{'export':<16}{'seconds':>10}{'bytes':>12}")
+    print(f"{'merged':<16}{seconds:>10.3f}{len(merged.getvalue()):>12}")
+
+    def sort_then_write():
+        events = [(0, ORDER_SETUP, bytes([0xC0 | track.channel, track.program])) for track in arrangement]
+        events += arrangement._control_events(DEFAULT_TICKS_PER_BEAT)
+        for track in arrangement:
+            events += track.iter_midi_events()
+        events.sort(key=itemgetter(0, 1))
+        output = io.BytesIO()
+        with StreamingMIDIWriter(output, program=None) as writer:
+            writer.write_events(events)
+        return output
+
+    sorted_output, seconds = timed(sort_then_write)
+    print(f"{'sorted':<16}{seconds:>10.3f}{len(sorted_output.getvalue()):>12}")
+
+    for label, other in results.items():
+        if MIDIExporter().export_arrangement(other, output=io.BytesIO()).getvalue() != merged.getvalue():
+            print(f"warning: {label} arrangement differs")
+    if sorted_output.getvalue() != merged.getvalue():
+        print("warning: sorted export differs")
+
+
+if __name__ == "__main__":
+    main()
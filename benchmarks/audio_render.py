@@ -0,0 +1,58 @@
+"""Report the realtime factor of the offline audio renderer.
+
+Usage::
+
+    python benchmarks/audio_render.py [--chords 200] [--workers 4] [--chunk-seconds 10]
+
+Builds a NoteBuffer of ``--chords`` chords from the lazy pipeline, then
+renders it in one piece with a cold and a warm waveform cache, in chunks,
+and split across ``--workers`` processes.  The realtime factor is seconds
+of audio produced per second of wall time.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.audio import AudioRenderer, note_waveform
+from musicgen.buffer import NoteBuffer
+from musicgen.generator import AdvancedMusicGenerator
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chords", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-seconds", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    composition = NoteBuffer.from_events(AdvancedMusicGenerator(args.seed).iter_piano_music(args.chords))
+    renderer = AudioRenderer()
+
+    note_waveform.cache_clear()
+    audio, cold = timed(lambda: renderer.render(composition))
+    seconds = len(audio) / renderer.sample_rate
+    _, warm = timed(lambda: renderer.render(composition))
+    _, chunked = timed(lambda: sum(len(chunk) for chunk in renderer.iter_chunks(composition, args.chunk_seconds)))
+    _, parallel = timed(lambda: renderer.render_parallel(composition, args.workers))
+
+    print(f"{composition.n_notes} notes, {seconds:.1f} s of audio, waveform cache {note_waveform.cache_info()}")
+    print(f"{'mode':<22}{'wall (s)':>10}{'realtime x':>12}")
+    for label, elapsed in [("render (cold cache)", cold), ("render (warm cache)", warm),
+                           (f"chunks of {args.chunk_seconds:g} s", chunked),
+                           (f"parallel x {args.workers}", parallel)]:
+        print(f"{label:<22}{elapsed:>10.3f}{seconds / elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
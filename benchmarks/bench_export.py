@@ -0,0 +1,54 @@
+"""Benchmarks of MIDI export and of the whole generate-and-export path.
+
+Exports run on compositions of 8, 1k and 100k sections; the end-to-end
+benchmarks generate and export 8 and 1k seeded compositions in-process
+(100k would take minutes per round).
+"""
+
+import io
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("pretty_midi")
+
+from conftest import SEED, SIZES
+from musicgen.generator import AdvancedMusicGenerator
+from musicgen.midi import MIDIExporter
+from musicgen.tempo import TempoChangeGenerator
+
+
+@pytest.fixture(scope="module")
+def compositions(melody_buffers):
+    rng = random.Random(SEED)
+    return {size: TempoChangeGenerator(rng).introduce_tempo_and_time_signature_changes(melody)
+            for size, melody in melody_buffers.items()}
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_export_to_midi(measure, compositions, tmp_path, size):
+    composition = compositions[size]
+    measure(lambda: MIDIExporter().export_to_midi(composition, str(tmp_path)), tuple, size, composition.n_notes)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_stream_to_midi(measure, compositions, size):
+    composition = compositions[size]
+    measure(lambda: MIDIExporter().stream_to_midi(composition, output=io.BytesIO()), tuple, size,
+            composition.n_notes)
+
+
+@pytest.mark.parametrize("size", SIZES[:2])
+@pytest.mark.parametrize("path", ["events", "buffer", "vectorized"])
+def test_generate_and_export(measure, tmp_path, size, path):
+    def generate_and_export():
+        for seed in range(size):
+            generator = AdvancedMusicGenerator(seed)
+            if path == "events":
+                MIDIExporter().export_to_midi(generator.generate_piano_music(), str(tmp_path))
+            else:
+                composition = generator.generate_piano_music(as_buffer=True, vectorized=path == "vectorized")
+                MIDIExporter().stream_to_midi(composition, output=io.BytesIO())
+
+    measure(generate_and_export, tuple, size, size)
@@ -0,0 +1,103 @@
+"""Benchmarks of each generator stage on its own, at 8, 1k and 100k chords.
+
+Every stage runs on seeded synthetic input with one section per chord, in
+both the event-dict form and the ``NoteBuffer`` form where it has one.
+"""
+
+import copy
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import SEED, SIZES
+from musicgen.cadence import CadenceGenerator
+from musicgen.chords import ChordGenerator
+from musicgen.counterpoint import CounterpointGenerator
+from musicgen.dynamics import DynamicsGenerator
+from musicgen.form import FormStructureGenerator
+from musicgen.melody import MelodyGenerator
+from musicgen.phrasing import PhrasingGenerator
+from musicgen.tempo import TempoChangeGenerator
+
+pytestmark = pytest.mark.parametrize("size", SIZES)
+
+
+def seeded(stage_class, *, numpy_rng=False):
+    rngs = (random.Random(SEED), np.random.default_rng(SEED)) if numpy_rng else (random.Random(SEED),)
+    return stage_class(*rngs)
+
+
+def test_chords_per_progression(measure, size):
+    generator = seeded(ChordGenerator, numpy_rng=True)
+
+    def generate():
+        progression = []
+        while len(progression) < size:
+            progression.extend(generator.generate_advanced_chord_progression(as_ids=True))
+        return progression
+
+    measure(generate, tuple, size, size)
+
+
+def test_chords_markov(measure, size):
+    generator = seeded(ChordGenerator, numpy_rng=True)
+    measure(lambda: generator.generate_markov_chord_progression(size, as_ids=True), tuple, size, size)
+
+
+@pytest.mark.parametrize("as_buffer", [False, True], ids=["events", "buffer"])
+def test_melody(measure, chord_progressions, size, as_buffer):
+    generator = seeded(MelodyGenerator, numpy_rng=True)
+    progression = chord_progressions[size]
+    measure(lambda chords: generator.generate_melody_with_variations(chords, as_buffer=as_buffer),
+            lambda: (progression,), size, size)
+
+
+def test_melody_vectorized(measure, chord_progressions, size):
+    generator = seeded(MelodyGenerator, numpy_rng=True)
+    progression = chord_progressions[size]
+    measure(generator.generate_melody_vectorized, lambda: (progression,), size, size)
+
+
+def test_cadence(measure, chord_progressions, size):
+    generator = seeded(CadenceGenerator)
+    progression = chord_progressions[size]
+    measure(lambda chords: generator.generate_cadences_and_key_changes(chords, as_ids=True),
+            lambda: (list(progression),), size, size)
+
+
+@pytest.mark.parametrize("stage_class, method", [
+    (DynamicsGenerator, "apply_dynamics_and_articulation"),
+    (PhrasingGenerator, "introduce_rhythmic_variation"),
+    (CounterpointGenerator, "generate_counterpoint_lines"),
+    (FormStructureGenerator, "generate_form_and_structure"),
+    (TempoChangeGenerator, "introduce_tempo_and_time_signature_changes"),
+], ids=["dynamics", "phrasing", "counterpoint", "form", "tempo"])
+@pytest.mark.parametrize("as_buffer", [False, True], ids=["events", "buffer"])
+def test_melody_stage(measure, melodies, melody_buffers, size, stage_class, method, as_buffer):
+    stage = getattr(seeded(stage_class), method)
+    if as_buffer:
+        melody = melody_buffers[size]
+        make_args = lambda: (melody.copy(),)
+    else:
+        melody = melodies[size]
+        # Most stages modify the sections in place
+        make_args = lambda: (copy.deepcopy(melody),)
+    measure(stage, make_args, size, sum(len(section) for section in melody) if not as_buffer else melody.n_notes)
+
+
+def test_counterpoint_vectorized(measure, melody_buffers, size):
+    generator = seeded(CounterpointGenerator, numpy_rng=True)
+    melody = melody_buffers[size]
+    measure(generator.generate_counterpoint_vectorized, lambda: (melody.copy(),), size, melody.n_notes)
+
+
+def test_counterpoint_solver(measure, chord_progressions, melody_buffers, size):
+    if size > 1000:
+        pytest.skip("too slow for repeated rounds; see benchmarks/counterpoint_solver.py")
+    generator = seeded(CounterpointGenerator, numpy_rng=True)
+    progression = chord_progressions[size]
+    melody = melody_buffers[size]
+    measure(generator.solve_counterpoint_lines, lambda: (melody.copy(), progression), size, melody.n_notes)
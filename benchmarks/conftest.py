@@ -0,0 +1,223 @@
+"""Shared fixtures for the pytest-benchmark suite.
+
+The ``bench_*.py`` modules are not collected by a plain ``pytest`` run;
+name them explicitly::
+
+    python -m pytest benchmarks/bench_stages.py benchmarks/bench_export.py
+
+Median round times are checked against ``baselines/throughput.json``.
+Timings there are stored with the time of a fixed calibration workload
+and rescaled by the calibration time of the current machine, so the
+committed baseline holds across machines of different speed.  A test fails
+when its median grows by more than ``--throughput-threshold`` (50% by
+default) and by more than ``--throughput-slack`` seconds (1 ms by default),
+so scheduler noise on microsecond rounds doesn't fail the gate.
+``--throughput-save`` rewrites the baselines from the current run.  For
+finer comparisons between two runs on one machine, pytest-benchmark's own
+``--benchmark-save`` and ``--benchmark-compare`` work as usual.
+
+Peak memory is measured separately with ``tracemalloc`` and checked
+against ``baselines/memory.json``; a test fails when its peak grows by more
+than ``--memory-threshold`` (20% by default) and by more than
+``--memory-slack`` bytes (4 KiB by default), so allocator noise on tiny
+peaks doesn't fail the gate.  ``--memory-save`` rewrites the baselines
+from the current run.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.chords import ChordGenerator
+from musicgen.dynamics import DynamicsGenerator
+from musicgen.melody import MelodyGenerator
+
+SEED = 20240601
+SIZES = [8, 1000, 100000]
+# Timed rounds per size; large inputs are expensive to set up and run
+ROUNDS = {8: 200, 1000: 20, 100000: 3}
+MEMORY_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "memory.json")
+THROUGHPUT_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "throughput.json")
+# Best of this many runs of the calibration workload
+CALIBRATION_ROUNDS = 7
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("memory baselines")
+    group.addoption("--memory-baseline", default=MEMORY_BASELINES, help="peak-memory baseline file")
+    group.addoption("--memory-threshold", type=float, default=0.2,
+                    help="allowed peak-memory growth as a fraction of the baseline")
+    group.addoption("--memory-slack", type=int, default=4096,
+                    help="peak-memory growth in bytes always allowed, whatever the baseline")
+    group.addoption("--memory-save", action="store_true", help="record peak memory as the new baseline")
+
+    group = parser.getgroup("throughput baselines")
+    group.addoption("--throughput-baseline", default=THROUGHPUT_BASELINES, help="median round time baseline file")
+    group.addoption("--throughput-threshold", type=float, default=0.5,
+                    help="allowed median-time growth as a fraction of the rescaled baseline")
+    group.addoption("--throughput-slack", type=float, default=0.001,
+                    help="median-time growth in seconds always allowed, whatever the baseline")
+    group.addoption("--throughput-save", action="store_true", help="record median times as the new baseline")
+
+
+def pytest_configure(config):
+    config._memory_peaks = {}
+    config._median_seconds = {}
+    config._calibration_seconds = None
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if config.getoption("--memory-save", default=False) and config._memory_peaks:
+        path = config.getoption("--memory-baseline")
+        baselines = _load_baselines(path)
+        baselines.update(config._memory_peaks)
+        _save_baselines(path, baselines)
+    if config.getoption("--throughput-save", default=False) and config._median_seconds:
+        path = config.getoption("--throughput-baseline")
+        baselines = _load_baselines(path)
+        # Times kept from an earlier run are rescaled to this run's calibration
+        scale = (config._calibration_seconds / baselines["calibration_seconds"]
+                 if baselines.get("calibration_seconds") else 1.0)
+        medians = {key: seconds * scale for key, seconds in baselines.get("median_seconds", {}).items()}
+        medians.update(config._median_seconds)
+        _save_baselines(path, {"calibration_seconds": config._calibration_seconds,
+                               "median_seconds": dict(sorted(medians.items()))})
+
+
+def _load_baselines(path):
+    try:
+        with open(path) as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_baselines(path, baselines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as baseline_file:
+        json.dump(dict(sorted(baselines.items())), baseline_file, indent=2)
+        baseline_file.write("\n")
+
+
+def _calibration_workload():
+    # A fixed mix of interpreted loops and NumPy kernels, like the stages themselves
+    rng = random.Random(SEED)
+    values = [rng.random() for _ in range(50000)]
+    values.sort()
+    total = sum(value * value for value in values)
+    array = np.random.default_rng(SEED).random(200000)
+    return total + float(np.sort(array).cumsum()[-1])
+
+
+def calibration_seconds(config):
+    """Best-of time of the calibration workload, measured once per session."""
+    if config._calibration_seconds is None:
+        timings = []
+        for _ in range(CALIBRATION_ROUNDS):
+            start = time.perf_counter()
+            _calibration_workload()
+            timings.append(time.perf_counter() - start)
+        config._calibration_seconds = min(timings)
+    return config._calibration_seconds
+
+
+def peak_bytes(function, *args):
+    """Peak bytes traced while ``function(*args)`` runs."""
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture
+def measure(benchmark, request):
+    """Time ``function`` on fresh inputs, then check its peak memory.
+
+    ``make_args`` returns the positional arguments of one call and is
+    re-run (untimed) before every round, since most stages mutate their
+    input.  ``events`` is the number of chords or notes processed per call.
+    """
+
+    def run(function, make_args, size, events):
+        result = benchmark.pedantic(
+            function, setup=lambda: (make_args(), {}), rounds=ROUNDS[size], iterations=1, warmup_rounds=1)
+        benchmark.extra_info["events"] = events
+        if benchmark.stats is not None:
+            # None under --benchmark-disable
+            benchmark.extra_info["events_per_second"] = events / benchmark.stats.stats.mean
+
+        peak = peak_bytes(function, *make_args())
+        benchmark.extra_info["peak_bytes"] = peak
+        key = request.node.nodeid.split("::", 1)[1]
+        request.config._memory_peaks[key] = peak
+
+        baseline = _load_baselines(request.config.getoption("--memory-baseline")).get(key)
+        threshold = request.config.getoption("--memory-threshold")
+        slack = request.config.getoption("--memory-slack")
+        limit = max(baseline * (1 + threshold), baseline + slack) if baseline else None
+        if limit is not None and not request.config.getoption("--memory-save") and peak > limit:
+            pytest.fail(f"peak memory {peak} B exceeds baseline {baseline} B by more than "
+                        f"{threshold:.0%} and {slack} B")
+
+        if benchmark.stats is not None:
+            _check_throughput(request.config, key, benchmark.stats.stats.median)
+        return result
+
+    return run
+
+
+def _check_throughput(config, key, median):
+    calibration = calibration_seconds(config)
+    config._median_seconds[key] = median
+    if config.getoption("--throughput-save"):
+        return
+    baselines = _load_baselines(config.getoption("--throughput-baseline"))
+    baseline = baselines.get("median_seconds", {}).get(key)
+    if not baseline:
+        return
+    # The baseline as it would run on this machine
+    expected = baseline * calibration / baselines["calibration_seconds"]
+    threshold = config.getoption("--throughput-threshold")
+    slack = config.getoption("--throughput-slack")
+    if median > max(expected * (1 + threshold), expected + slack):
+        pytest.fail(f"median round {median * 1000:.3f} ms exceeds rescaled baseline {expected * 1000:.3f} ms "
+                    f"by more than {threshold:.0%} and {slack * 1000:g} ms")
+
+
+@pytest.fixture(scope="session")
+def chord_progressions():
+    """Seeded chord-ID progressions of every benchmark size."""
+    generator = ChordGenerator(random.Random(SEED), np.random.default_rng(SEED))
+    return {size: generator.generate_markov_chord_progression(size, as_ids=True).tolist() for size in SIZES}
+
+
+@pytest.fixture(scope="session")
+def melodies(chord_progressions):
+    """Melodies with dynamics, one section per chord, as event lists and buffers."""
+    melodies = {}
+    for size, progression in chord_progressions.items():
+        rng = random.Random(SEED)
+        melody = MelodyGenerator(rng).generate_melody_with_variations(progression)
+        melodies[size] = DynamicsGenerator(rng, np.random.default_rng(SEED)).apply_dynamics_and_articulation(melody)
+    return melodies
+
+
+@pytest.fixture(scope="session")
+def melody_buffers(chord_progressions):
+    buffers = {}
+    for size, progression in chord_progressions.items():
+        rng = random.Random(SEED)
+        melody = MelodyGenerator(rng).generate_melody_with_variations(progression, as_buffer=True)
+        buffers[size] = DynamicsGenerator(rng, np.random.default_rng(SEED)).apply_dynamics_and_articulation(melody)
+    return buffers
@@ -0,0 +1,73 @@
+"""Compare the binary corpus with MIDI files and printed event dicts.
+
+Usage::
+
+    python benchmarks/corpus_scan.py [--pieces 10000] [--workers 4]
+
+Writes ``--pieces`` generated pieces to a corpus and reports bytes per
+piece next to the same pieces as MIDI files and as ``repr`` of their event
+dicts, then times opening the corpus, a pitch histogram over every note,
+and random access to individual pieces.
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.corpus import Corpus, write_corpus
+from musicgen.generator import AdvancedMusicGenerator
+from musicgen.midi import MIDIExporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pieces", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sample", type=int, default=200, help="pieces sampled for the MIDI/repr sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.mgc")
+        start = time.perf_counter()
+        write_corpus(path, args.pieces, seed=args.seed, workers=args.workers)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        corpus = Corpus(path)
+        open_time = time.perf_counter() - start
+
+        midi_bytes = repr_bytes = 0
+        for seed in corpus.seeds[:args.sample].tolist():
+            composition = AdvancedMusicGenerator(seed).generate_piano_music(as_buffer=True)
+            midi_bytes += len(MIDIExporter().stream_to_midi(composition, output=io.BytesIO()).getvalue())
+            repr_bytes += len(repr(composition.to_events()))
+        sample = min(args.sample, len(corpus))
+
+        start = time.perf_counter()
+        histogram = np.bincount(corpus.notes["pitch"], minlength=128)
+        scan_time = time.perf_counter() - start
+
+        pieces = np.random.default_rng(args.seed).integers(0, len(corpus), 1000)
+        start = time.perf_counter()
+        total = sum(len(corpus[piece]) for piece in pieces.tolist())
+        access_time = time.perf_counter() - start
+
+        print(f"{len(corpus)} pieces, {len(corpus.notes)} notes, written in {write_time:.2f} s")
+        print(f"bytes per piece: corpus {os.path.getsize(path) / len(corpus):.0f}, "
+              f"MIDI {midi_bytes / sample:.0f}, repr {repr_bytes / sample:.0f}")
+        print(f"open:                 {open_time * 1e3:.2f} ms")
+        print(f"pitch histogram scan: {scan_time * 1e3:.2f} ms ({histogram.sum() / scan_time / 1e6:.0f} M notes/s)")
+        print(f"random piece access:  {access_time / len(pieces) * 1e6:.2f} us/piece ({total} notes read)")
+        del corpus
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Quality and speed of the voice-leading solver against random counterpoint.
+
+Usage::
+
+    python benchmarks/counterpoint_solver.py [--chords 1000] [--voices 2] [--beam-widths 1 4 8 32]
+
+Solves ``--voices`` lines below a seeded melody of ``--chords`` chords at
+every beam width and prints the time, the solver's own cost and a few
+plain counts for the top line: parallel fifths and octaves with the melody,
+crossings above it and notes outside the chord.  The first row is the
+random-interval ``generate_counterpoint_lines`` for comparison.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.chords import ChordGenerator
+from musicgen.counterpoint import CounterpointGenerator
+from musicgen.melody import MelodyGenerator
+from musicgen.vocabulary import get_vocabulary
+from musicgen.voiceleading import VoiceLeadingSolver
+
+
+def faults(melody, line, chords):
+    """``(parallels, crossings, non-chord tones)`` of ``line`` below ``melody``."""
+    melody, line = melody.astype(np.int64), line.astype(np.int64)
+    intervals = (melody - line) % 12
+    both_move = (np.diff(melody) != 0) & (np.diff(line) != 0)
+    parallels = both_move & np.isin(intervals[1:], (0, 7)) & (intervals[1:] == intervals[:-1])
+    masks = np.array(get_vocabulary().tone_masks)[chords]
+    chord_tones = (masks >> (line % 12)) & 1
+    return int(parallels.sum()), int((line > melody).sum()), int((chord_tones == 0).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chords", type=int, default=1000)
+    parser.add_argument("--voices", type=int, default=2)
+    parser.add_argument("--beam-widths", type=int, nargs="+", default=[1, 4, 8, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    progression = ChordGenerator(random.Random(args.seed), np.random.default_rng(args.seed)) \
+        .generate_markov_chord_progression(args.chords, as_ids=True)
+    melody = MelodyGenerator(random.Random(args.seed)).generate_melody_with_variations(progression, as_buffer=True)
+    pitches = melody.notes["pitch"]
+    chords = np.repeat(progression, melody.section_lengths())
+
+    print(f"{'counterpoint':<16}{'seconds':>10}{'notes/s':>10}{'cost':>12}{'parallels':>11}{'crossings':>11}"
+          f"{'non-chord':>11}")
+
+    def report(label, seconds, lines, solver):
+        cost = solver.line_cost(pitches, chords.tolist(), lines)
+        counts = faults(pitches, lines[0], chords)
+        print(f"{label:<16}{seconds:>10.3f}{len(pitches) / seconds:>10.0f}{cost:>12.1f}"
+              + "".join(f"{count:>11}" for count in counts))
+
+    generator = CounterpointGenerator(random.Random(args.seed))
+    start = time.perf_counter()
+    random_line = generator.generate_counterpoint_lines(melody.copy()).notes["pitch"]
+    report("random", time.perf_counter() - start, [random_line], VoiceLeadingSolver())
+
+    for width in args.beam_widths:
+        solver = VoiceLeadingSolver(width)
+        start = time.perf_counter()
+        lines = solver.solve(pitches, chords.tolist(), args.voices)
+        report(f"beam {width}", time.perf_counter() - start, lines, solver)
+
+
+if __name__ == "__main__":
+    main()
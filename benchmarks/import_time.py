@@ -0,0 +1,70 @@
+"""Measure cold import time of the package in fresh interpreters.
+
+Usage::
+
+    python benchmarks/import_time.py [--repeat N] [--legacy-ref REF]
+
+``--legacy-ref`` also times importing ``main.py`` as it was at the given git
+revision (for example the single-module layout), for a before/after view.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ("import musicgen", "import musicgen"),
+    ("pipeline (no MIDI)", "import musicgen.generator"),
+    ("pipeline + pretty_midi (eager)", "import musicgen.generator, pretty_midi"),
+]
+
+
+def time_import(statement, cwd, repeat, check=True):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", statement],
+            cwd=cwd,
+            check=check,
+            stdout=subprocess.DEVNULL,
+            stderr=None if check else subprocess.DEVNULL,
+        )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--legacy-ref", help="git revision whose main.py to time as well")
+    args = parser.parse_args()
+
+    # Interpreter start-up alone, subtracted from every case
+    startup = time_import("pass", REPO_ROOT, args.repeat)
+    results = [(label, time_import(statement, REPO_ROOT, args.repeat)) for label, statement in CASES]
+
+    if args.legacy_ref:
+        source = subprocess.check_output(
+            ["git", "show", f"{args.legacy_ref}:main.py"], cwd=REPO_ROOT)
+        with tempfile.TemporaryDirectory() as legacy_dir:
+            with open(os.path.join(legacy_dir, "main.py"), "wb") as legacy_file:
+                legacy_file.write(source)
+            # Older layouts ran (and could fail in) demo code at import time,
+            # so their exit status is not checked
+            results.append((f"main.py @ {args.legacy_ref}",
+                            time_import("import main", legacy_dir, args.repeat, check=False)))
+
+    print(f"{'case':<34}{'median (ms)':>12}{'minus startup':>15}")
+    for label, seconds in results:
+        print(f"{label:<34}{seconds * 1000:>12.1f}{(seconds - startup) * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Load-test the render server and report latency percentiles.
+
+Usage::
+
+    python benchmarks/load_test.py [--spawn] [--host H] [--port P]
+                                   [--concurrency 16] [--requests 500]
+
+Each of ``--concurrency`` clients keeps one connection open and sends
+``GET /render`` requests with distinct seeds until ``--requests`` have been
+sent in total.  ``--spawn`` starts ``python -m musicgen.server`` on a free
+port for the duration of the run.  Reported are p50/p99 latency of
+successful renders, requests per second, and 503/error counts.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def client(host, port, seeds, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for seed in seeds:
+            start = time.perf_counter()
+            writer.write(f"GET /render?seed={seed} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run(host, port, concurrency, requests):
+    latencies = []
+    statuses = {}
+    # Seeds are dealt round-robin so every client sends its share
+    seeds = [list(range(index, requests, concurrency)) for index in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, client_seeds, latencies, statuses) for client_seeds in seeds))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on {host}:{port}")
+
+
+def stop_server(server, timeout=30):
+    """Interrupt a spawned server, then kill its whole process group if it lingers."""
+    server.send_signal(signal.SIGINT)
+    try:
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        pass
+    # Catches pool workers that outlived the server as well as a hung server
+    try:
+        os.killpg(server.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--spawn", action="store_true", help="start a server for the test")
+    parser.add_argument("--workers", type=int, default=None, help="server workers when spawning")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        args.port = free_port()
+        command = [sys.executable, "-m", "musicgen.server", "--host", args.host, "--port", str(args.port)]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        # Its own process group, so the pool workers can be reaped with it
+        server = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, start_new_session=True)
+        wait_for_port(args.host, args.port)
+
+    try:
+        latencies, statuses, elapsed = asyncio.run(run(args.host, args.port, args.concurrency, args.requests))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    print(f"requests:     {sum(statuses.values())} ({statuses})")
+    print(f"concurrency:  {args.concurrency}")
+    print(f"elapsed:      {elapsed:.2f} s")
+    print(f"throughput:   {sum(statuses.values()) / elapsed:.1f} req/s")
+    if latencies:
+        print(f"p50 latency:  {percentile(latencies, 0.50) * 1000:.1f} ms")
+        print(f"p99 latency:  {percentile(latencies, 0.99) * 1000:.1f} ms")
+        print(f"mean latency: {statistics.mean(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
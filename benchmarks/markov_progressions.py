@@ -0,0 +1,69 @@
+"""Compare per-chord Python sampling with the Markov progression engine.
+
+Usage::
+
+    python benchmarks/markov_progressions.py [--lengths 8 1000 100000] [--batch 10000]
+
+For each length, times ``ChordGenerator.generate_advanced_chord_progression``
+called until that many chords exist against one
+``generate_markov_chord_progression`` call, then times a batch of 64-chord
+progressions both ways.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.chords import ChordGenerator
+from musicgen.markov import default_engine
+
+
+def per_chord(generator, length):
+    progression = []
+    while len(progression) < length:
+        progression.extend(generator.generate_advanced_chord_progression(as_ids=True))
+    return progression[:length]
+
+
+def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[8, 1000, 100000])
+    parser.add_argument("--batch", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = ChordGenerator(random.Random(args.seed), np.random.default_rng(args.seed))
+    # Compile the shared engine's tables outside the timings
+    default_engine().compiled()
+
+    print(f"{'case':<22}{'python (s)':>12}{'markov (s)':>12}{'speed-up':>10}")
+    cases = [(f"1 x {length}", lambda length=length: per_chord(generator, length),
+              lambda length=length: generator.generate_markov_chord_progression(length, as_ids=True))
+             for length in args.lengths]
+    cases.append((f"{args.batch} x 64",
+                  lambda: [per_chord(generator, 64) for _ in range(args.batch)],
+                  lambda: generator.generate_markov_chord_progression(64, count=args.batch, as_ids=True)))
+    for label, python_case, markov_case in cases:
+        python_time = best_of(python_case, args.repeat)
+        markov_time = best_of(markov_case, args.repeat)
+        print(f"{label:<22}{python_time:>12.5f}{markov_time:>12.5f}{python_time / markov_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
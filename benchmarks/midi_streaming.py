@@ -0,0 +1,92 @@
+"""Compare the pretty_midi exporter with the streaming MIDI writer.
+
+Usage::
+
+    python benchmarks/midi_streaming.py [--notes 30000 100000] [--chunk 1000]
+
+Both exporters consume the same lazily generated sections, produced in
+chunks of ``--chunk`` chords, and write to a temporary directory.  Reported
+are wall time and peak traced memory, which for the streaming writer should
+stay flat as the piece grows.
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.chords import ChordGenerator
+from musicgen.melody import MelodyGenerator
+from musicgen.midi import MIDIExporter
+
+
+def chunks(n_notes, chunk, seed):
+    """Yield NoteBuffer chunks of a melody with about ``n_notes`` notes."""
+    chords = ChordGenerator(random.Random(seed))
+    melody = MelodyGenerator(np_rng=np.random.default_rng(seed))
+    remaining = -(-n_notes // 3)
+    while remaining > 0:
+        progression = []
+        while len(progression) < min(chunk, remaining):
+            progression.extend(chords.generate_advanced_chord_progression())
+        progression = progression[:min(chunk, remaining)]
+        remaining -= len(progression)
+        yield melody.generate_melody_vectorized(progression)
+
+
+def dict_sections(n_notes, chunk, seed):
+    for buffer in chunks(n_notes, chunk, seed):
+        yield from buffer.iter_sections()
+
+
+def measure(function):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, nargs="+", default=[30000, 100000])
+    parser.add_argument("--chunk", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    exporter = MIDIExporter()
+    # Load pretty_midi up front so its import is not charged to the first case
+    import pretty_midi  # noqa: F401
+
+    print(f"{'notes':>8} {'exporter':<18}{'seconds':>9}{'peak MiB':>10}{'file MiB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for n_notes in args.notes:
+            cases = [
+                ("pretty_midi", "pretty.mid", lambda: exporter.export_to_midi(
+                    dict_sections(n_notes, args.chunk, args.seed), directory, "pretty.mid")),
+                ("streaming", "stream.mid", lambda: exporter.stream_to_midi(
+                    chunks(n_notes, args.chunk, args.seed), output_directory=directory,
+                    filename="stream.mid")),
+                ("streaming (dicts)", "stream_dicts.mid", lambda: exporter.stream_to_midi(
+                    dict_sections(n_notes, args.chunk, args.seed), output_directory=directory,
+                    filename="stream_dicts.mid")),
+            ]
+            for label, filename, function in cases:
+                elapsed, peak = measure(function)
+                size = os.path.getsize(os.path.join(directory, filename))
+                print(f"{n_notes:>8} {label:<18}{elapsed:>9.3f}{peak / 2 ** 20:>10.2f}{size / 2 ** 20:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
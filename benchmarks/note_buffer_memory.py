@@ -0,0 +1,79 @@
+"""Compare memory use of event-dict compositions with ``NoteBuffer``.
+
+Usage::
+
+    python benchmarks/note_buffer_memory.py [--chords 1000 100000] [--seed N]
+
+For each size, the melody, dynamics, phrasing and counterpoint stages run
+over a random progression of that many chords, once on nested event dicts and
+once on a ``NoteBuffer``.  Reported are the retained size of the result, the
+peak traced allocation while producing it, and the wall time.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.chords import ChordGenerator
+from musicgen.counterpoint import CounterpointGenerator
+from musicgen.dynamics import DynamicsGenerator
+from musicgen.melody import MelodyGenerator
+from musicgen.phrasing import PhrasingGenerator
+
+
+def progression(length, seed):
+    chords = ChordGenerator(random.Random(seed))
+    result = []
+    while len(result) < length:
+        result.extend(chords.generate_advanced_chord_progression())
+    return result[:length]
+
+
+def run_stages(chord_progression, seed, as_buffer):
+    rng = random.Random(seed)
+    melody = MelodyGenerator(rng).generate_melody_with_variations(chord_progression, as_buffer=as_buffer)
+    # DynamicsGenerator prints whole dict melodies; keep that out of the timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        melody = DynamicsGenerator(rng, np.random.default_rng(seed)).apply_dynamics_and_articulation(melody)
+    melody = PhrasingGenerator(rng).introduce_rhythmic_variation(melody)
+    return CounterpointGenerator(rng).generate_counterpoint_lines(melody)
+
+
+def measure(chord_progression, seed, as_buffer):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run_stages(chord_progression, seed, as_buffer)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chords", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'chords':>8} {'form':<10}{'retained MiB':>14}{'peak MiB':>10}{'seconds':>9}")
+    for length in args.chords:
+        chord_progression = progression(length, args.seed)
+        for label, as_buffer in (("dicts", False), ("NoteBuffer", True)):
+            retained, peak, elapsed = measure(chord_progression, args.seed, as_buffer)
+            print(f"{length:>8} {label:<10}{retained / 2 ** 20:>14.2f}{peak / 2 ** 20:>10.2f}{elapsed:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
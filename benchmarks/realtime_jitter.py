@@ -0,0 +1,39 @@
+"""Measure scheduling jitter and underruns of real-time playback.
+
+Usage::
+
+    python benchmarks/realtime_jitter.py [--seconds 10] [--speed 1] [--lookahead-bars 2]
+
+Plays an endless seeded stream into an in-memory sink for ``--seconds`` of
+wall time and prints the player's statistics.  ``--speed`` above 1 plays
+faster than real time, which stresses the producer.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.generator import AdvancedMusicGenerator
+from musicgen.realtime import ListSink, RealtimePlayer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--lookahead-bars", type=float, default=2)
+    parser.add_argument("--buffer-size", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    player = RealtimePlayer(AdvancedMusicGenerator(args.seed), ListSink(), lookahead_bars=args.lookahead_bars,
+                            buffer_size=args.buffer_size, speed=args.speed)
+    stats = player.play(duration=args.seconds)
+    for name, value in stats.items():
+        print(f"{name:<18}{value:>12.3f}" if isinstance(value, float) else f"{name:<18}{value:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Profile the generation pipeline stage by stage.
+
+Usage::
+
+    python benchmarks/stage_profile.py [--count 200] [--buffer] [--vectorized]
+                                       [--allocations] [--trace trace.json]
+
+Generates ``--count`` seeded compositions under ``musicgen.profiling.profile``
+and prints per-stage time, share, throughput and (with ``--allocations``)
+allocated bytes.  ``--trace`` also writes a Chrome trace-event file.  The
+unprofiled run time is printed for comparison.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.generator import AdvancedMusicGenerator
+from musicgen.profiling import profile
+
+
+def generate(count, as_buffer, vectorized):
+    start = time.perf_counter()
+    for seed in range(count):
+        AdvancedMusicGenerator(seed).generate_piano_music(as_buffer=as_buffer, vectorized=vectorized)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--buffer", action="store_true", help="use the NoteBuffer pipeline")
+    parser.add_argument("--vectorized", action="store_true", help="use the NumPy melody and counterpoint")
+    parser.add_argument("--allocations", action="store_true", help="trace allocations with tracemalloc")
+    parser.add_argument("--trace", help="write a Chrome trace-event JSON file")
+    args = parser.parse_args()
+    as_buffer = args.buffer or args.vectorized
+
+    plain = generate(args.count, as_buffer, args.vectorized)
+    with profile(trace_allocations=args.allocations) as profiler:
+        profiled = generate(args.count, as_buffer, args.vectorized)
+
+    print(profiler.summary())
+    print()
+    print(f"unprofiled: {plain:.3f} s   profiled: {profiled:.3f} s   ({args.count} compositions)")
+    if args.trace:
+        print(f"trace written to {profiler.write_trace(args.trace)}")
+
+
+if __name__ == "__main__":
+    main()
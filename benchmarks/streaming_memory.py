@@ -0,0 +1,55 @@
+"""Show that the lazy pipeline streams in flat memory.
+
+Usage::
+
+    python benchmarks/streaming_memory.py [--lengths 1000 10000 100000]
+
+For each length, generates that many chords with
+``AdvancedMusicGenerator.stream_piano_music`` into a temporary MIDI file
+and reports elapsed time, file size and the peak memory traced by
+``tracemalloc``, next to the peak of building the same number of chords
+with ``generate_piano_music``-style lists.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.generator import AdvancedMusicGenerator
+
+
+def traced(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function()
+        return result, time.perf_counter() - start, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'chords':>10}{'time (s)':>10}{'file KiB':>10}{'stream peak KiB':>17}{'list peak KiB':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        for length in args.lengths:
+            generator = AdvancedMusicGenerator(args.seed)
+            path, elapsed, stream_peak = traced(
+                lambda: generator.stream_piano_music(length, output_directory=directory, filename="stream.mid"))
+            # The same sections, materialized as the batch pipeline would hold them
+            _, _, list_peak = traced(lambda: list(AdvancedMusicGenerator(args.seed).iter_piano_music(length)))
+            print(f"{length:>10}{elapsed:>10.2f}{os.path.getsize(path) / 1024:>10.0f}"
+                  f"{stream_peak / 1024:>17.1f}{list_peak / 1024:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare scalar and vectorized melody + counterpoint generation.
+
+Usage::
+
+    python benchmarks/vectorized_melody.py [--notes 100000] [--seed N]
+
+Times both paths on the same random progression and reports the speed-up,
+plus the total variation distance between the pitch histograms the two
+paths produce (close to zero when the distributions match).
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen.chords import ChordGenerator
+from musicgen.counterpoint import CounterpointGenerator
+from musicgen.melody import MelodyGenerator
+
+
+def progression(length, seed):
+    chords = ChordGenerator(random.Random(seed))
+    result = []
+    while len(result) < length:
+        result.extend(chords.generate_advanced_chord_progression())
+    return result[:length]
+
+
+def scalar(chord_progression, seed):
+    rng = random.Random(seed)
+    melody = MelodyGenerator(rng).generate_melody_with_variations(chord_progression, as_buffer=True)
+    return melody, CounterpointGenerator(rng).generate_counterpoint_lines(melody)
+
+
+def vectorized(chord_progression, seed):
+    np_rng = np.random.default_rng(seed)
+    melody = MelodyGenerator(np_rng=np_rng).generate_melody_vectorized(chord_progression)
+    return melody, CounterpointGenerator(np_rng=np_rng).generate_counterpoint_vectorized(melody)
+
+
+def best_of(function, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def total_variation(a, b):
+    pa = np.bincount(a, minlength=128) / len(a)
+    pb = np.bincount(b, minlength=128) / len(b)
+    return 0.5 * np.abs(pa - pb).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chord_progression = progression(-(-args.notes // 3), args.seed)
+    scalar_time, (scalar_melody, scalar_counterpoint) = best_of(
+        scalar, args.repeat, chord_progression, args.seed)
+    vector_time, (vector_melody, vector_counterpoint) = best_of(
+        vectorized, args.repeat, chord_progression, args.seed)
+
+    print(f"notes:               {scalar_melody.n_notes}")
+    print(f"scalar:              {scalar_time:.4f} s")
+    print(f"vectorized:          {vector_time:.4f} s")
+    print(f"speed-up:            {scalar_time / vector_time:.1f}x")
+    print(f"melody TV distance:  "
+          f"{total_variation(scalar_melody.notes['pitch'], vector_melody.notes['pitch']):.4f}")
+    print(f"counterpoint TV:     "
+          f"{total_variation(scalar_counterpoint.notes['pitch'], vector_counterpoint.notes['pitch']):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Usage examples for each pipeline stage.
+
+Run with ``python examples/stage_demos.py`` from the repository root.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musicgen import (
+    AdvancedMusicGenerator,
+    CadenceGenerator,
+    ChordGenerator,
+    CounterpointGenerator,
+    DynamicsGenerator,
+    FormStructureGenerator,
+    PhrasingGenerator,
+    TempoChangeGenerator,
+)
+
+
+def run_demos():
+    # Usage example
+    try:
+        chord_generator = ChordGenerator()
+        progression = chord_generator.generate_advanced_chord_progression()
+        print(progression)
+    except Exception as ex:
+        print("An unexpected error occurred:", ex)
+
+    # Usage example
+    try:
+        composition = [
+            [{"note": 60, "duration": 0.5}, {"note": 62, "duration": 0.5}],
+            [{"note": 63, "duration": 0.5}, {"note": 65, "duration": 0.5}]
+        ]  # Sample melody composition
+        dynamics_generator = DynamicsGenerator()
+        composition_with_dynamics = dynamics_generator.apply_dynamics_and_articulation(composition)
+        print(composition_with_dynamics)
+    except Exception as ex:
+        print("An unexpected error occurred:", ex)
+
+    # Usage example
+    try:
+        melody = [
+            [{"note": 60, "duration": 0.5}, {"note": 62, "duration": 0.5}],
+            [{"note": 63, "duration": 0.5}, {"note": 65, "duration": 0.5}]
+        ]  # Sample melody with variations
+        phrasing_generator = PhrasingGenerator()
+        melody_with_phrasing = phrasing_generator.introduce_rhythmic_variation(melody)
+        print(melody_with_phrasing)
+    except Exception as ex:
+        print("An unexpected error occurred:", ex)
+
+    # Usage example
+    try:
+        chord_progression = ["Cmaj7", "Dmin7", "G7", "Cmaj7"]  # Sample chord progression
+        cadence_generator = CadenceGenerator()
+        new_progression = cadence_generator.generate_cadences_and_key_changes(chord_progression)
+        print(new_progression)
+    except Exception as ex:
+        print("An unexpected error occurred:", ex)
+
+    # Usage example
+    try:
+        melody = [
+            [{"note": 60, "duration": 0.5, "dynamic": "mf", "articulation": "legato"},
+             {"note": 62, "duration": 0.5, "dynamic": "mf", "articulation": "legato"}],
+            [{"note": 63, "duration": 0.5, "dynamic": "f", "articulation": "staccato"},
+             {"note": 65, "duration": 0.5, "dynamic": "f", "articulation": "staccato"}]
+        ]  # Sample melody with variations and dynamics
+        counterpoint_generator = CounterpointGenerator()
+        counterpoint_melody = counterpoint_generator.generate_counterpoint_lines(melody)
+        print(counterpoint_melody)
+    except Exception as ex:
+        print("An unexpected error occurred:", ex)
+
+    # Usage example
+    try:
+        composition = [
+            [{"note": 60, "duration": 0.5}, {"note": 62, "duration": 0.5}],
+            [{"note": 63, "duration": 0.5}, {"note": 65, "duration": 0.5}]
+        ]  # Sample composition
+        form_generator = FormStructureGenerator()
+        structured_composition = form_generator.generate_form_and_structure(composition)
+        print(structured_composition)
+    except Exception as ex:
+        print("An unexpected error occurred:", ex)
+
+    # Usage example
+    try:
+        composition = [
+            [{"note": 60, "duration": 0.5}, {"note": 62, "duration": 0.5}],
+            [{"note": 63, "duration": 0.5}, {"note": 65, "duration": 0.5}]
+        ]  # Sample composition
+        tempo_change_generator = TempoChangeGenerator()
+        composition_with_changes = tempo_change_generator.introduce_tempo_and_time_signature_changes(composition)
+        print(composition_with_changes)
+    except Exception as ex:
+        print("An unexpected error occurred:", ex)
+
+    # Usage example
+    generator = AdvancedMusicGenerator()
+    composition = generator.generate_piano_music()
+    print(composition)
+
+
+if __name__ == "__main__":
+    run_demos()
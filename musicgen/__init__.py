@@ -0,0 +1,61 @@
+"""Procedural piano music generation.
+
+Importing the package does no work: submodules are loaded on first
+attribute access, and ``pretty_midi`` only when a MIDI file is written.
+"""
+
+import importlib
+
+__version__ = "0.1.0"
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "AdvancedMusicGenerator": "generator",
+    "Arrangement": "arrangement",
+    "AudioRenderer": "audio",
+    "BassLineGenerator": "arrangement",
+    "CadenceGenerator": "cadence",
+    "ChordGenerator": "chords",
+    "ChordVocabulary": "vocabulary",
+    "CompingGenerator": "arrangement",
+    "CompositionServer": "server",
+    "Corpus": "corpus",
+    "CorpusWriter": "corpus",
+    "CounterpointGenerator": "counterpoint",
+    "DynamicsEngine": "dynamics",
+    "DynamicsGenerator": "dynamics",
+    "FormStructureGenerator": "form",
+    "MelodyGenerator": "melody",
+    "MarkovProgressionEngine": "markov",
+    "MIDIExporter": "midi",
+    "NoteBuffer": "buffer",
+    "NoteBufferBuilder": "buffer",
+    "PhrasingGenerator": "phrasing",
+    "RealtimePlayer": "realtime",
+    "RenderCache": "cache",
+    "StageHook": "profiling",
+    "StageProfiler": "profiling",
+    "StreamingMIDIWriter": "smf",
+    "SweepRunner": "sweep",
+    "TempoChangeGenerator": "tempo",
+    "Track": "arrangement",
+    "VoiceLeadingSolver": "voiceleading",
+    "get_vocabulary": "vocabulary",
+    "main": "cli",
+    "profile": "profiling",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
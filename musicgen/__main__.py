@@ -0,0 +1,5 @@
+from .cli import main
+
+# Entry point of the program
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Multi-track arrangements: melody, counterpoint, comping and bass.
+
+An arrangement is built from one chord progression and one melody (with
+dynamics and phrasing already applied).  Every other part is derived from
+those two alone, so the parts are independent jobs that can run in a pool;
+each job draws from its own RNG seeded by the caller, which keeps the
+result independent of scheduling.
+
+Parts are produced per section, with note starts relative to the section
+(``PART_NOTE_DTYPE``).  The form's section order and the tempo map are then
+applied to all of them alike, which lays each part out as one ``Track`` of
+time-sorted notes.  ``Arrangement.iter_midi_events`` turns the tracks into
+sorted MIDI message streams and combines them with ``heapq.merge``, so
+writing a file is one linear pass over the notes.
+"""
+
+import heapq
+import operator
+import random
+
+import numpy as np
+
+from .buffer import CONTROL_TEMPO, CONTROL_TIME_SIGNATURE, _gather_rows
+from .counterpoint import CounterpointGenerator
+from .smf import (DEFAULT_TICKS_PER_BEAT, ORDER_SETUP, iter_note_events, tempo_event,
+                  time_signature_event)
+from .vocabulary import get_vocabulary
+from .voiceleading import VoiceLeadingSolver
+
+# General MIDI program of each part
+PART_PROGRAMS = {
+    "melody": 0,         # Acoustic Grand Piano
+    "counterpoint": 48,  # String Ensemble 1
+    "comping": 4,        # Electric Piano 1
+    "bass": 32,          # Acoustic Bass
+}
+# Channel 10 (9 from zero) is reserved for percussion in General MIDI
+PERCUSSION_CHANNEL = 9
+
+# Comping rhythms and bass figures, as (start, length) fractions of a section;
+# bass notes also carry their interval above the root
+COMPING_PATTERNS = {
+    "sustained": [(0.0, 1.0)],
+    "halves": [(0.0, 0.5), (0.5, 0.5)],
+    "anticipated": [(0.0, 0.75), (0.75, 0.25)],
+}
+BASS_PATTERNS = {
+    "root": [(0.0, 1.0, 0)],
+    "root_fifth": [(0.0, 0.5, 0), (0.5, 0.5, 7)],
+    "octave": [(0.0, 0.5, 0), (0.5, 0.5, 12)],
+}
+BASS_RANGE = range(28, 52)
+COMPING_VELOCITY = 56
+BASS_VELOCITY = 80
+# Counterpoint plays under the melody at this fraction of its velocity
+COUNTERPOINT_LEVEL = 0.8
+# Sounding fraction of comping and bass notes
+ACCOMPANIMENT_GATE = 0.9
+
+# ``start`` and ``duration`` (how long the note sounds) are in beats, from
+# the start of the note's section in a part and of the piece in a ``Track``
+PART_NOTE_DTYPE = np.dtype([
+    ("start", np.float64),
+    ("duration", np.float64),
+    ("pitch", np.uint8),
+    ("velocity", np.uint8),
+])
+
+# Tempo and time signature changes of an arrangement, at ``beat``
+ARRANGEMENT_CONTROL_DTYPE = np.dtype([
+    ("beat", np.float64),
+    ("kind", np.uint8),
+    ("tempo", np.float32),
+    ("numerator", np.uint8),
+    ("denominator", np.uint8),
+])
+
+
+class Track:
+    """One instrument's notes, sorted by start, on its own program and channel."""
+
+    def __init__(self, name, program, channel, notes):
+        self.name = name
+        self.program = program
+        self.channel = channel
+        self.notes = notes
+
+    def __len__(self):
+        return len(self.notes)
+
+    def __repr__(self):
+        return f"Track({self.name!r}, program={self.program}, channel={self.channel}, notes={len(self)})"
+
+    def iter_midi_events(self, ticks_per_beat=DEFAULT_TICKS_PER_BEAT):
+        """Yield this track's ``(tick, order, data)`` note messages in time order."""
+        starts = np.rint(self.notes["start"] * ticks_per_beat).astype(np.int64)
+        ends = np.rint((self.notes["start"] + self.notes["duration"]) * ticks_per_beat).astype(np.int64)
+        return iter_note_events(starts.tolist(), ends.tolist(), self.notes["pitch"].tolist(),
+                                self.notes["velocity"].tolist(), self.channel)
+
+
+class Arrangement:
+    """Tracks sharing one timeline, with tempo and time signature changes.
+
+    ``controls`` is an ``ARRANGEMENT_CONTROL_DTYPE`` array sorted by beat.
+    """
+
+    def __init__(self, tracks, controls=None):
+        self.tracks = list(tracks)
+        self.controls = controls if controls is not None else np.zeros(0, dtype=ARRANGEMENT_CONTROL_DTYPE)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def __iter__(self):
+        return iter(self.tracks)
+
+    def __repr__(self):
+        return f"Arrangement(tracks={[track.name for track in self.tracks]}, controls={len(self.controls)})"
+
+    def track(self, name):
+        for track in self.tracks:
+            if track.name == name:
+                return track
+        raise KeyError(name)
+
+    @property
+    def n_notes(self):
+        return sum(len(track) for track in self.tracks)
+
+    def iter_midi_events(self, ticks_per_beat=DEFAULT_TICKS_PER_BEAT):
+        """Yield every track's messages, and the program and tempo changes, in time order.
+
+        Each stream is already sorted, so they are merged lazily in one pass.
+        """
+        setup = [(0, ORDER_SETUP, bytes([0xC0 | track.channel, track.program])) for track in self.tracks]
+        streams = [setup, self._control_events(ticks_per_beat)]
+        streams += [track.iter_midi_events(ticks_per_beat) for track in self.tracks]
+        return heapq.merge(*streams, key=operator.itemgetter(0, 1))
+
+    def _control_events(self, ticks_per_beat):
+        for beat, kind, tempo, numerator, denominator in self.controls.tolist():
+            tick = round(beat * ticks_per_beat)
+            if kind == CONTROL_TEMPO:
+                yield tick, ORDER_SETUP, tempo_event(tempo)
+            else:
+                yield tick, ORDER_SETUP, time_signature_event(numerator, denominator)
+
+
+def part_channels(names):
+    """Assign MIDI channels to parts in order, skipping the percussion channel."""
+    channels = [channel for channel in range(16) if channel != PERCUSSION_CHANNEL]
+    if len(names) > len(channels):
+        raise ValueError(f"An arrangement holds at most {len(channels)} tracks, got {len(names)}")
+    return channels[:len(names)]
+
+
+def section_beats(melody):
+    """Length in beats of every section of a melody ``NoteBuffer``."""
+    elapsed = np.concatenate([[0.0], np.cumsum(melody.notes["duration"], dtype=np.float64)])
+    return elapsed[melody.section_offsets[1:]] - elapsed[melody.section_offsets[:-1]]
+
+
+def melody_part(melody, level=1.0):
+    """Return ``(notes, section_offsets)`` of a ``NoteBuffer`` as a part.
+
+    Articulation shortens how long each note sounds and ``level`` scales
+    its velocity.
+    """
+    durations = melody.notes["duration"].astype(np.float64)
+    elapsed = np.concatenate([[0.0], np.cumsum(durations)])
+    section_starts = elapsed[melody.section_offsets[:-1]]
+
+    notes = np.zeros(melody.n_notes, dtype=PART_NOTE_DTYPE)
+    notes["start"] = elapsed[:-1] - np.repeat(section_starts, melody.section_lengths())
+    notes["duration"] = durations * melody.gates()
+    notes["pitch"] = melody.notes["pitch"]
+    notes["velocity"] = np.clip(np.rint(melody.velocities() * level), 1, 127)
+    return notes, melody.section_offsets.copy()
+
+
+def lay_out(part, order, section_starts):
+    """Lay the sections of ``part`` out in ``order`` as one sorted note array.
+
+    ``section_starts`` is the beat at which each entry of ``order`` begins.
+    """
+    notes, offsets = part
+    order = np.asarray(order, dtype=np.int64)
+    lengths = np.diff(offsets)[order]
+    laid_out = notes[_gather_rows(offsets[order], lengths)]
+    # Sections follow each other and notes never start past their section's end,
+    # so adding each section's start keeps the whole array sorted
+    laid_out["start"] += np.repeat(section_starts, lengths)
+    return laid_out
+
+
+class CompingGenerator:
+    """Block chords voiced from the chord tones, one rhythm per section."""
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
+        self.vocabulary = get_vocabulary()
+        self._voicings = {}
+
+    def generate_comping(self, chord_progression, section_lengths):
+        """Return the comping part as ``(notes, section_offsets)``.
+
+        ``section_lengths`` is the length in beats of each chord's section.
+        """
+        try:
+            rows = []
+            offsets = [0]
+            patterns = list(COMPING_PATTERNS.values())
+            for chord_id, length in zip(self.vocabulary.intern_many(chord_progression).tolist(),
+                                        np.asarray(section_lengths).tolist()):
+                voicing = self._voicing(chord_id)
+                for start, fraction in self.rng.choice(patterns):
+                    velocity = COMPING_VELOCITY + self.rng.randint(-6, 6)
+                    rows.extend((start * length, fraction * length * ACCOMPANIMENT_GATE, pitch, velocity)
+                                for pitch in voicing)
+                offsets.append(len(rows))
+            return np.array(rows, dtype=PART_NOTE_DTYPE), np.array(offsets, dtype=np.int64)
+
+        except Exception as ex:
+            raise Exception("An error occurred during comping generation: " + str(ex))
+
+    def _voicing(self, chord_id):
+        # One note per chord tone, an octave below the chord's melody range
+        voicing = self._voicings.get(chord_id)
+        if voicing is None:
+            pitch_range = self.vocabulary.pitch_range(chord_id)
+            mask = self.vocabulary.tone_mask(chord_id)
+            voicing, seen = [], set()
+            for pitch in range(pitch_range.start - 12, pitch_range.stop - 12):
+                if mask >> (pitch % 12) & 1 and pitch % 12 not in seen:
+                    seen.add(pitch % 12)
+                    voicing.append(pitch)
+            self._voicings[chord_id] = voicing
+        return voicing
+
+
+class BassLineGenerator:
+    """A bass figure on each chord's root, kept close to the previous note."""
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
+        self.vocabulary = get_vocabulary()
+
+    def generate_bass_line(self, chord_progression, section_lengths):
+        """Return the bass part as ``(notes, section_offsets)``."""
+        try:
+            rows = []
+            offsets = [0]
+            patterns = list(BASS_PATTERNS.values())
+            previous = (BASS_RANGE.start + BASS_RANGE.stop) // 2
+            for chord_id, length in zip(self.vocabulary.intern_many(chord_progression).tolist(),
+                                        np.asarray(section_lengths).tolist()):
+                root = self._nearest_root(self.vocabulary.root_classes[chord_id], previous)
+                for start, fraction, interval in self.rng.choice(patterns):
+                    pitch = root + interval
+                    if pitch >= BASS_RANGE.stop:
+                        pitch -= 12
+                    rows.append((start * length, fraction * length * ACCOMPANIMENT_GATE, pitch, BASS_VELOCITY))
+                previous = root
+                offsets.append(len(rows))
+            return np.array(rows, dtype=PART_NOTE_DTYPE), np.array(offsets, dtype=np.int64)
+
+        except Exception as ex:
+            raise Exception("An error occurred during bass line generation: " + str(ex))
+
+    def _nearest_root(self, root_class, previous):
+        roots = range(BASS_RANGE.start + (root_class - BASS_RANGE.start) % 12, BASS_RANGE.stop, 12)
+        return min(roots, key=lambda pitch: abs(pitch - previous))
+
+
+def generate_part(job):
+    """Generate one part; returns ``[(name, part), ...]``.
+
+    ``job`` is ``(name, seed, chord_progression, melody, voices, beam_width)``
+    with ``melody`` a ``NoteBuffer``.  It runs inside pool workers, so it
+    must stay a picklable module-level function.
+    """
+    name, seed, chord_progression, melody, voices, beam_width = job
+    rng = random.Random(seed)
+    if name == "counterpoint":
+        generator = CounterpointGenerator(rng, solver=VoiceLeadingSolver(beam_width))
+        lines = generator.solve_counterpoint_lines(melody, chord_progression, voices)
+        return [(f"counterpoint {voice + 1}" if voices > 1 else "counterpoint",
+                 melody_part(line, COUNTERPOINT_LEVEL)) for voice, line in enumerate(lines)]
+    if name == "comping":
+        return [(name, CompingGenerator(rng).generate_comping(chord_progression, section_beats(melody)))]
+    if name == "bass":
+        return [(name, BassLineGenerator(rng).generate_bass_line(chord_progression, section_beats(melody)))]
+    raise ValueError(f"Unknown part {name!r}")
+
+
+def build_arrangement(parts, order, section_lengths, changes):
+    """Lay parts out in form ``order`` and return an ``Arrangement``.
+
+    ``parts`` is a list of ``(name, part)`` pairs in track order, sharing
+    sections; ``changes`` lists the tempo and time signature event dicts
+    that follow each section of ``order``.
+    """
+    order_lengths = np.asarray(section_lengths, dtype=np.float64)[np.asarray(order, dtype=np.int64)]
+    section_ends = np.cumsum(order_lengths)
+    section_starts = section_ends - order_lengths
+
+    tracks = []
+    for (name, part), channel in zip(parts, part_channels([name for name, _ in parts])):
+        program = PART_PROGRAMS[name.split()[0]]
+        tracks.append(Track(name, program, channel, lay_out(part, order, section_starts)))
+
+    controls = []
+    for end, section_changes in zip(section_ends.tolist(), changes):
+        for change in section_changes:
+            if change["type"] == "tempo":
+                controls.append((end, CONTROL_TEMPO, change["value"], 0, 0))
+            elif change["type"] == "time_signature":
+                numerator, denominator = (int(part) for part in change["value"].split("/"))
+                controls.append((end, CONTROL_TIME_SIGNATURE, 0, numerator, denominator))
+    return Arrangement(tracks, np.array(controls, dtype=ARRANGEMENT_CONTROL_DTYPE))
@@ -0,0 +1,221 @@
+"""Offline audio rendering with a small additive piano-like synth.
+
+Every note is a cached waveform: a handful of slightly inharmonic partials
+with per-partial exponential decay, a short attack and a release tail,
+computed once per ``(pitch, velocity, length in samples)``.  Compositions
+are turned into a timeline of note starts and lengths (following tempo
+changes, as the MIDI exporters do), and each note's waveform is added
+into a preallocated float buffer as a slice, so memory stays bounded by
+the output and the waveform cache however many distinct notes a piece has.
+
+``AudioRenderer.render`` returns the whole piece, ``iter_chunks`` and
+``write_wav`` stream it in fixed-size chunks (also from a lazy section
+iterator), and ``render_parallel`` splits the timeline across processes.
+"""
+
+import functools
+import itertools
+import os
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .buffer import CONTROL_TEMPO, NoteBuffer
+from .smf import DEFAULT_TEMPO
+
+SAMPLE_RATE = 44100
+# Relative amplitudes of the partials; higher ones also decay faster
+PARTIALS = np.array([1.0, 0.5, 0.3, 0.2, 0.12, 0.08, 0.05, 0.03])
+INHARMONICITY = 0.0004
+ATTACK_SECONDS = 0.005
+RELEASE_SECONDS = 0.08
+DECAY_PER_SECOND = 1.5
+# Output scale before clipping, leaving headroom for overlapping releases
+GAIN = 0.3
+DEFAULT_CHUNK_SECONDS = 10.0
+
+
+@functools.lru_cache(maxsize=4096)
+def note_waveform(pitch, velocity, n_samples, sample_rate=SAMPLE_RATE):
+    """Return the read-only ``float32`` waveform of one note, release included.
+
+    The note sounds for ``n_samples`` and then fades out over
+    ``RELEASE_SECONDS``.
+    """
+    release = int(RELEASE_SECONDS * sample_rate)
+    t = np.arange(n_samples + release) / sample_rate
+    frequency = 440.0 * 2 ** ((pitch - 69) / 12)
+    harmonics = np.arange(1, len(PARTIALS) + 1)
+    frequencies = frequency * harmonics * np.sqrt(1 + INHARMONICITY * harmonics ** 2)
+    # Louder notes are brighter: upper partials scale faster with velocity
+    loudness = velocity / 127
+    amplitudes = PARTIALS * loudness ** (1 + 0.3 * (harmonics - 1))
+    audible = frequencies < sample_rate / 2
+
+    # (partials, samples) in one shot; no per-sample Python work
+    decay = np.exp(-np.outer(DECAY_PER_SECOND * harmonics[audible], t))
+    partials = np.sin(np.outer(2 * np.pi * frequencies[audible], t)) * decay
+    waveform = amplitudes[audible] @ partials
+
+    envelope = np.minimum(1.0, t / ATTACK_SECONDS)
+    envelope[n_samples:] *= np.linspace(1.0, 0.0, release, endpoint=False)
+    waveform = (waveform * envelope * GAIN).astype(np.float32)
+    waveform.flags.writeable = False
+    return waveform
+
+
+def note_timeline(composition, start_time=0.0, tempo=DEFAULT_TEMPO):
+    """Return note times in seconds for a ``NoteBuffer`` or event sections.
+
+    Returns ``(starts, durations, pitches, velocities, end_time, tempo)``:
+    four arrays with one entry per note (durations are how long each note
+    sounds), the time the last note ends and
+    the tempo in force there, so consecutive blocks can be chained.
+    """
+    buffer = composition if isinstance(composition, NoteBuffer) else NoteBuffer.from_events(composition)
+    notes = buffer.notes
+    tempo_controls = buffer.controls[buffer.controls["kind"] == CONTROL_TEMPO]
+
+    # Index of the first note each tempo change applies to; controls are sorted
+    change_at = buffer.section_offsets[tempo_controls["section"]] + tempo_controls["position"]
+    seconds_per_beat = np.concatenate([[60.0 / tempo], 60.0 / tempo_controls["tempo"].astype(np.float64)])
+    segment = np.searchsorted(change_at, np.arange(len(notes)), side="right")
+    durations = notes["duration"] * seconds_per_beat[segment]
+
+    ends = start_time + np.cumsum(durations)
+    starts = ends - durations
+    end_time = float(ends[-1]) if len(ends) else start_time
+    # Articulation shortens how long each note sounds, not when the next starts
+    sounding = durations * buffer.gates()
+    return starts, sounding, notes["pitch"].copy(), buffer.velocities(), end_time, 60.0 / seconds_per_beat[-1]
+
+
+def to_pcm16(samples):
+    """Convert float samples in [-1, 1] to 16-bit PCM, clipping overs."""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class AudioRenderer:
+    """Render compositions to mono float32 audio at ``sample_rate``."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, tempo=DEFAULT_TEMPO):
+        self.sample_rate = sample_rate
+        self.tempo = tempo
+        self.release = int(RELEASE_SECONDS * sample_rate)
+
+    def render(self, composition):
+        """Return the whole composition as one ``float32`` array."""
+        notes = self._notes(*note_timeline(composition, tempo=self.tempo)[:4])
+        return self._render_window(notes, 0, self._end(notes))
+
+    def render_parallel(self, composition, workers=None):
+        """``render`` with the timeline split into one span per worker process."""
+        notes = self._notes(*note_timeline(composition, tempo=self.tempo)[:4])
+        total = self._end(notes)
+        workers = workers or os.cpu_count() or 1
+        bounds = np.linspace(0, total, workers + 1).astype(np.int64)
+        jobs = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            starts, lengths = notes[0], notes[1]
+            # Only the notes sounding somewhere in this span travel to the worker
+            overlapping = (starts < end) & (starts + lengths + self.release > start)
+            jobs.append((self.sample_rate, tuple(column[overlapping] for column in notes),
+                         int(start), int(end - start)))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return np.concatenate(list(executor.map(_render_window_job, jobs)))
+
+    def iter_chunks(self, composition, chunk_seconds=DEFAULT_CHUNK_SECONDS, block_sections=256):
+        """Yield the audio in ``chunk_seconds`` pieces as it is rendered.
+
+        ``composition`` may be a lazy iterable of sections, such as
+        ``AdvancedMusicGenerator.iter_piano_music``; it is read
+        ``block_sections`` sections at a time, so memory stays bounded by
+        the chunk and block sizes.
+        """
+        chunk = int(chunk_seconds * self.sample_rate)
+        blocks = self._iter_notes(composition, block_sections)
+        pending = self._notes(*(np.zeros(0),) * 4)
+        chunk_start = 0
+        exhausted = False
+        while True:
+            # A chunk is complete once a note starts after it (notes arrive in order)
+            while not exhausted and (not len(pending[0]) or pending[0][-1] < chunk_start + chunk):
+                block = next(blocks, None)
+                if block is None:
+                    exhausted = True
+                else:
+                    pending = tuple(np.concatenate([old, new]) for old, new in zip(pending, block))
+
+            length = chunk
+            if exhausted:
+                remaining = self._end(pending) - chunk_start
+                if remaining <= 0:
+                    return
+                length = min(chunk, remaining)
+
+            starting = pending[0] < chunk_start + length
+            yield self._render_window(tuple(column[starting] for column in pending), chunk_start, length)
+
+            chunk_start += length
+            still_sounding = pending[0] + pending[1] + self.release > chunk_start
+            pending = tuple(column[still_sounding] for column in pending)
+
+    def write_wav(self, composition, output, chunk_seconds=DEFAULT_CHUNK_SECONDS):
+        """Stream the composition to a 16-bit mono WAV file (a path or seekable file)."""
+        with wave.open(output, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            for samples in self.iter_chunks(composition, chunk_seconds):
+                wav_file.writeframes(to_pcm16(samples).tobytes())
+        return output
+
+    def _iter_notes(self, composition, block_sections):
+        if isinstance(composition, NoteBuffer):
+            blocks = [composition]
+        else:
+            sections = iter(composition)
+            blocks = iter(lambda: list(itertools.islice(sections, block_sections)), [])
+        time, tempo = 0.0, self.tempo
+        for block in blocks:
+            starts, durations, pitches, velocities, time, tempo = note_timeline(block, time, tempo)
+            yield self._notes(starts, durations, pitches, velocities)
+
+    def _notes(self, starts, durations, pitches, velocities):
+        # (start sample, sounding samples, pitch, velocity) columns
+        starts = np.round(np.asarray(starts) * self.sample_rate).astype(np.int64)
+        lengths = np.maximum(1, np.round(np.asarray(durations) * self.sample_rate)).astype(np.int64)
+        return starts, lengths, np.asarray(pitches, dtype=np.int64), np.asarray(velocities, dtype=np.int64)
+
+    def _end(self, notes):
+        starts, lengths = notes[0], notes[1]
+        return int((starts + lengths).max()) + self.release if len(starts) else 0
+
+    def _render_window(self, notes, window_start, length):
+        out = np.zeros(length, dtype=np.float32)
+        starts, lengths, pitches, velocities = notes
+        if not len(starts):
+            return out
+
+        # Notes grouped by waveform, so each one is looked up once per window
+        # and only a single waveform is held beyond the cache at a time
+        keys, inverse = np.unique(np.stack([pitches, velocities, lengths], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1)).tolist()
+        offsets = (starts[order] - window_start).tolist()
+        for row, (pitch, velocity, n_samples) in enumerate(keys.tolist()):
+            waveform = note_waveform(pitch, velocity, n_samples, self.sample_rate)
+            for offset in offsets[bounds[row]:bounds[row + 1]]:
+                # Only the part of the note inside the window is added
+                begin, end = max(offset, 0), min(offset + len(waveform), length)
+                if begin < end:
+                    out[begin:end] += waveform[begin - offset:end - offset]
+        return out
+
+
+def _render_window_job(job):
+    sample_rate, notes, window_start, length = job
+    return AudioRenderer(sample_rate)._render_window(notes, window_start, length)
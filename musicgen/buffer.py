@@ -0,0 +1,284 @@
+"""Columnar, array-backed storage for compositions.
+
+A ``NoteBuffer`` holds the same information as the nested lists of event
+dicts used throughout the pipeline, but as two NumPy structured arrays: one
+row per note, and one row per tempo/time-signature control event.  Sections
+are delimited by an offsets array instead of being separate lists.
+"""
+
+from array import array
+
+import numpy as np
+
+# Code 0 means "not set" (``None`` in the dict form) for both columns
+DYNAMICS = ("pp", "p", "mp", "mf", "f", "ff")
+ARTICULATIONS = ("legato", "staccato", "tenuto", "accent")
+
+DYNAMIC_CODES = {name: code for code, name in enumerate(DYNAMICS, start=1)}
+ARTICULATION_CODES = {name: code for code, name in enumerate(ARTICULATIONS, start=1)}
+
+# Velocity of notes with neither a velocity nor a dynamic mark
+DEFAULT_VELOCITY = 64
+# MIDI velocities of the dynamic marks, and the fraction of a note's duration
+# that sounds under each articulation
+DYNAMIC_VELOCITIES = {"pp": 33, "p": 49, "mp": 64, "mf": 80, "f": 96, "ff": 112}
+ARTICULATION_GATES = {"legato": 1.0, "staccato": 0.5, "tenuto": 0.95, "accent": 0.9}
+
+# The same, indexed by code (0 = unset)
+DYNAMIC_VELOCITY_TABLE = np.array([DEFAULT_VELOCITY] + [DYNAMIC_VELOCITIES[name] for name in DYNAMICS],
+                                  dtype=np.uint8)
+ARTICULATION_GATE_TABLE = np.array([1.0] + [ARTICULATION_GATES[name] for name in ARTICULATIONS])
+
+CONTROL_TEMPO = 1
+CONTROL_TIME_SIGNATURE = 2
+
+# A ``velocity`` of 0 means "derive from ``dynamic``"
+NOTE_DTYPE = np.dtype([
+    ("pitch", np.uint8),
+    ("duration", np.float32),
+    ("dynamic", np.uint8),
+    ("articulation", np.uint8),
+    ("velocity", np.uint8),
+])
+
+# ``position`` is the number of notes of ``section`` played before the event
+CONTROL_DTYPE = np.dtype([
+    ("section", np.uint32),
+    ("position", np.uint32),
+    ("kind", np.uint8),
+    ("tempo", np.float32),
+    ("numerator", np.uint8),
+    ("denominator", np.uint8),
+    ("beats", np.uint8),
+])
+
+
+class NoteBuffer:
+    """A composition stored as note and control-event columns.
+
+    ``notes`` is a ``NOTE_DTYPE`` array in playing order; section ``i`` is
+    ``notes[section_offsets[i]:section_offsets[i + 1]]``.  ``controls`` is a
+    ``CONTROL_DTYPE`` array sorted by ``(section, position)``.
+    """
+
+    def __init__(self, notes, section_offsets, controls=None):
+        self.notes = notes
+        self.section_offsets = np.asarray(section_offsets, dtype=np.int64)
+        self.controls = controls if controls is not None else np.zeros(0, dtype=CONTROL_DTYPE)
+
+    def __len__(self):
+        return len(self.section_offsets) - 1
+
+    def __eq__(self, other):
+        if not isinstance(other, NoteBuffer):
+            return NotImplemented
+        return (np.array_equal(self.section_offsets, other.section_offsets)
+                and np.array_equal(self.notes, other.notes)
+                and np.array_equal(self.controls, other.controls))
+
+    def __repr__(self):
+        return f"NoteBuffer(sections={len(self)}, notes={self.n_notes}, controls={len(self.controls)})"
+
+    @property
+    def n_notes(self):
+        return len(self.notes)
+
+    @property
+    def nbytes(self):
+        return self.notes.nbytes + self.section_offsets.nbytes + self.controls.nbytes
+
+    def section_lengths(self):
+        return np.diff(self.section_offsets)
+
+    def velocities(self, default=DEFAULT_VELOCITY):
+        """MIDI velocity of every note, falling back to its dynamic mark."""
+        return note_velocities(self.notes, default)
+
+    def gates(self):
+        """Sounding fraction of every note's duration, from its articulation."""
+        return ARTICULATION_GATE_TABLE[self.notes["articulation"]]
+
+    def section(self, index):
+        """Return a view of the notes of section ``index``."""
+        return self.notes[self.section_offsets[index]:self.section_offsets[index + 1]]
+
+    def copy(self):
+        return NoteBuffer(self.notes.copy(), self.section_offsets.copy(), self.controls.copy())
+
+    def take_sections(self, indices):
+        """Return a new buffer made of the given sections, in order.
+
+        Indices may repeat; this is how form structures reuse sections.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        lengths = self.section_lengths()[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        notes = self.notes[_gather_rows(self.section_offsets[indices], lengths)]
+
+        # Controls are sorted by section, so each section's rows are a slice
+        control_sections = self.controls["section"]
+        control_starts = np.searchsorted(control_sections, indices, side="left")
+        control_counts = np.searchsorted(control_sections, indices, side="right") - control_starts
+        controls = self.controls[_gather_rows(control_starts, control_counts)]
+        controls["section"] = np.repeat(np.arange(len(indices)), control_counts)
+        return NoteBuffer(notes, offsets, controls)
+
+    def with_controls(self, controls):
+        """Return a buffer sharing these notes with ``controls`` merged in."""
+        merged = np.concatenate([self.controls, controls])
+        # A stable sort keeps events at the same position in insertion order
+        order = np.lexsort((merged["position"], merged["section"]))
+        return NoteBuffer(self.notes, self.section_offsets, merged[order])
+
+    def iter_sections(self):
+        """Yield each section as a list of event dicts, one section at a time."""
+        controls = self.controls.tolist()
+        control_index = 0
+        for index in range(len(self)):
+            start, end = self.section_offsets[index], self.section_offsets[index + 1]
+            section = [_note_event(*row) for row in self.notes[start:end].tolist()]
+            # Insert from the back so earlier positions stay valid
+            section_controls = []
+            while control_index < len(controls) and controls[control_index][0] == index:
+                section_controls.append(controls[control_index])
+                control_index += 1
+            for row in reversed(section_controls):
+                section.insert(row[1], _control_event(*row[2:]))
+            yield section
+
+    def to_events(self):
+        """Convert back to the nested list-of-dicts form."""
+        return list(self.iter_sections())
+
+    @classmethod
+    def from_events(cls, composition):
+        """Build a buffer from the nested list-of-dicts form."""
+        builder = NoteBufferBuilder()
+        for section in composition:
+            for event in section:
+                event_type = event.get("type", "note")
+                if event_type == "note":
+                    builder.add_note(
+                        event["note"],
+                        event.get("duration", 0.0),
+                        DYNAMIC_CODES.get(event.get("dynamic"), 0),
+                        ARTICULATION_CODES.get(event.get("articulation"), 0),
+                        event.get("velocity") or 0,
+                    )
+                elif event_type == "tempo":
+                    builder.add_tempo(event["value"])
+                elif event_type == "time_signature":
+                    builder.add_time_signature(event["value"], event.get("beats"))
+            builder.end_section()
+        return builder.build()
+
+
+class NoteBufferBuilder:
+    """Append-only builder for ``NoteBuffer``.
+
+    Columns accumulate in ``array`` module arrays, which grow without
+    per-note object allocation, and are copied into structured arrays once
+    by ``build``.
+    """
+
+    def __init__(self):
+        self.pitch = array("B")
+        self.duration = array("f")
+        self.dynamic = array("B")
+        self.articulation = array("B")
+        self.velocity = array("B")
+        self.section_offsets = array("q", [0])
+        self.controls = []
+
+    def add_note(self, pitch, duration=0.0, dynamic=0, articulation=0, velocity=0):
+        self.pitch.append(pitch)
+        self.duration.append(duration)
+        self.dynamic.append(dynamic)
+        self.articulation.append(articulation)
+        self.velocity.append(velocity)
+
+    def add_notes(self, pitches, duration=0.0):
+        self.pitch.extend(pitches)
+        self.duration.extend([duration] * len(pitches))
+        self.dynamic.extend(bytes(len(pitches)))
+        self.articulation.extend(bytes(len(pitches)))
+        self.velocity.extend(bytes(len(pitches)))
+
+    def add_tempo(self, tempo):
+        section, position = self._cursor()
+        self.controls.append(tempo_control(section, position, tempo))
+
+    def add_time_signature(self, value, beats=None):
+        section, position = self._cursor()
+        self.controls.append(time_signature_control(section, position, value, beats))
+
+    def _cursor(self):
+        # Section being built and the number of notes already in it
+        return len(self.section_offsets) - 1, len(self.pitch) - self.section_offsets[-1]
+
+    def end_section(self):
+        self.section_offsets.append(len(self.pitch))
+
+    def build(self):
+        notes = np.empty(len(self.pitch), dtype=NOTE_DTYPE)
+        notes["pitch"] = np.frombuffer(self.pitch, dtype=np.uint8)
+        notes["duration"] = np.frombuffer(self.duration, dtype=np.float32)
+        notes["dynamic"] = np.frombuffer(self.dynamic, dtype=np.uint8)
+        notes["articulation"] = np.frombuffer(self.articulation, dtype=np.uint8)
+        notes["velocity"] = np.frombuffer(self.velocity, dtype=np.uint8)
+        controls = np.array(self.controls, dtype=CONTROL_DTYPE)
+        return NoteBuffer(notes, np.frombuffer(self.section_offsets, dtype=np.int64).copy(), controls)
+
+
+def _gather_rows(starts, counts):
+    # Row indices of the slices [start, start + count) laid end to end
+    ends = np.cumsum(counts)
+    return np.repeat(starts - (ends - counts), counts) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def note_velocities(notes, default=DEFAULT_VELOCITY):
+    """Velocities of ``NOTE_DTYPE`` rows: their own, else their dynamic's, else ``default``."""
+    table = DYNAMIC_VELOCITY_TABLE.copy()
+    table[0] = default
+    return np.where(notes["velocity"] > 0, notes["velocity"], table[notes["dynamic"]])
+
+
+def event_velocity(event, default=DEFAULT_VELOCITY):
+    """The MIDI velocity of a note event dict, as ``note_velocities`` resolves it."""
+    return event.get("velocity") or DYNAMIC_VELOCITIES.get(event.get("dynamic"), default)
+
+
+def event_gate(event):
+    """The sounding fraction of a note event dict's duration."""
+    return ARTICULATION_GATES.get(event.get("articulation"), 1.0)
+
+
+def tempo_control(section, position, tempo):
+    """Return a ``CONTROL_DTYPE`` row for a tempo change."""
+    return (section, position, CONTROL_TEMPO, tempo, 0, 0, 0)
+
+
+def time_signature_control(section, position, value, beats=None):
+    """Return a ``CONTROL_DTYPE`` row for a time signature such as ``"6/8"``."""
+    numerator, denominator = (int(part) for part in value.split("/"))
+    return (section, position, CONTROL_TIME_SIGNATURE, 0, numerator, denominator,
+            numerator if beats is None else beats)
+
+
+def _note_event(pitch, duration, dynamic, articulation, velocity):
+    return {
+        "type": "note",
+        "note": pitch,
+        "duration": duration,
+        "dynamic": DYNAMICS[dynamic - 1] if dynamic else None,
+        "articulation": ARTICULATIONS[articulation - 1] if articulation else None,
+        "velocity": velocity or None,
+    }
+
+
+def _control_event(kind, tempo, numerator, denominator, beats):
+    if kind == CONTROL_TEMPO:
+        return {"type": "tempo", "value": int(tempo) if tempo.is_integer() else tempo}
+    return {"type": "time_signature", "value": f"{numerator}/{denominator}", "beats": beats}
@@ -0,0 +1,213 @@
+"""Content-addressed cache for seeded renders.
+
+A seeded render is a pure function of its seed, its parameters and the code
+that produced it, so ``cache_key`` hashes exactly those; the code is
+identified by a digest of the package sources (``code_version``).  ``RenderCache``
+keeps recent compositions and MIDI bytes in a size-bounded in-memory LRU
+and, optionally, MIDI files in a directory shared across processes.
+"""
+
+import functools
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .buffer import NoteBuffer
+from .generator import AdvancedMusicGenerator
+from .midi import MIDIExporter
+
+# Bump when the layout of cached entries changes
+CACHE_FORMAT = 2
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """Digest of the ``musicgen`` sources, so any code change invalidates renders."""
+    package_directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(package_directory)):
+        if name.endswith(".py"):
+            digest.update(name.encode() + b"\0")
+            with open(os.path.join(package_directory, name), "rb") as source_file:
+                digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+def cache_key(kind, seed, parameters, version=None):
+    """Return the hex digest identifying one render.
+
+    ``version`` defaults to ``code_version()``.
+    """
+    if version is None:
+        version = code_version()
+    payload = json.dumps(
+        {"kind": kind, "seed": seed, "parameters": parameters, "version": version, "format": CACHE_FORMAT},
+        sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _sizeof(value):
+    if isinstance(value, NoteBuffer):
+        return value.nbytes
+    return len(value)
+
+
+class LRUCache:
+    """A thread-safe LRU mapping bounded by the total size of its values."""
+
+    def __init__(self, max_bytes, sizeof=_sizeof):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+class RenderCache:
+    """Cache compositions and MIDI renders keyed by seed and parameters.
+
+    ``parameters`` are pipeline parameters, as for ``AdvancedMusicGenerator``,
+    and ``options`` the keyword arguments of its ``generate_piano_music``
+    (``as_buffer`` is always on).  ``seed`` must be given: an unseeded
+    render is a different piece every time, so there is nothing to cache.
+    Compositions are returned as copies, since pipeline stages mutate their
+    input.  With ``directory`` set, MIDI
+    bytes are also kept on disk as ``<directory>/<key[:2]>/<key>.mid``.
+    """
+
+    def __init__(self, max_bytes=64 << 20, directory=None):
+        self.memory = LRUCache(max_bytes)
+        self.directory = directory
+        self.disk_hits = 0
+        self.disk_writes = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.memory.hits,
+            "misses": self.memory.misses,
+            "evictions": self.memory.evictions,
+            "disk_hits": self.disk_hits,
+            "disk_writes": self.disk_writes,
+            "entries": len(self.memory),
+            "bytes": self.memory.current_bytes,
+        }
+
+    def generate(self, seed, parameters=None, **options):
+        """Cached ``AdvancedMusicGenerator(seed, parameters=...).generate_piano_music(as_buffer=True, ...)``."""
+        key = _render_key("composition", seed, parameters, options)
+        composition = self.memory.get(key)
+        if composition is None:
+            composition = _render(seed, parameters, options)
+            self.memory.put(key, composition)
+        return composition.copy()
+
+    def lookup_midi(self, seed, parameters=None, **options):
+        """Return cached MIDI bytes from memory or disk, or None."""
+        key = _render_key("midi", seed, parameters, options)
+        midi_bytes = self.memory.get(key)
+        if midi_bytes is None and self.directory is not None:
+            try:
+                with open(self._path(key), "rb") as midi_file:
+                    midi_bytes = midi_file.read()
+            except FileNotFoundError:
+                return None
+            self.disk_hits += 1
+            # Promote to the memory tier
+            self.memory.put(key, midi_bytes)
+        return midi_bytes
+
+    def store_midi(self, midi_bytes, seed, parameters=None, **options):
+        key = _render_key("midi", seed, parameters, options)
+        self.memory.put(key, midi_bytes)
+        if self.directory is not None and not os.path.exists(self._path(key)):
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so concurrent readers never see a partial file
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(midi_bytes)
+            os.replace(temp_path, path)
+            self.disk_writes += 1
+
+    def midi_bytes(self, seed, parameters=None, **options):
+        """Cached render of the composition for ``seed`` as MIDI file bytes.
+
+        Only the MIDI bytes are cached; the composition behind them is not.
+        """
+        midi_bytes = self.lookup_midi(seed, parameters, **options)
+        if midi_bytes is None:
+            composition = _render(seed, parameters, options)
+            midi_bytes = MIDIExporter().stream_to_midi(composition, output=io.BytesIO()).getvalue()
+            self.store_midi(midi_bytes, seed, parameters, **options)
+        return midi_bytes
+
+    def export_to_midi(self, seed, output_directory, filename=None, parameters=None, **options):
+        """Write the cached render for ``seed`` to a file and return its path.
+
+        The default file name carries a prefix of the render's key, so renders
+        of one seed with different parameters or options don't overwrite each other.
+        """
+        midi_bytes = self.midi_bytes(seed, parameters, **options)
+        if filename is None:
+            filename = f"generated_music_{seed}_{_render_key('midi', seed, parameters, options)[:12]}.mid"
+        midi_filename = os.path.join(output_directory, filename)
+        with open(midi_filename, "wb") as midi_file:
+            midi_file.write(midi_bytes)
+        return midi_filename
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".mid")
+
+
+def _render_key(kind, seed, parameters, options):
+    if seed is None:
+        raise ValueError("RenderCache needs a seed; unseeded renders can't be cached")
+    return cache_key(kind, seed, {"parameters": parameters or {}, "options": options})
+
+
+def _render(seed, parameters, options):
+    return AdvancedMusicGenerator(seed, parameters=parameters).generate_piano_music(as_buffer=True, **options)
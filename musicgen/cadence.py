@@ -0,0 +1,61 @@
+"""Cadences and key changes over a chord progression."""
+
+import numbers
+import random
+
+from .vocabulary import KEY_CHANGES, get_vocabulary
+
+# Chance that a chord is moved to a new key (the "authentic" cadence below)
+KEY_CHANGE_PROBABILITY = 0.4
+
+
+class CadenceGenerator:
+    def __init__(self, rng=None, key_change_probability=KEY_CHANGE_PROBABILITY):
+        self.rng = rng if rng is not None else random
+        if (isinstance(key_change_probability, bool) or not isinstance(key_change_probability, numbers.Real)
+                or not 0 <= key_change_probability <= 1):
+            raise ValueError(f"key_change_probability must be a number in [0, 1], got {key_change_probability!r}")
+        self.key_change_probability = key_change_probability
+
+    def generate_cadences_and_key_changes(self, chord_progression, as_ids=False):
+        """Return the progression with key changes, as symbols or vocabulary IDs.
+
+        Chords may be given as symbols or as vocabulary IDs.
+        """
+        try:
+            vocabulary = get_vocabulary()
+
+            # Define cadence probabilities
+            cadence_probabilities = {
+                "authentic": self.key_change_probability,
+                "plagal": 0.2,
+                "deceptive": 0.1
+            }
+
+            key_changes = KEY_CHANGES
+
+            # Initialize the new chord progression list
+            new_chord_progression = []
+
+            for i, chord in enumerate(vocabulary.intern_many(chord_progression).tolist()):
+                new_chord = chord
+
+                # Introduce key change with probability
+                if self.rng.random() < cadence_probabilities.get("authentic", 0):
+                    new_key = self.rng.choice(key_changes)
+                    new_chord = vocabulary.with_root(chord, new_key)  # Change root of the chord
+                    new_chord_progression.append(new_chord)
+
+                # Apply other cadence types as needed
+                # ...
+
+                # If no key change or cadence, keep the original chord
+                if new_chord == chord:
+                    new_chord_progression.append(chord)
+
+            if as_ids:
+                return new_chord_progression
+            return [vocabulary.symbols[chord_id] for chord_id in new_chord_progression]
+
+        except Exception as ex:
+            raise Exception("An error occurred during cadence and key change generation: " + str(ex))
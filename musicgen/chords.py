@@ -0,0 +1,97 @@
+"""Chord progression generation."""
+
+import numbers
+import random
+
+import numpy as np
+
+from .markov import default_engine
+from .vocabulary import BORROWED_CHORDS, CHORD_DEFINITIONS, PITCH_RANGES, get_vocabulary
+
+# Chords per progression drawn by ``generate_advanced_chord_progression``
+PROGRESSION_LENGTH = 8
+
+
+class ChordGenerator:
+    def __init__(self, rng=None, np_rng=None, progression_length=PROGRESSION_LENGTH):
+        # Random source for this stage; defaults to the global random module
+        self.rng = rng if rng is not None else random
+        # NumPy generator for Markov progressions
+        self.np_rng = np_rng if np_rng is not None else np.random.default_rng()
+        if (isinstance(progression_length, bool) or not isinstance(progression_length, numbers.Integral)
+                or progression_length < 1):
+            raise ValueError(f"progression_length must be an integer of at least 1, got {progression_length!r}")
+        self.progression_length = progression_length
+        self.pitch_ranges = {quality: PITCH_RANGES[quality] for quality, _ in CHORD_DEFINITIONS}
+
+        # Chord definitions and borrowed chords, resolved to vocabulary IDs once
+        self.vocabulary = get_vocabulary()
+        self.definition_ids = [
+            [self.vocabulary.intern(quality + extension) for extension in extensions]
+            for quality, extensions in CHORD_DEFINITIONS
+        ]
+        self.borrowed_ids = [self.vocabulary.intern(root + quality) for root, quality in BORROWED_CHORDS]
+
+    def generate_advanced_chord_progression(self, as_ids=False):
+        """Return a progression of chord symbols, or of vocabulary IDs."""
+        try:
+            # Define the chord progression length
+            progression_length = self.progression_length
+
+            # Initialize the chord progression list
+            chord_progression = []
+
+            # Generate the chord progression
+            for _ in range(progression_length):
+                # Choose a random chord definition, then one of its extensions
+                extension_ids = self.rng.choice(self.definition_ids)
+                chord_id = self.rng.choice(extension_ids)
+
+                # Choose whether to introduce a borrowed chord
+                use_borrowed_chord = self.rng.choice([True, False])
+
+                if use_borrowed_chord:
+                    chord_id = self.rng.choice(self.borrowed_ids)
+
+                chord_progression.append(chord_id)
+
+            if as_ids:
+                return chord_progression
+            return [self.vocabulary.symbols[chord_id] for chord_id in chord_progression]
+
+        except Exception as ex:
+            raise Exception("An error occurred during chord progression generation: " + str(ex))
+
+    def iter_chord_progression(self, n_chords=None, as_ids=False):
+        """Lazily yield chords, drawn a progression at a time, forever by default.
+
+        Stops after ``n_chords`` chords when given.
+        """
+        emitted = 0
+        while n_chords is None or emitted < n_chords:
+            progression = self.generate_advanced_chord_progression(as_ids=as_ids)
+            if n_chords is not None:
+                progression = progression[:n_chords - emitted]
+            emitted += len(progression)
+            yield from progression
+
+    def generate_markov_chord_progression(self, progression_length=None, count=None, engine=None, as_ids=False):
+        """Sample progressions of any length from a Markov progression engine.
+
+        ``progression_length`` defaults to this generator's own, and
+        ``engine`` to the shared first-order engine matching this
+        generator's chord distribution.  With ``count`` a list of ``count``
+        progressions is returned.  IDs come back as NumPy arrays.
+        """
+        try:
+            if progression_length is None:
+                progression_length = self.progression_length
+            engine = engine if engine is not None else default_engine()
+            chord_ids = engine.sample(progression_length, count=count, rng=self.np_rng)
+            if as_ids:
+                return chord_ids if count is None else list(chord_ids)
+
+            return np.asarray(self.vocabulary.symbols, dtype=object)[chord_ids].tolist()
+
+        except Exception as ex:
+            raise Exception("An error occurred during chord progression generation: " + str(ex))
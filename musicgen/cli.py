@@ -0,0 +1,24 @@
+"""Command-line entry point."""
+
+import os
+
+from .generator import AdvancedMusicGenerator
+from .midi import MIDIExporter
+
+
+def main(output_directory=None):
+    try:
+        generator = AdvancedMusicGenerator()
+        composition = generator.generate_piano_music()
+        print("Generated Composition:")
+        print(composition)
+
+        exporter = MIDIExporter()
+        if output_directory is None:
+            output_directory = os.getcwd()
+        midi_filename = exporter.export_to_midi(composition, output_directory)
+        print(f"MIDI file '{midi_filename}' saved.")
+
+    except Exception as ex:
+        print("An unexpected error occurred:", ex)
+        print("Please check your code or consult the library documentation.")
@@ -0,0 +1,210 @@
+"""Compact memory-mapped binary corpus of generated pieces.
+
+A corpus file is laid out as::
+
+    header     64 bytes: magic, format version, record size, piece count and
+               the offsets of the regions below (little-endian)
+    notes      NOTE_RECORD rows of every piece, back to back
+    index      INDEX_RECORD rows: each piece's first note, note count, seed
+    metadata   UTF-8 JSON (corpus-wide parameters, package version, ...)
+
+Records are fixed-width and unaligned, so ``Corpus`` exposes both regions as
+NumPy views of one ``numpy.memmap``: opening a file parses nothing but the
+header, any piece is a slice, and scans over ``Corpus.notes`` run at array
+speed straight from the page cache.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import uuid
+
+import numpy as np
+
+from . import __version__
+from .buffer import NoteBuffer
+
+MAGIC = b"MGCORPUS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQQQQQ")
+HEADER_SIZE = 64
+
+# ``start`` and ``duration`` are in beats from the start of the piece
+NOTE_RECORD = np.dtype([
+    ("start", "<f4"),
+    ("duration", "<f4"),
+    ("pitch", "u1"),
+    ("velocity", "u1"),
+    ("dynamic", "u1"),
+    ("articulation", "u1"),
+])
+
+INDEX_RECORD = np.dtype([
+    ("offset", "<u8"),
+    ("count", "<u4"),
+    ("sections", "<u4"),
+    ("seed", "<u8"),
+])
+MAX_SEED = 2 ** 64 - 1
+
+
+def note_records(composition):
+    """Return the ``NOTE_RECORD`` rows of a ``NoteBuffer`` or event sections."""
+    buffer = composition if isinstance(composition, NoteBuffer) else NoteBuffer.from_events(composition)
+    notes = buffer.notes
+    records = np.empty(len(notes), dtype=NOTE_RECORD)
+    durations = notes["duration"].astype(np.float64)
+    records["start"] = np.cumsum(durations) - durations
+    records["duration"] = notes["duration"]
+    records["pitch"] = notes["pitch"]
+    records["velocity"] = buffer.velocities()
+    records["dynamic"] = notes["dynamic"]
+    records["articulation"] = notes["articulation"]
+    return records, len(buffer)
+
+
+class CorpusWriter:
+    """Append pieces to a new corpus file; the index is written by ``close``.
+
+    ``metadata`` is any JSON-serializable dict stored with the corpus.  The
+    corpus is built in a temporary file next to ``path`` and renamed over it
+    only once complete, so ``path`` never holds a partial corpus; a ``with``
+    block that raises discards it.
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.metadata.setdefault("version", __version__)
+        self._temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        self._file = open(self._temp_path, "xb")
+        self._file.write(bytes(HEADER_SIZE))
+        self._index = []
+        self._n_notes = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __len__(self):
+        return len(self._index)
+
+    def add(self, composition, seed=0):
+        """Append one piece and return its index.
+
+        ``seed`` must be an integer in ``[0, MAX_SEED]``.
+        """
+        if isinstance(seed, bool) or not isinstance(seed, (int, np.integer)) or not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"seed must be an integer between 0 and {MAX_SEED}, got {seed!r}")
+        records, sections = note_records(composition)
+        self._file.write(records.tobytes())
+        self._index.append((self._n_notes, len(records), sections, seed))
+        self._n_notes += len(records)
+        return len(self._index) - 1
+
+    def add_batch(self, results):
+        """Append every result of ``AdvancedMusicGenerator.generate_batch``."""
+        for result in results:
+            self.add(result["composition"], result["seed"])
+
+    def close(self):
+        """Finish the corpus and move it into place at ``path``."""
+        if self.closed:
+            return
+        try:
+            notes_offset = HEADER_SIZE
+            index_offset = notes_offset + self._n_notes * NOTE_RECORD.itemsize
+            self._file.write(np.array(self._index, dtype=INDEX_RECORD).tobytes())
+            metadata_offset = index_offset + len(self._index) * INDEX_RECORD.itemsize
+            metadata = json.dumps(self.metadata, sort_keys=True).encode()
+            self._file.write(metadata)
+
+            self._file.seek(0)
+            self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, NOTE_RECORD.itemsize, len(self._index),
+                                         notes_offset, index_offset, metadata_offset, len(metadata)))
+            self._file.close()
+            os.replace(self._temp_path, self.path)
+        except BaseException:
+            self.abort()
+            raise
+        self.closed = True
+
+    def abort(self):
+        """Discard the corpus being written, leaving ``path`` untouched."""
+        if self.closed:
+            return
+        self._file.close()
+        try:
+            os.remove(self._temp_path)
+        except FileNotFoundError:
+            pass
+        self.closed = True
+
+
+class Corpus:
+    """Read-only, memory-mapped view of a corpus file.
+
+    ``notes`` holds every note of every piece and ``index`` one row per
+    piece; ``corpus[i]`` is piece ``i``'s notes.  All of them are views into
+    the mapped file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        (magic, version, record_size, n_pieces, notes_offset, index_offset,
+         metadata_offset, metadata_length) = HEADER.unpack_from(self._map[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a musicgen corpus")
+        if version != FORMAT_VERSION or record_size != NOTE_RECORD.itemsize:
+            raise ValueError(f"Unsupported corpus format {version} (record size {record_size})")
+
+        self.notes = self._map[notes_offset:index_offset].view(NOTE_RECORD)
+        self.index = self._map[index_offset:index_offset + n_pieces * INDEX_RECORD.itemsize].view(INDEX_RECORD)
+        self.metadata = json.loads(self._map[metadata_offset:metadata_offset + metadata_length].tobytes() or b"{}")
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, piece):
+        row = self.index[piece]
+        return self.notes[row["offset"]:row["offset"] + row["count"]]
+
+    def __iter__(self):
+        for piece in range(len(self)):
+            yield self[piece]
+
+    @property
+    def seeds(self):
+        return self.index["seed"]
+
+    def piece_of_notes(self):
+        """The piece number of every row of ``notes``, for grouped scans."""
+        return np.repeat(np.arange(len(self)), self.index["count"])
+
+    def digest(self, piece):
+        """A content hash of piece ``piece``'s notes, for deduplication."""
+        return hashlib.blake2b(self[piece].tobytes(), digest_size=16).hexdigest()
+
+
+def write_corpus(path, n, seed=None, seeds=None, workers=None, parameters=None):
+    """Generate ``n`` pieces with ``AdvancedMusicGenerator.generate_batch`` into a corpus.
+
+    ``parameters`` are pipeline parameters, recorded in the metadata.  Returns the path.  Pieces are written in order as the pool yields them.
+    """
+    # Imported here: the generator pulls in every stage
+    from .generator import AdvancedMusicGenerator
+
+    generator = AdvancedMusicGenerator(seed, parameters=parameters)
+    metadata = {"generator": "AdvancedMusicGenerator.generate_piano_music", "seed": seed, "pieces": n,
+                "parameters": generator.parameters}
+    with CorpusWriter(path, metadata) as writer:
+        writer.add_batch(generator.generate_batch(n, seeds=seeds, workers=workers, as_buffer=True))
+    return os.fspath(path)
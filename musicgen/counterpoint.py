@@ -0,0 +1,145 @@
+"""Counterpoint lines derived from a melody."""
+
+import random
+
+import numpy as np
+
+from .buffer import NoteBuffer
+from .vocabulary import get_vocabulary
+
+# Define possible intervals for counterpoint
+COUNTERPOINT_INTERVALS = [-9, -7, -5, -4, -2, 2, 4, 5, 7, 9]
+
+
+class CounterpointGenerator:
+    def __init__(self, rng=None, np_rng=None, solver=None):
+        self.rng = rng if rng is not None else random
+        # NumPy generator for the vectorized path
+        self.np_rng = np_rng if np_rng is not None else np.random.default_rng()
+        # Voice leading for solve_counterpoint_lines, built on first use
+        self._solver = solver
+
+    @property
+    def solver(self):
+        if self._solver is None:
+            # Deferred: most pipelines never solve, and the solver's tables are not free
+            from .voiceleading import VoiceLeadingSolver
+
+            self._solver = VoiceLeadingSolver()
+        return self._solver
+
+    def generate_counterpoint_lines(self, melody):
+        try:
+            counterpoint_intervals = COUNTERPOINT_INTERVALS
+
+            if isinstance(melody, NoteBuffer):
+                intervals = [self.rng.choice(counterpoint_intervals) for _ in range(melody.n_notes)]
+                counterpoint_melody = melody.copy()
+                counterpoint_notes = melody.notes["pitch"].astype(np.int16) + np.array(intervals, dtype=np.int16)
+                counterpoint_melody.notes["pitch"] = np.clip(counterpoint_notes, 24, 88)  # MIDI note values
+                return counterpoint_melody
+
+            # Initialize the counterpoint melody list
+            counterpoint_melody = []
+
+            for section in melody:
+                counterpoint_melody.append(self._counterpoint_section(section))
+
+            return counterpoint_melody
+
+        except Exception as ex:
+            raise Exception("An error occurred during counterpoint generation: " + str(ex))
+
+    def solve_counterpoint_lines(self, melody, chord_progression, voices=1):
+        """Return ``voices`` lines below ``melody`` chosen by ``self.solver``.
+
+        ``melody`` has one section per chord of ``chord_progression`` (symbols
+        or IDs), as generated by ``MelodyGenerator``.  Each line has the form
+        of ``melody`` (event sections or a ``NoteBuffer``) with its pitches
+        replaced; lines are ordered top to bottom.
+        """
+        try:
+            chord_ids = get_vocabulary().intern_many(chord_progression)
+            buffer = melody if isinstance(melody, NoteBuffer) else NoteBuffer.from_events(melody)
+            if len(buffer) != len(chord_ids):
+                raise ValueError(f"The melody has {len(buffer)} sections for {len(chord_ids)} chords")
+
+            chords = np.repeat(chord_ids, buffer.section_lengths())
+            lines = self.solver.solve(buffer.notes["pitch"], chords.tolist(), voices)
+
+            counterpoint_lines = []
+            for line in lines:
+                if isinstance(melody, NoteBuffer):
+                    counterpoint_melody = melody.copy()
+                    counterpoint_melody.notes["pitch"] = line
+                else:
+                    pitches = iter(line.tolist())
+                    counterpoint_melody = [self._counterpoint_section(section, pitches) for section in melody]
+                counterpoint_lines.append(counterpoint_melody)
+            return counterpoint_lines
+
+        except Exception as ex:
+            raise Exception("An error occurred during counterpoint generation: " + str(ex))
+
+    def iter_counterpoint_lines(self, melody):
+        """Lazily yield the counterpoint of each section of ``melody``."""
+        for section in melody:
+            try:
+                counterpoint_section = self._counterpoint_section(section)
+            except Exception as ex:
+                raise Exception("An error occurred during counterpoint generation: " + str(ex))
+            yield counterpoint_section
+
+    def _counterpoint_section(self, section, pitches=None):
+        # ``pitches`` supplies solved notes; otherwise they are drawn at random
+        counterpoint_section = []
+
+        for event in section:
+            if pitches is not None:
+                counterpoint_note = next(pitches)
+            else:
+                original_note = event["note"]
+                interval = self.rng.choice(COUNTERPOINT_INTERVALS)
+                counterpoint_note = original_note + interval
+
+                # Ensure the counterpoint note is within a reasonable pitch range
+                counterpoint_note = max(min(counterpoint_note, 88), 24)  # MIDI note values
+
+            counterpoint_event = {
+                "type": "note",
+                "note": counterpoint_note,
+                "duration": event["duration"],
+                "dynamic": event.get("dynamic"),
+                "articulation": event.get("articulation"),
+                "velocity": event.get("velocity")
+            }
+            counterpoint_section.append(counterpoint_event)
+
+        return counterpoint_section
+
+    def generate_counterpoint_vectorized(self, melody):
+        """Vectorized ``generate_counterpoint_lines`` for ``NoteBuffer`` input.
+
+        All intervals are drawn in one ``self.np_rng`` call.  A list of
+        buffers is handled as one batch and returns a list.
+        """
+        try:
+            batched = isinstance(melody, list)
+            melodies = melody if batched else [melody]
+
+            pitches = np.concatenate([m.notes["pitch"] for m in melodies]).astype(np.int16)
+            intervals = np.asarray(COUNTERPOINT_INTERVALS, dtype=np.int16)[
+                self.np_rng.integers(0, len(COUNTERPOINT_INTERVALS), len(pitches))]
+            counterpoint_notes = np.clip(pitches + intervals, 24, 88)  # MIDI note values
+
+            counterpoint_melodies = []
+            start = 0
+            for m in melodies:
+                counterpoint_melody = m.copy()
+                counterpoint_melody.notes["pitch"] = counterpoint_notes[start:start + m.n_notes]
+                counterpoint_melodies.append(counterpoint_melody)
+                start += m.n_notes
+            return counterpoint_melodies if batched else counterpoint_melodies[0]
+
+        except Exception as ex:
+            raise Exception("An error occurred during counterpoint generation: " + str(ex))
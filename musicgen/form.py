@@ -0,0 +1,73 @@
+"""Large-scale form applied to a composition."""
+
+import random
+
+from .buffer import NoteBuffer
+
+# Define form structure possibilities
+FORM_STRUCTURES = ["AABA", "rondo", "theme_variations"]
+
+
+class FormStructureGenerator:
+    def __init__(self, rng=None, structures=None):
+        self.rng = rng if rng is not None else random
+        if structures is not None and not isinstance(structures, (list, tuple)):
+            raise ValueError(f"Form structures must be a list, got {structures!r}")
+        # The forms chosen among, each any number of times to weight it
+        self.structures = list(FORM_STRUCTURES if structures is None else structures)
+        if not self.structures:
+            raise ValueError("Form needs at least one structure")
+        if not all(isinstance(structure, str) for structure in self.structures):
+            raise ValueError(f"Form structures must be names, got {self.structures!r}")
+        unknown = sorted(set(self.structures) - set(FORM_STRUCTURES))
+        if unknown:
+            raise ValueError(f"Unknown form structures {unknown}; expected some of {FORM_STRUCTURES}")
+
+    def generate_form_and_structure(self, composition):
+        try:
+            # A buffer is restructured by section index instead of by list
+            sections = list(range(len(composition))) if isinstance(composition, NoteBuffer) else composition
+            structured = sections + self._repeats(sections)
+
+            if isinstance(composition, NoteBuffer):
+                return composition.take_sections(structured)
+            return structured
+
+        except Exception as ex:
+            raise Exception("An error occurred during form and structure generation: " + str(ex))
+
+    def iter_form_and_structure(self, composition, block_size=8):
+        """Lazily apply a form to each block of ``block_size`` sections.
+
+        Only the current block is held; repeats yield the block's own
+        section objects again rather than copies, so later stages must not
+        modify sections in place.
+        """
+        block = []
+        for section in composition:
+            block.append(section)
+            if len(block) == block_size:
+                yield from self._structure_block(block)
+                block = []
+        if block:
+            yield from self._structure_block(block)
+
+    def _structure_block(self, block):
+        try:
+            repeats = self._repeats(block)
+        except Exception as ex:
+            raise Exception("An error occurred during form and structure generation: " + str(ex))
+        yield from block
+        yield from repeats
+
+    def _repeats(self, sections):
+        # Choose a random form structure
+        form_structure = self.rng.choice(self.structures)
+
+        # Apply the selected form structure to the composition
+        if form_structure == "AABA":
+            return sections[:2]  # AABA structure
+        elif form_structure == "rondo":
+            return sections[:1]  # Rondo structure
+        elif form_structure == "theme_variations":
+            return sections[1:]  # Theme and variations structure
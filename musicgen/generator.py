@@ -0,0 +1,251 @@
+"""The full composition pipeline and its batch front-end."""
+
+import os
+import random
+
+import numpy as np
+
+from .arrangement import build_arrangement, generate_part, melody_part, section_beats
+from .cadence import CadenceGenerator
+from .chords import ChordGenerator
+from .counterpoint import CounterpointGenerator
+from .dynamics import DynamicsGenerator
+from .form import FormStructureGenerator
+from .melody import MelodyGenerator
+from .midi import MIDIExporter
+from .phrasing import PhrasingGenerator
+from .profiling import stage_runner
+from .tempo import TempoChangeGenerator
+from .voiceleading import DEFAULT_BEAM_WIDTH
+
+# Parts generated from the shared progression and melody, in track order
+ARRANGEMENT_PARTS = ("counterpoint", "comping", "bass")
+
+# Pipeline parameter -> (stage, keyword argument of that stage's constructor)
+PIPELINE_PARAMETERS = {
+    "progression_length": ("chords", "progression_length"),
+    "key_change_probability": ("cadence", "key_change_probability"),
+    "phrasing_patterns": ("phrasing", "patterns"),
+    "form_structures": ("form", "structures"),
+    "tempos": ("tempo", "tempos"),
+    "time_signatures": ("tempo", "time_signatures"),
+    "tempo_change_probability": ("tempo", "tempo_probability"),
+    "time_signature_change_probability": ("tempo", "time_signature_probability"),
+}
+
+
+def stage_options(parameters):
+    """Split pipeline ``parameters`` into constructor keywords per stage."""
+    if parameters is not None and not isinstance(parameters, dict):
+        raise ValueError(f"Pipeline parameters must be a dict, got {parameters!r}")
+    options = {}
+    for name, value in (parameters or {}).items():
+        if name not in PIPELINE_PARAMETERS:
+            raise ValueError(f"Unknown pipeline parameter {name!r}; expected one of {sorted(PIPELINE_PARAMETERS)}")
+        stage, keyword = PIPELINE_PARAMETERS[name]
+        options.setdefault(stage, {})[keyword] = value
+    return options
+
+
+class AdvancedMusicGenerator:
+    def __init__(self, seed=None, hooks=None, parameters=None):
+        # Every stage shares one private RNG so a seed reproduces the whole piece
+        self.seed = seed
+        # ``StageHook`` objects told about every stage (see ``musicgen.profiling``)
+        self.hooks = list(hooks or ())
+        # Overrides of the stages' defaults, named as in ``PIPELINE_PARAMETERS``
+        self.parameters = dict(parameters or {})
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        options = stage_options(self.parameters)
+
+        # Initialize generator with advanced parameters and settings
+        self.chord_generator = ChordGenerator(self.rng, self.np_rng, **options.get("chords", {}))
+        self.melody_generator = MelodyGenerator(self.rng, self.np_rng)
+        self.dynamics_generator = DynamicsGenerator(self.rng, self.np_rng)
+        self.phrasing_generator = PhrasingGenerator(self.rng, **options.get("phrasing", {}))
+        self.cadence_generator = CadenceGenerator(self.rng, **options.get("cadence", {}))
+        self.counterpoint_generator = CounterpointGenerator(self.rng, self.np_rng)
+        self.form_generator = FormStructureGenerator(self.rng, **options.get("form", {}))
+        self.tempo_change_generator = TempoChangeGenerator(self.rng, **options.get("tempo", {}))
+
+    def generate_piano_music(self, as_buffer=False, vectorized=False, voice_leading=False):
+        # Generate advanced composition logic using all components; with
+        # ``as_buffer`` every stage works on a columnar NoteBuffer instead,
+        # ``vectorized`` also draws melody and counterpoint with NumPy, and
+        # ``voice_leading`` solves the counterpoint against the chords
+        run = stage_runner(self.hooks)
+        chord_progression = run("chords", None, self.chord_generator.generate_advanced_chord_progression,
+                                as_ids=True)
+        if vectorized:
+            melody = run("melody", chord_progression, self.melody_generator.generate_melody_vectorized,
+                         chord_progression)
+        else:
+            melody = run("melody", chord_progression, self.melody_generator.generate_melody_with_variations,
+                         chord_progression, as_buffer=as_buffer)
+        melody_with_dynamics = run("dynamics", melody, self.dynamics_generator.apply_dynamics_and_articulation,
+                                   melody)
+        melody_with_phrasing = run("phrasing", melody_with_dynamics,
+                                   self.phrasing_generator.introduce_rhythmic_variation, melody_with_dynamics)
+        chord_progression_with_cadences = run("cadence", chord_progression,
+                                              self.cadence_generator.generate_cadences_and_key_changes,
+                                              chord_progression, as_ids=True)
+        if voice_leading:
+            counterpoint_melody = run("counterpoint", melody_with_phrasing,
+                                      self.counterpoint_generator.solve_counterpoint_lines, melody_with_phrasing,
+                                      chord_progression)[0]
+        elif vectorized:
+            counterpoint_melody = run("counterpoint", melody_with_phrasing,
+                                      self.counterpoint_generator.generate_counterpoint_vectorized,
+                                      melody_with_phrasing)
+        else:
+            counterpoint_melody = run("counterpoint", melody_with_phrasing,
+                                      self.counterpoint_generator.generate_counterpoint_lines, melody_with_phrasing)
+        structured_composition = run("form", counterpoint_melody, self.form_generator.generate_form_and_structure,
+                                     counterpoint_melody)
+        final_composition = run("tempo", structured_composition,
+                                self.tempo_change_generator.introduce_tempo_and_time_signature_changes,
+                                structured_composition)
+        return final_composition
+
+    def generate_arrangement(self, voices=1, workers=None, processes=False, beam_width=DEFAULT_BEAM_WIDTH,
+                             n_chords=None):
+        """Generate a multi-track ``Arrangement``: melody, counterpoint, comping and bass.
+
+        The piece is one advanced chord progression long, or ``n_chords``
+        chords drawn the same way.
+
+        The progression, melody, form and tempo map are drawn here in turn;
+        the ``voices`` counterpoint lines, the comping and the bass depend
+        only on the progression and melody and are generated concurrently,
+        each from its own seed.  They run on a thread pool of ``workers``
+        threads (one per part by default, ``1`` runs in-process), or on a
+        process pool with ``processes``, which also parallelizes the pure
+        Python parts of the solver.
+        """
+        run = stage_runner(self.hooks)
+        if n_chords is None:
+            chord_progression = run("chords", None, self.chord_generator.generate_advanced_chord_progression,
+                                    as_ids=True)
+        else:
+            chord_progression = run("chords", None, lambda: list(
+                self.chord_generator.iter_chord_progression(n_chords, as_ids=True)))
+        melody = run("melody", chord_progression, self.melody_generator.generate_melody_with_variations,
+                     chord_progression, as_buffer=True)
+        melody = run("dynamics", melody, self.dynamics_generator.apply_dynamics_and_articulation, melody)
+        melody = run("phrasing", melody, self.phrasing_generator.introduce_rhythmic_variation, melody)
+
+        # Seeds are drawn before dispatch so the result does not depend on scheduling
+        jobs = [(name, self.rng.randrange(2 ** 32), chord_progression, melody, voices, beam_width)
+                for name in ARRANGEMENT_PARTS]
+        parts = run("parts", melody, self._generate_parts, jobs, workers, processes)
+
+        order = run("form", None, self.form_generator.generate_form_and_structure, list(range(len(melody))))
+        changes = run("tempo", None, self.tempo_change_generator.introduce_tempo_and_time_signature_changes,
+                      [[] for _ in order])
+        parts = [("melody", melody_part(melody))] + parts
+        return build_arrangement(parts, order, section_beats(melody), changes)
+
+    def _generate_parts(self, jobs, workers, processes):
+        if workers is None:
+            workers = len(jobs)
+        if workers <= 1:
+            results = [generate_part(job) for job in jobs]
+        else:
+            # Deferred, here and in generate_batch: concurrent.futures is a
+            # noticeable share of the import time of the pipeline itself
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+            executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+            with executor_class(max_workers=workers) as executor:
+                results = list(executor.map(generate_part, jobs))
+        return [part for result in results for part in result]
+
+    def iter_piano_music(self, n_chords=None, form_block=8):
+        """Lazily yield the composition section by section.
+
+        Chords are drawn as needed, forever unless ``n_chords`` is given, and
+        every stage handles one section at a time, so memory stays flat
+        however long the piece runs.  Form is applied per block of
+        ``form_block`` sections.  The output is reproducible for a seed but
+        differs from ``generate_piano_music``, whose stages draw from the
+        shared RNG in a different order.
+        """
+        # Key changes never feed back into the melody (see generate_piano_music),
+        # so the cadence stage has nothing to contribute here
+        chords = self.chord_generator.iter_chord_progression(n_chords, as_ids=True)
+        melody = self.melody_generator.iter_melody_with_variations(chords)
+        melody_with_dynamics = self.dynamics_generator.iter_dynamics_and_articulation(melody)
+        melody_with_phrasing = self.phrasing_generator.iter_rhythmic_variation(melody_with_dynamics)
+        counterpoint_melody = self.counterpoint_generator.iter_counterpoint_lines(melody_with_phrasing)
+        structured_composition = self.form_generator.iter_form_and_structure(
+            counterpoint_melody, block_size=form_block)
+        return self.tempo_change_generator.iter_tempo_and_time_signature_changes(structured_composition)
+
+    def stream_piano_music(self, n_chords, output=None, output_directory=".", filename=None, form_block=8):
+        """Generate ``n_chords`` chords' worth of music straight into a MIDI file.
+
+        Arguments after ``n_chords`` are as for ``MIDIExporter.stream_to_midi``,
+        whose return value is passed through.
+        """
+        return MIDIExporter().stream_to_midi(self.iter_piano_music(n_chords, form_block), output=output,
+                                             output_directory=output_directory, filename=filename)
+
+    def generate_batch(self, n, seeds=None, workers=None, output_directory=None, chunksize=None,
+                       as_buffer=False):
+        """Generate ``n`` compositions, optionally exporting each one to MIDI.
+
+        Every job builds its own ``AdvancedMusicGenerator`` seeded from
+        ``seeds[i]`` with this generator's ``parameters``, so results are
+        reproducible and independent of how jobs are scheduled.  When ``seeds`` is omitted they are drawn from this
+        generator's RNG.  Jobs run on a process pool of ``workers`` processes
+        (``os.cpu_count()`` by default, ``1`` runs in-process) and results are
+        yielded in submission order as soon as each one is ready.
+
+        Each result is a dict with ``index``, ``seed``, ``composition`` and
+        ``midi_filename`` (``None`` unless ``output_directory`` is given).
+        With ``as_buffer`` compositions are ``NoteBuffer`` objects, which are
+        also much cheaper to send back from the workers.
+
+        This generator's hooks see the stages of in-process jobs; pool
+        workers are other processes, which hooks don't reach (see
+        ``musicgen.profiling``).
+        """
+        if seeds is None:
+            seeds = [self.rng.randrange(2 ** 32) for _ in range(n)]
+        elif len(seeds) != n:
+            raise ValueError(f"Expected {n} seeds, got {len(seeds)}")
+
+        if output_directory is not None:
+            os.makedirs(output_directory, exist_ok=True)
+
+        jobs = [(index, seed, output_directory, as_buffer, self.parameters) for index, seed in enumerate(seeds)]
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers <= 1:
+            for job in jobs:
+                yield _generate_batch_job(job, self.hooks)
+            return
+
+        if chunksize is None:
+            # A few chunks per worker keeps IPC overhead low without starving the pool
+            chunksize = max(1, n // (workers * 4))
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_generate_batch_job, jobs, chunksize=chunksize)
+
+
+def _generate_batch_job(job, hooks=None):
+    # Runs inside a pool worker, so it must stay a picklable module-level function
+    index, seed, output_directory, as_buffer, parameters = job
+    composition = AdvancedMusicGenerator(seed, hooks, parameters).generate_piano_music(as_buffer=as_buffer)
+
+    midi_filename = None
+    if output_directory is not None:
+        midi_filename = MIDIExporter().export_to_midi(
+            composition, output_directory, filename=f"generated_music_{index:06d}_{seed}.mid")
+
+    return {"index": index, "seed": seed, "composition": composition, "midi_filename": midi_filename}
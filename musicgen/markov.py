@@ -0,0 +1,233 @@
+"""Markov-chain chord progressions over vocabulary IDs.
+
+A ``MarkovProgressionEngine`` holds n-gram transition counts over a fixed
+alphabet of chord IDs.  The counts are compiled once into cumulative
+probability rows (cached across engines with identical counts), and
+progressions are drawn with vectorized inverse-CDF lookups: one
+``searchsorted`` per step for a batch of progressions, or a work-efficient
+parallel prefix over per-step transition maps for a single long one.
+"""
+
+import functools
+import hashlib
+import threading
+
+import numpy as np
+
+from .vocabulary import BORROWED_CHORDS, CHORD_DEFINITIONS, get_vocabulary
+
+# Compiled tables keyed by a digest of (order, smoothing, counts)
+_compiled_cache = {}
+_compiled_cache_lock = threading.Lock()
+
+# Above this many contexts the per-step transition maps of the prefix scan
+# get too large, and a single long progression is sampled step by step
+SCAN_MAX_CONTEXTS = 256
+# Steps composed per block of the scan, bounding its memory use
+SCAN_BLOCK = 1 << 14
+
+
+def generator_distribution():
+    """Return ``(chord_ids, probabilities)`` of one ``ChordGenerator`` draw."""
+    vocabulary = get_vocabulary()
+    probabilities = {}
+    for quality, extensions in CHORD_DEFINITIONS:
+        for extension in extensions:
+            chord_id = vocabulary.intern(quality + extension)
+            # Half of the draws keep the chosen definition and extension
+            probabilities[chord_id] = probabilities.get(chord_id, 0.0) + 0.5 / len(CHORD_DEFINITIONS) / len(extensions)
+    for root, quality in BORROWED_CHORDS:
+        chord_id = vocabulary.intern(root + quality)
+        probabilities[chord_id] = probabilities.get(chord_id, 0.0) + 0.5 / len(BORROWED_CHORDS)
+    chord_ids = sorted(probabilities)
+    return chord_ids, np.array([probabilities[chord_id] for chord_id in chord_ids])
+
+
+def _compile(counts, start_counts, order, smoothing):
+    key = hashlib.blake2b(
+        counts.tobytes() + start_counts.tobytes() + repr((counts.shape, order, smoothing)).encode(),
+        digest_size=16).digest()
+    compiled = _compiled_cache.get(key)
+    if compiled is not None:
+        return compiled
+
+    n_contexts, alphabet = counts.shape
+    weights = counts + smoothing
+    totals = weights.sum(axis=1, keepdims=True)
+    # Contexts never observed fall back to the overall chord frequencies
+    fallback = counts.sum(axis=0) + smoothing
+    fallback = fallback / fallback.sum() if fallback.sum() else np.full(alphabet, 1.0 / alphabet)
+    probabilities = np.where(totals > 0, weights / np.where(totals > 0, totals, 1), fallback)
+
+    cdf = np.cumsum(probabilities, axis=1)
+    cdf[:, -1] = 1.0
+    # Row r's CDF shifted into [r, r + 1] makes one sorted array, so a single
+    # searchsorted of ``r + u`` samples from any row
+    flat_cdf = (cdf + np.arange(n_contexts)[:, None]).ravel()
+
+    start = start_counts + smoothing
+    start_cdf = np.cumsum(start / start.sum())
+    start_cdf[-1] = 1.0
+
+    # Many contexts share a distribution (all of them for the default engine),
+    # so the scan evaluates each distinct row only once
+    unique_cdf, row_of_context = np.unique(cdf, axis=0, return_inverse=True)
+
+    compiled = (flat_cdf, (unique_cdf, row_of_context.ravel()), start_cdf)
+    with _compiled_cache_lock:
+        _compiled_cache[key] = compiled
+    return compiled
+
+
+class MarkovProgressionEngine:
+    """An ``order``-th order Markov chain over a fixed set of chord IDs.
+
+    ``counts[c, j]`` counts chord ``chord_ids[j]`` following context ``c``,
+    where a context encodes the previous ``order`` chords as base-``V``
+    digits with the most recent chord least significant.  ``start_counts``
+    weights the opening context.
+    """
+
+    def __init__(self, chord_ids, counts, start_counts=None, order=1, smoothing=0.0):
+        self.chord_ids = np.asarray(chord_ids, dtype=np.int32)
+        self.order = order
+        self.smoothing = smoothing
+        self.counts = np.asarray(counts, dtype=np.float64)
+        alphabet = len(self.chord_ids)
+        if self.counts.shape != (alphabet ** order, alphabet):
+            raise ValueError(f"Expected counts of shape {(alphabet ** order, alphabet)}, got {self.counts.shape}")
+        self.start_counts = (np.ones(alphabet ** order) if start_counts is None
+                             else np.asarray(start_counts, dtype=np.float64))
+        self._compiled = None
+
+    @classmethod
+    def default(cls, order=1):
+        """An engine whose every row matches ``ChordGenerator``'s chord distribution."""
+        chord_ids, probabilities = generator_distribution()
+        n_contexts = len(chord_ids) ** order
+        counts = np.tile(probabilities, (n_contexts, 1))
+        start_counts = probabilities
+        for _ in range(order - 1):
+            start_counts = np.outer(start_counts, probabilities).ravel()
+        return cls(chord_ids, counts, start_counts, order=order)
+
+    @classmethod
+    def from_progressions(cls, progressions, order=1, smoothing=0.0):
+        """Fit n-gram counts from example progressions (symbols or IDs)."""
+        vocabulary = get_vocabulary()
+        encoded = [vocabulary.intern_many(progression) for progression in progressions]
+        chord_ids = np.unique(np.concatenate(encoded)) if encoded else np.zeros(0, dtype=np.int32)
+        alphabet = len(chord_ids)
+        counts = np.zeros((alphabet ** order, alphabet))
+        start_counts = np.zeros(alphabet ** order)
+        weights = alphabet ** np.arange(order - 1, -1, -1)
+        for progression in encoded:
+            local = np.searchsorted(chord_ids, progression)
+            if len(local) <= order:
+                continue
+            # Context index of every window of ``order`` chords
+            windows = np.lib.stride_tricks.sliding_window_view(local, order)
+            contexts = windows @ weights
+            start_counts[contexts[0]] += 1
+            np.add.at(counts, (contexts[:-1], local[order:]), 1)
+        return cls(chord_ids, counts, start_counts, order=order, smoothing=smoothing)
+
+    def compiled(self):
+        """Return the cached ``(flat_cdf, (unique_cdf, row_of_context), start_cdf)`` tables."""
+        if self._compiled is None:
+            self._compiled = _compile(self.counts, self.start_counts, self.order, self.smoothing)
+        return self._compiled
+
+    def sample(self, length, count=None, rng=None):
+        """Draw progressions of ``length`` chord IDs.
+
+        Returns one ``int32`` array, or a ``(count, length)`` array when
+        ``count`` is given.  ``rng`` is a ``numpy.random.Generator``.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        flat_cdf, unique_rows, start_cdf = self.compiled()
+        alphabet = len(self.chord_ids)
+        n_contexts = alphabet ** self.order
+        batch = 1 if count is None else count
+
+        uniforms = rng.random((batch, max(length - self.order, 0) + 1))
+        contexts = np.searchsorted(start_cdf, uniforms[:, 0], side="right")
+        local = np.empty((batch, length), dtype=np.int64)
+
+        # Unpack the opening context into its first ``order`` chords
+        opening = np.empty((batch, self.order), dtype=np.int64)
+        remaining = contexts.copy()
+        for position in range(self.order - 1, -1, -1):
+            opening[:, position] = remaining % alphabet
+            remaining //= alphabet
+        local[:, :min(self.order, length)] = opening[:, :length]
+
+        steps = uniforms[:, 1:]
+        if steps.shape[1]:
+            if batch == 1 and n_contexts <= SCAN_MAX_CONTEXTS and steps.shape[1] > n_contexts:
+                context = int(contexts[0])
+                for block in range(0, steps.shape[1], SCAN_BLOCK):
+                    chords, context = self._scan(
+                        unique_rows, alphabet, context, steps[0, block:block + SCAN_BLOCK])
+                    local[0, self.order + block:self.order + block + len(chords)] = chords
+            else:
+                for step in range(steps.shape[1]):
+                    chords = np.searchsorted(flat_cdf, contexts + steps[:, step], side="right") - contexts * alphabet
+                    local[:, self.order + step] = chords
+                    contexts = (contexts * alphabet + chords) % n_contexts
+
+        progressions = self.chord_ids[local]
+        return progressions[0] if count is None else progressions
+
+    def _scan(self, unique_rows, alphabet, context, uniforms):
+        # Step t maps every context to the chord drawn from it under uniforms[t]
+        # and to the context that follows.  An up-sweep composes those maps
+        # pairwise into a tree; a down-sweep then pushes the one real starting
+        # context back through the tree, yielding the context before every step
+        # with O(T * contexts) vectorized work instead of T Python iterations.
+        unique_cdf, row_of_context = unique_rows
+        n_contexts = len(row_of_context)
+        if len(unique_cdf) == 1:
+            # Every context draws from the same row: the chain is memoryless
+            chords = np.searchsorted(unique_cdf[0], uniforms, side="right")
+            return chords, int((context * alphabet + chords[-1]) % n_contexts)
+
+        # Sorted queries make each searchsorted pass cache-friendly
+        order = np.argsort(uniforms)
+        sorted_uniforms = uniforms[order]
+        row_chords = np.empty((len(uniforms), len(unique_cdf)), dtype=np.int32)
+        for row, row_cdf in enumerate(unique_cdf):
+            row_chords[order, row] = np.searchsorted(row_cdf, sorted_uniforms, side="right")
+        chords = row_chords[:, row_of_context]
+        every_context = np.arange(n_contexts, dtype=np.int32)
+
+        # Pad to a power of two with identity maps
+        size = 1 << max(len(uniforms) - 1, 0).bit_length()
+        maps = np.tile(every_context, (size, 1))
+        maps[:len(uniforms)] = (every_context * alphabet + chords) % n_contexts
+
+        levels = [maps]
+        while len(levels[-1]) > 1:
+            level = levels[-1]
+            first, second = level[0::2], np.ascontiguousarray(level[1::2])
+            rows = np.arange(len(second), dtype=np.int64)[:, None] * n_contexts
+            levels.append(second.ravel()[first + rows])
+
+        starts = np.array([context], dtype=np.int64)
+        for level in reversed(levels[:-1]):
+            # Left child starts where its parent does; right child after the left
+            left = level[0::2]
+            children = np.empty(2 * len(starts), dtype=np.int64)
+            children[0::2] = starts
+            children[1::2] = left[np.arange(len(starts)), starts]
+            starts = children
+
+        before = starts[:len(uniforms)]
+        after = maps[len(uniforms) - 1, before[-1]]
+        return chords[np.arange(len(uniforms)), before], int(after)
+
+
+@functools.lru_cache(maxsize=None)
+def default_engine(order=1):
+    """Return the shared ``MarkovProgressionEngine.default(order)`` instance."""
+    return MarkovProgressionEngine.default(order)
@@ -0,0 +1,127 @@
+"""Melody generation over a chord progression."""
+
+import random
+
+import numpy as np
+
+from .buffer import NOTE_DTYPE, NoteBuffer, NoteBufferBuilder
+from .vocabulary import get_vocabulary
+
+# Indices into VARIATION_TYPES, as drawn by the vectorized path
+VARIATION_TYPES = ["passing", "neighbor", "suspension"]
+SUSPENSION = VARIATION_TYPES.index("suspension")
+
+
+class MelodyGenerator:
+    def __init__(self, rng=None, np_rng=None):
+        self.rng = rng if rng is not None else random
+        # NumPy generator for the vectorized path
+        self.np_rng = np_rng if np_rng is not None else np.random.default_rng()
+        self.vocabulary = get_vocabulary()
+
+    def generate_melody_with_variations(self, chord_progression, as_buffer=False):
+        """Return one section per chord, as event dicts or as a ``NoteBuffer``.
+
+        Chords may be given as symbols or as vocabulary IDs.
+        """
+        try:
+            chord_ids = self.vocabulary.intern_many(chord_progression).tolist()
+            pitch_ranges = self.vocabulary.pitch_ranges
+
+            # Initialize the melody list, or a columnar builder
+            melody = NoteBufferBuilder() if as_buffer else []
+
+            for chord_id in chord_ids:
+                notes = self._chord_notes(pitch_ranges[chord_id])
+
+                # Each chord becomes one section of note events
+                if as_buffer:
+                    melody.add_notes(notes, 0.5)
+                    melody.end_section()
+                else:
+                    melody.append([{"type": "note", "note": note, "duration": 0.5} for note in notes])
+
+            return melody.build() if as_buffer else melody
+
+        except ValueError as ve:
+            raise ValueError(f"Error during melody generation: {ve}")
+        except Exception as ex:
+            raise Exception(f"An unexpected error occurred during melody generation: {ex}")
+
+    def iter_melody_with_variations(self, chords):
+        """Lazily yield one section of note events per chord of ``chords``.
+
+        ``chords`` is any iterable of symbols or IDs and is consumed one
+        chord at a time.
+        """
+        pitch_ranges = self.vocabulary.pitch_ranges
+        for chord in chords:
+            try:
+                chord_id = chord if isinstance(chord, (int, np.integer)) else self.vocabulary.intern(chord)
+                notes = self._chord_notes(pitch_ranges[chord_id])
+            except Exception as ex:
+                raise Exception(f"An unexpected error occurred during melody generation: {ex}")
+            yield [{"type": "note", "note": note, "duration": 0.5} for note in notes]
+
+    def _chord_notes(self, chord_notes):
+        # Choose a random note from the chord notes
+        melody_note = self.rng.choice(chord_notes)
+
+        # Handle cases where melody_note is out of range
+        if melody_note < chord_notes.start:
+            melody_note = chord_notes.start
+        elif melody_note > chord_notes.stop - 1:
+            melody_note = chord_notes.stop - 1
+
+        # Introduce passing tone, neighbor tone, or suspension with probability
+        variation_type = self.rng.choice(VARIATION_TYPES)
+        if variation_type == "passing":
+            passing_note = self.rng.choice(chord_notes)
+            return [melody_note, passing_note, melody_note]
+        elif variation_type == "neighbor":
+            neighbor_note = self.rng.choice(chord_notes)
+            return [melody_note, neighbor_note, melody_note]
+        elif variation_type == "suspension":
+            suspension_note = melody_note - 1
+            return [melody_note, suspension_note, melody_note]
+
+    def generate_melody_vectorized(self, chord_progression):
+        """Vectorized ``generate_melody_with_variations`` returning ``NoteBuffer``.
+
+        Every pitch and variation type for the whole progression is drawn in
+        a handful of ``self.np_rng`` calls, with the same distribution as the
+        scalar path.  Passing a list of progressions generates them all in
+        one go and returns a list of buffers.
+        """
+        try:
+            batched = len(chord_progression) > 0 and not np.isscalar(chord_progression[0])
+            progressions = chord_progression if batched else [chord_progression]
+            chord_ids = np.concatenate(
+                [np.zeros(0, dtype=np.int32)] + [self.vocabulary.intern_many(p) for p in progressions])
+
+            # Broadcast each chord's precompiled pitch range
+            pitch_low, pitch_high, _, _ = self.vocabulary.arrays()
+            low = pitch_low[chord_ids]
+            high = pitch_high[chord_ids]
+
+            melody_notes = np.clip(self.np_rng.integers(low, high), low, high - 1)
+            variation_types = self.np_rng.integers(0, len(VARIATION_TYPES), len(chord_ids))
+            other_notes = self.np_rng.integers(low, high)
+            middle_notes = np.where(variation_types == SUSPENSION, melody_notes - 1, other_notes)
+
+            notes = np.zeros(3 * len(chord_ids), dtype=NOTE_DTYPE)
+            notes["pitch"] = np.stack([melody_notes, middle_notes, melody_notes], axis=1).ravel()
+            notes["duration"] = 0.5
+
+            melodies = []
+            start = 0
+            for progression in progressions:
+                end = start + 3 * len(progression)
+                melodies.append(NoteBuffer(notes[start:end], np.arange(0, end - start + 1, 3)))
+                start = end
+            return melodies if batched else melodies[0]
+
+        except ValueError as ve:
+            raise ValueError(f"Error during melody generation: {ve}")
+        except Exception as ex:
+            raise Exception(f"An unexpected error occurred during melody generation: {ex}")
@@ -0,0 +1,116 @@
+"""MIDI export."""
+
+import os
+import uuid
+
+from .buffer import NoteBuffer, event_gate, event_velocity
+from .smf import StreamingMIDIWriter
+
+
+def unique_midi_filename(prefix="generated_music"):
+    """Return a file name that concurrent exports will not collide on."""
+    return f"{prefix}_{uuid.uuid4().hex}.mid"
+
+
+class MIDIExporter:
+    def export_to_midi(self, composition, output_directory, filename="generated_music.mid"):
+        # Pass filename=None for a unique name
+        try:
+            # Imported on first use so callers that never write MIDI skip the cost
+            import pretty_midi
+
+            # Create a PrettyMIDI object
+            midi = pretty_midi.PrettyMIDI()
+
+            # Create an instrument for the piano
+            instrument = pretty_midi.Instrument(program=pretty_midi.instrument_name_to_program('Acoustic Grand Piano'))
+
+            if isinstance(composition, NoteBuffer):
+                composition = composition.iter_sections()
+
+            # Convert the composition to MIDI events; durations are in beats
+            time = 0
+            seconds_per_beat = 60.0 / 120
+            for section in composition:
+                for event in section:
+                    event_type = event.get("type", "note")
+                    if event_type == "note":
+                        end = time + event["duration"] * seconds_per_beat
+                        # Articulation shortens the sounding part, not the step
+                        note = pretty_midi.Note(
+                            velocity=event_velocity(event),
+                            pitch=event["note"],
+                            start=time,
+                            end=time + event["duration"] * event_gate(event) * seconds_per_beat
+                        )
+                        instrument.notes.append(note)
+                        time = end
+                    elif event_type == "tempo":
+                        # pretty_midi keeps note times in seconds, so a tempo
+                        # change only affects how later beats are converted
+                        seconds_per_beat = 60.0 / event["value"]
+                    elif event_type == "time_signature":
+                        numerator, denominator = (int(part) for part in event["value"].split("/"))
+                        midi.time_signature_changes.append(
+                            pretty_midi.TimeSignature(numerator, denominator, time))
+
+            # Add the instrument to the MIDI file
+            midi.instruments.append(instrument)
+
+            # Save the MIDI file
+            if filename is None:
+                filename = unique_midi_filename()
+            midi_filename = os.path.join(output_directory, filename)
+            midi.write(midi_filename)
+            return midi_filename
+
+        except Exception as ex:
+            raise Exception("An error occurred during MIDI export: " + str(ex))
+
+    def stream_to_midi(self, sections, output=None, output_directory=".", filename=None):
+        """Write sections to a MIDI file as they are produced.
+
+        ``sections`` is any iterable of sections (lists of event dicts) or
+        ``NoteBuffer`` chunks, typically a generator; it is consumed once and
+        never held in memory.  ``output`` may be a binary file-like object
+        such as ``io.BytesIO``, in which case it is written to and returned.
+        Otherwise the file is created in ``output_directory`` as ``filename``,
+        or under a unique name when ``filename`` is None, and its path is
+        returned.
+        """
+        try:
+            if isinstance(sections, NoteBuffer):
+                sections = [sections]
+            return self._write(lambda writer: writer.write_sections(sections), {}, output, output_directory,
+                               filename)
+
+        except Exception as ex:
+            raise Exception("An error occurred during MIDI export: " + str(ex))
+
+    def export_arrangement(self, arrangement, output=None, output_directory=".", filename=None):
+        """Write an ``Arrangement`` as one single-track file, a channel per track.
+
+        The tracks' sorted message streams are merged as they are written,
+        in a single pass.  Arguments after ``arrangement`` are as for
+        ``stream_to_midi``, and so is the return value.
+        """
+        try:
+            return self._write(lambda writer: writer.write_events(arrangement.iter_midi_events()),
+                               {"program": None}, output, output_directory, filename)
+
+        except Exception as ex:
+            raise Exception("An error occurred during MIDI export: " + str(ex))
+
+    def _write(self, write, writer_options, output, output_directory, filename):
+        if output is not None:
+            with StreamingMIDIWriter(output, **writer_options) as writer:
+                write(writer)
+            return output
+
+        if filename is None:
+            filename = unique_midi_filename()
+        midi_filename = os.path.join(output_directory, filename)
+        with open(midi_filename, "wb") as midi_file:
+            with StreamingMIDIWriter(midi_file, **writer_options) as writer:
+                write(writer)
+        return midi_filename
@@ -0,0 +1,79 @@
+"""Rhythmic phrasing of melody sections."""
+
+import numbers
+import random
+
+import numpy as np
+
+from .buffer import NoteBuffer
+
+# Define rhythmic patterns for different phrasing techniques
+PHRASING_PATTERNS = {
+    "regular": [0.5, 0.5],
+    "syncopated": [0.25, 0.75],
+    "dotted": [0.75, 0.25],
+    "swing": [0.375, 0.125, 0.375, 0.125]
+}
+# Longest note a pattern may hold, in beats; far below where MIDI delta times overflow
+MAX_PATTERN_DURATION = 64
+
+
+class PhrasingGenerator:
+    def __init__(self, rng=None, patterns=None):
+        self.rng = rng if rng is not None else random
+        if patterns is not None and not isinstance(patterns, dict):
+            raise ValueError(f"Phrasing patterns must map names to durations, got {patterns!r}")
+        # Technique name -> repeating note durations in beats
+        self.patterns = dict(PHRASING_PATTERNS if patterns is None else patterns)
+        if not self.patterns:
+            raise ValueError("Phrasing needs at least one pattern")
+        for name, durations in self.patterns.items():
+            if (not isinstance(durations, (list, tuple)) or not durations
+                    or not all(isinstance(duration, numbers.Real) and not isinstance(duration, bool)
+                               and 0 < duration <= MAX_PATTERN_DURATION for duration in durations)):
+                raise ValueError(f"Phrasing pattern {name!r} must be a non-empty list of durations in "
+                                 f"(0, {MAX_PATTERN_DURATION}] beats, got {durations!r}")
+
+    def introduce_rhythmic_variation(self, melody):
+        try:
+            if melody is None:
+                raise Exception("The melody is None. Please provide a valid melody.")
+
+            phrasing_patterns = self.patterns
+
+            if isinstance(melody, NoteBuffer):
+                durations = melody.notes["duration"]
+                offsets = melody.section_offsets.tolist()
+                for start, end in zip(offsets[:-1], offsets[1:]):
+                    phrasing_technique = self.rng.choice(list(phrasing_patterns.keys()))
+                    durations[start:end] = np.resize(phrasing_patterns[phrasing_technique], end - start)
+                return melody
+
+            # Apply rhythmic variation and phrasing to the melody
+            for section in melody:
+                self._vary_section(section)
+
+            return melody
+
+        except Exception as ex:
+            raise Exception("An error occurred during rhythmic variation introduction: " + str(ex))
+
+    def iter_rhythmic_variation(self, melody):
+        """Lazily apply a phrasing pattern to each section and yield it."""
+        for section in melody:
+            try:
+                self._vary_section(section)
+            except Exception as ex:
+                raise Exception("An error occurred during rhythmic variation introduction: " + str(ex))
+            yield section
+
+    def _vary_section(self, section):
+        if not isinstance(section, list):
+            raise Exception("Each section of the melody should be a list.")
+
+        phrasing_technique = self.rng.choice(list(self.patterns.keys()))
+        rhythmic_pattern = self.patterns.get(phrasing_technique, [])
+
+        for i, event in enumerate(section):
+            if isinstance(event, dict):
+                event["duration"] = rhythmic_pattern[i % len(rhythmic_pattern)]
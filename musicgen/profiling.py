@@ -0,0 +1,193 @@
+"""Opt-in per-stage instrumentation for the generation pipeline.
+
+``AdvancedMusicGenerator`` reports every stage it runs to the hooks passed
+to it and to any installed with ``install_hook``.  With no hooks at all a
+stage is a plain method call, so instrumentation costs nothing unless used.
+
+``profile()`` is the usual entry point::
+
+    with profile() as profiler:
+        AdvancedMusicGenerator(7).generate_piano_music()
+    print(profiler.summary())
+    profiler.write_trace("trace.json")   # chrome://tracing / Perfetto
+
+Hooks are per process: stages run by ``generate_batch`` pool workers are
+not seen by a profiler installed in the parent.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from .buffer import NoteBuffer
+
+# Hooks that see every generator's stages, whatever hooks it was built with
+_global_hooks = []
+_global_hooks_lock = threading.Lock()
+
+
+def install_hook(hook):
+    with _global_hooks_lock:
+        _global_hooks.append(hook)
+
+
+def remove_hook(hook):
+    with _global_hooks_lock:
+        _global_hooks.remove(hook)
+
+
+def count_events(value):
+    """Number of events in a stage's input or output."""
+    if isinstance(value, NoteBuffer):
+        return value.n_notes
+    if isinstance(value, (list, tuple)):
+        return sum(len(item) if isinstance(item, (list, tuple, NoteBuffer)) else 1 for item in value)
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+
+class StageHook:
+    """Base class for pipeline hooks; both methods are no-ops.
+
+    ``stage_started`` returns a token that is handed back to
+    ``stage_finished`` for the same stage.
+    """
+
+    def stage_started(self, name, stage_input):
+        return None
+
+    def stage_finished(self, name, token, stage_input, output):
+        pass
+
+
+class StageProfiler(StageHook):
+    """Record wall time, events and (optionally) allocations per stage call.
+
+    ``trace_allocations`` measures the net and peak bytes allocated by each
+    stage with ``tracemalloc``, which slows the pipeline down noticeably.
+    """
+
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.records = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    def stage_started(self, name, stage_input):
+        allocated = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            allocated = tracemalloc.get_traced_memory()[0]
+        return time.perf_counter_ns(), allocated
+
+    def stage_finished(self, name, token, stage_input, output):
+        end = time.perf_counter_ns()
+        start, allocated_before = token
+        record = {
+            "stage": name,
+            "start_ns": start - self._origin,
+            "duration_ns": end - start,
+            "events_in": count_events(stage_input),
+            "events_out": count_events(output),
+            "thread": threading.get_ident(),
+        }
+        if allocated_before is not None:
+            allocated, peak = tracemalloc.get_traced_memory()
+            record["allocated_bytes"] = allocated - allocated_before
+            record["peak_bytes"] = peak - allocated_before
+        with self._lock:
+            self.records.append(record)
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+    def stage_totals(self):
+        """Aggregate the records per stage, in first-seen order."""
+        totals = {}
+        for record in self.records:
+            stage = totals.setdefault(record["stage"], {
+                "calls": 0, "seconds": 0.0, "events": 0, "allocated_bytes": 0, "peak_bytes": 0})
+            stage["calls"] += 1
+            stage["seconds"] += record["duration_ns"] / 1e9
+            stage["events"] += record["events_out"]
+            stage["allocated_bytes"] += record.get("allocated_bytes", 0)
+            stage["peak_bytes"] = max(stage["peak_bytes"], record.get("peak_bytes", 0))
+        return totals
+
+    def summary(self):
+        """A table of time, share, throughput and allocations per stage."""
+        totals = self.stage_totals()
+        elapsed = sum(stage["seconds"] for stage in totals.values()) or 1.0
+        lines = [f"{'stage':<14}{'calls':>7}{'total ms':>11}{'mean us':>10}{'share':>8}"
+                 f"{'events/s':>12}{'alloc KiB':>11}{'peak KiB':>10}"]
+        for name, stage in totals.items():
+            rate = stage["events"] / stage["seconds"] if stage["seconds"] else 0.0
+            lines.append(
+                f"{name:<14}{stage['calls']:>7}{stage['seconds'] * 1e3:>11.2f}"
+                f"{stage['seconds'] / stage['calls'] * 1e6:>10.1f}{stage['seconds'] / elapsed:>8.1%}"
+                f"{rate:>12.0f}{stage['allocated_bytes'] / 1024:>11.1f}{stage['peak_bytes'] / 1024:>10.1f}")
+        return "\n".join(lines)
+
+    def trace(self):
+        """The records as a Chrome trace-event document."""
+        pid = os.getpid()
+        events = []
+        for record in self.records:
+            args = {key: value for key, value in record.items()
+                    if key not in ("stage", "start_ns", "duration_ns", "thread")}
+            events.append({"name": record["stage"], "cat": "stage", "ph": "X", "pid": pid,
+                           "tid": record["thread"], "ts": record["start_ns"] / 1e3,
+                           "dur": record["duration_ns"] / 1e3, "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path):
+        with open(path, "w") as trace_file:
+            json.dump(self.trace(), trace_file)
+        return path
+
+
+@contextlib.contextmanager
+def profile(trace_allocations=False, profiler=None):
+    """Profile every pipeline stage run inside the block, in any generator."""
+    profiler = profiler if profiler is not None else StageProfiler(trace_allocations)
+    started_tracing = profiler.trace_allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    install_hook(profiler)
+    try:
+        yield profiler
+    finally:
+        remove_hook(profiler)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _call_stage(name, stage_input, function, *args, **kwargs):
+    return function(*args, **kwargs)
+
+
+def stage_runner(hooks):
+    """Return ``run(name, stage_input, function, *args, **kwargs)`` for ``hooks``.
+
+    Without any hooks this is a direct call; otherwise every hook is told
+    when the stage starts and finishes.
+    """
+    hooks = list(hooks) + _global_hooks
+    if not hooks:
+        return _call_stage
+
+    def run(name, stage_input, function, *args, **kwargs):
+        tokens = [hook.stage_started(name, stage_input) for hook in hooks]
+        output = function(*args, **kwargs)
+        # Reverse order, so the first hook's timing encloses the others
+        for hook, token in zip(reversed(hooks), reversed(tokens)):
+            hook.stage_finished(name, token, stage_input, output)
+        return output
+
+    return run
@@ -0,0 +1,277 @@
+"""Real-time playback of the lazy generation pipeline.
+
+A ``RealtimePlayer`` runs two threads.  The producer pulls sections from
+``AdvancedMusicGenerator.iter_piano_music``, converts them to timestamped
+MIDI messages (following the tempo and time-signature changes in the
+stream) and stays ``lookahead_bars`` bars ahead of the clock.  The
+scheduler takes messages from a bounded ``RingBuffer``, sleeps until each
+one is due and hands it to a sink, recording how late it was.
+
+Sinks only need a ``send(message, emitted_at)`` method (and optionally
+``close()``);
+``ListSink`` and ``FileSink`` are provided for testing and logging.
+"""
+
+import collections
+import threading
+import time
+
+from .buffer import event_gate, event_velocity
+from .smf import DEFAULT_TEMPO, DEFAULT_VELOCITY
+
+# Seconds before a message is due that the scheduler stops sleeping and spins
+SPIN_THRESHOLD = 0.002
+# A message later than this counts as late in the statistics
+LATE_THRESHOLD = 0.005
+# Recent jitter samples kept for percentiles, so endless playback stays bounded
+JITTER_WINDOW = 100000
+
+# ``time`` is seconds from the start of playback, ``value`` the tempo (BPM) or
+# time signature (``"3/4"``) for meta messages and ``None`` for notes
+MIDIMessage = collections.namedtuple("MIDIMessage", ["time", "type", "note", "velocity", "value"])
+
+
+class RingBuffer:
+    """A bounded single-producer, single-consumer FIFO over preallocated slots.
+
+    ``put`` blocks while the buffer is full and ``get`` while it is empty,
+    each for at most ``timeout`` seconds.  ``close`` wakes a blocked
+    consumer once the producer is done.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self.high_water = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return self._size
+
+    def put(self, item, timeout=None):
+        """Append ``item``; return False if the buffer stayed full past ``timeout``."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._size < self.capacity or self.closed, timeout):
+                return False
+            if self.closed:
+                return False
+            self._slots[(self._head + self._size) % self.capacity] = item
+            self._size += 1
+            self.high_water = max(self.high_water, self._size)
+            self._condition.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, or None if none arrived in time."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._size or self.closed, timeout):
+                return None
+            if not self._size:
+                return None
+            item = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+            self._condition.notify_all()
+            return item
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class ListSink:
+    """Collect ``(message, emitted_at)`` pairs in memory."""
+
+    def __init__(self):
+        self.messages = []
+
+    def send(self, message, emitted_at):
+        self.messages.append((message, emitted_at))
+
+
+class FileSink:
+    """Write one tab-separated line per message to a text file or path."""
+
+    def __init__(self, output):
+        self._owns_output = isinstance(output, str)
+        self.output = open(output, "w") if self._owns_output else output
+
+    def send(self, message, emitted_at):
+        self.output.write(f"{message.time:.6f}\t{emitted_at:.6f}\t{message.type}\t"
+                          f"{message.note if message.note is not None else '-'}\t"
+                          f"{message.velocity if message.velocity is not None else '-'}\t"
+                          f"{message.value if message.value is not None else '-'}\n")
+
+    def close(self):
+        if self._owns_output:
+            self.output.close()
+        else:
+            self.output.flush()
+
+
+def iter_messages(sections, tempo=DEFAULT_TEMPO, velocity=DEFAULT_VELOCITY):
+    """Yield ``(message, beats_per_bar, tempo)`` in time order for event-dict sections.
+
+    Notes play back to back as in the exporters, at their resolved velocity
+    (``velocity`` when they carry none) and shortened by their articulation;
+    tempo changes rescale the beats that follow them.  The current meter and tempo come with every
+    message so callers can measure lookahead in bars.
+    """
+    now = 0.0
+    seconds_per_beat = 60.0 / tempo
+    beats_per_bar = 4
+    for section in sections:
+        for event in section:
+            event_type = event.get("type", "note")
+            if event_type == "note":
+                end = now + event["duration"] * seconds_per_beat
+                release = now + event["duration"] * event_gate(event) * seconds_per_beat
+                yield (MIDIMessage(now, "note_on", event["note"], event_velocity(event, velocity), None),
+                       beats_per_bar, tempo)
+                yield MIDIMessage(release, "note_off", event["note"], 0, None), beats_per_bar, tempo
+                now = end
+            elif event_type == "tempo":
+                tempo = event["value"]
+                seconds_per_beat = 60.0 / tempo
+                yield MIDIMessage(now, "tempo", None, None, tempo), beats_per_bar, tempo
+            elif event_type == "time_signature":
+                beats_per_bar = event.get("beats") or int(event["value"].split("/")[0])
+                yield MIDIMessage(now, "time_signature", None, None, event["value"]), beats_per_bar, tempo
+
+
+class RealtimePlayer:
+    """Play ``generator``'s lazy output to ``sink`` in real time.
+
+    ``n_chords`` bounds the piece (it is endless by default).  The producer
+    keeps at most ``lookahead_bars`` bars, and at most ``buffer_size``
+    messages, ahead of playback.  ``speed`` scales the clock, which is
+    useful for fast tests.
+    """
+
+    def __init__(self, generator, sink, n_chords=None, lookahead_bars=2, buffer_size=1024, speed=1.0,
+                 tempo=DEFAULT_TEMPO, clock=time.perf_counter):
+        self.generator = generator
+        self.sink = sink
+        self.n_chords = n_chords
+        self.lookahead_bars = lookahead_bars
+        self.speed = speed
+        self.tempo = tempo
+        self.clock = clock
+        self.buffer = RingBuffer(buffer_size)
+
+        self._stop = threading.Event()
+        self._producer = None
+        self._scheduler = None
+        self._start_time = None
+        self._producer_error = None
+        self.produced = 0
+        self.underruns = 0
+        self.late = 0
+        self.emitted = 0
+        self._jitter_total = 0.0
+        self._jitter_max = 0.0
+        self._jitter = collections.deque(maxlen=JITTER_WINDOW)
+
+    def now(self):
+        """Seconds of playback time since ``start``."""
+        return (self.clock() - self._start_time) * self.speed
+
+    def start(self):
+        self._start_time = self.clock()
+        self._producer = threading.Thread(target=self._produce, name="musicgen-producer", daemon=True)
+        self._scheduler = threading.Thread(target=self._schedule, name="musicgen-scheduler", daemon=True)
+        self._producer.start()
+        self._scheduler.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.buffer.close()
+        self.join()
+
+    def join(self, timeout=None):
+        for thread in (self._producer, self._scheduler):
+            if thread is not None:
+                thread.join(timeout)
+        if self._producer_error is not None:
+            raise self._producer_error
+
+    def play(self, duration=None):
+        """Start, play until the piece ends or ``duration`` seconds pass, and stop."""
+        self.start()
+        try:
+            self._scheduler.join(duration)
+        finally:
+            self.stop()
+            close = getattr(self.sink, "close", None)
+            if close is not None:
+                close()
+        return self.stats
+
+    @property
+    def stats(self):
+        recent = sorted(self._jitter)
+        return {
+            "produced": self.produced,
+            "emitted": self.emitted,
+            "underruns": self.underruns,
+            "late": self.late,
+            "jitter_mean_ms": self._jitter_total / self.emitted * 1e3 if self.emitted else 0.0,
+            "jitter_p99_ms": recent[min(len(recent) - 1, int(0.99 * len(recent)))] * 1e3 if recent else 0.0,
+            "jitter_max_ms": self._jitter_max * 1e3,
+            "buffer_high_water": self.buffer.high_water,
+        }
+
+    def _produce(self):
+        try:
+            sections = self.generator.iter_piano_music(self.n_chords)
+            for message, beats_per_bar, tempo in iter_messages(sections, self.tempo):
+                # Stay no more than lookahead_bars ahead of the clock
+                lookahead = self.lookahead_bars * beats_per_bar * 60.0 / tempo
+                while message.time - self.now() > lookahead:
+                    if self._stop.wait((message.time - self.now() - lookahead) / self.speed):
+                        return
+                while not self.buffer.put(message, timeout=0.1):
+                    if self._stop.is_set():
+                        return
+                self.produced += 1
+        except Exception as ex:
+            self._producer_error = ex
+        finally:
+            self.buffer.close()
+
+    def _schedule(self):
+        while not self._stop.is_set():
+            message = self.buffer.get(timeout=0)
+            if message is None:
+                if self.buffer.closed:
+                    return
+                if self.emitted:
+                    # Nothing queued although playback is running: the producer fell behind
+                    self.underruns += 1
+                message = self.buffer.get()
+                if message is None:
+                    return
+
+            # Sleep most of the way, then spin for the last stretch
+            remaining = (message.time - self.now()) / self.speed
+            if remaining > SPIN_THRESHOLD:
+                if self._stop.wait(remaining - SPIN_THRESHOLD):
+                    return
+            while self.now() < message.time:
+                pass
+
+            emitted_at = self.now()
+            self.sink.send(message, emitted_at)
+            lateness = (emitted_at - message.time) / self.speed
+            self.emitted += 1
+            self._jitter_total += lateness
+            self._jitter_max = max(self._jitter_max, lateness)
+            self._jitter.append(lateness)
+            if lateness > LATE_THRESHOLD:
+                self.late += 1
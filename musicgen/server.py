@@ -0,0 +1,315 @@
+"""Asyncio HTTP front-end that renders compositions on demand.
+
+Stdlib only.  ``GET /render?seed=42`` (or ``POST /render`` with a JSON body
+of the same parameters) returns the composition as ``audio/midi`` bytes,
+rendered in memory on a bounded process pool.  Pipeline ``parameters`` (see
+``PIPELINE_PARAMETERS``) may be given as a JSON object.  ``GET /stats``
+reports queue and throughput counters.
+
+Requests beyond the workers wait in a bounded queue; once that is full the
+server answers ``503`` with ``Retry-After`` instead of accepting more work.
+With a ``RenderCache``, repeated seeds are served from the cache and
+concurrent requests for the same render share one job.
+
+Run with ``python -m musicgen.server --port 8000``.
+"""
+
+import argparse
+import asyncio
+import functools
+import io
+import json
+import os
+import random
+import signal
+from urllib.parse import parse_qsl, urlsplit
+
+from .generator import AdvancedMusicGenerator
+from .midi import MIDIExporter
+
+MAX_BODY_SIZE = 64 * 1024
+HEADER_TIMEOUT = 30
+# Seeds are stored as unsigned 64-bit integers (see ``musicgen.corpus``)
+MAX_SEED = 2 ** 64 - 1
+# Longest progression one request may ask for, keeping each render near 0.1 s
+MAX_PROGRESSION_LENGTH = 4096
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def render_midi_bytes(seed, vectorized=False, parameters=None):
+    """Generate the composition for ``seed`` and return it as MIDI file bytes."""
+    composition = AdvancedMusicGenerator(seed, parameters=parameters).generate_piano_music(
+        as_buffer=True, vectorized=vectorized)
+    return MIDIExporter().stream_to_midi(composition, output=io.BytesIO()).getvalue()
+
+
+def parse_render_parameters(params):
+    """Validate request parameters into keyword arguments for ``render_midi_bytes``."""
+    seed = params.get("seed")
+    if seed is None or seed == "":
+        seed = random.randrange(2 ** 32)
+    # JSON bodies may carry floats or booleans, which int() would quietly truncate
+    if isinstance(seed, bool) or not isinstance(seed, (int, str)):
+        raise ValueError(f"seed must be an integer, got {seed!r}")
+    try:
+        seed = int(seed)
+    except ValueError:
+        raise ValueError(f"seed must be an integer, got {seed!r}")
+    if not 0 <= seed <= MAX_SEED:
+        raise ValueError(f"seed must be between 0 and {MAX_SEED}, got {seed}")
+
+    vectorized = params.get("vectorized", False)
+    if isinstance(vectorized, str) and vectorized.lower() in ("", "0", "false", "no"):
+        vectorized = False
+    elif isinstance(vectorized, str) and vectorized.lower() in ("1", "true", "yes"):
+        vectorized = True
+    elif not isinstance(vectorized, bool):
+        raise ValueError(f"vectorized must be a boolean, got {vectorized!r}")
+
+    parameters = params.get("parameters") or None
+    if isinstance(parameters, str):
+        # Query strings carry the object as JSON text
+        try:
+            parameters = json.loads(parameters)
+        except ValueError:
+            raise ValueError(f"parameters must be a JSON object, got {parameters!r}")
+    if parameters is not None:
+        if not isinstance(parameters, dict):
+            raise ValueError(f"parameters must be a JSON object, got {parameters!r}")
+        # Building the stages checks every value, so bad ones fail here with 400
+        AdvancedMusicGenerator(0, parameters=parameters)
+        if parameters.get("progression_length", 0) > MAX_PROGRESSION_LENGTH:
+            raise ValueError(f"progression_length may be at most {MAX_PROGRESSION_LENGTH}, "
+                             f"got {parameters['progression_length']}")
+    return {"seed": seed, "vectorized": vectorized, "parameters": parameters}
+
+
+class ServerBusy(Exception):
+    """Raised when the render queue is full."""
+
+
+class CompositionServer:
+    """Serve renders over HTTP with a bounded executor and request queue.
+
+    At most ``workers`` renders run at once on ``executor`` (a process pool
+    of that size by default); up to ``max_queue`` more wait their turn, and
+    anything beyond that is rejected with 503.  ``cache`` is an optional
+    ``RenderCache`` consulted before rendering.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8000, workers=None, max_queue=64, executor=None,
+                 cache=None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.executor = executor
+        self._owns_executor = executor is None
+        self.cache = cache
+        # Renders in progress, so identical concurrent requests share one job
+        self._inflight = {}
+        self._slots = None
+        self._server = None
+        self.pending = 0
+        self.stats = {"served": 0, "rejected": 0, "errors": 0}
+
+    async def start(self):
+        if self.executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Resolve the real port when 0 was requested
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render(self, seed, vectorized=False, parameters=None):
+        """Render on the executor, waiting for a free worker slot if needed."""
+        if self.cache is not None:
+            # The disk tier does blocking file I/O, so it runs on the default thread pool
+            midi_bytes = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self.cache.lookup_midi, seed, parameters, vectorized=vectorized))
+            if midi_bytes is not None:
+                return midi_bytes
+
+        key = (seed, vectorized, json.dumps(parameters, sort_keys=True))
+        job = self._inflight.get(key)
+        if job is None:
+            if self.pending >= self.workers + self.max_queue:
+                self.stats["rejected"] += 1
+                raise ServerBusy()
+            # The slot is taken before the job is scheduled, so every request
+            # of a burst sees the ones before it; the job's done callback
+            # gives it back, even if the job is cancelled before it starts
+            self.pending += 1
+            job = asyncio.ensure_future(self._render_job(seed, vectorized, parameters))
+            self._inflight[key] = job
+            job.add_done_callback(lambda _: self._finish_job(key))
+        # Shielded so one client disconnecting doesn't cancel a shared job
+        return await asyncio.shield(job)
+
+    def _finish_job(self, key):
+        self.pending -= 1
+        self._inflight.pop(key, None)
+
+    async def _render_job(self, seed, vectorized, parameters):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            midi_bytes = await loop.run_in_executor(self.executor, render_midi_bytes, seed, vectorized,
+                                                    parameters)
+        if self.cache is not None:
+            await loop.run_in_executor(None, functools.partial(self.cache.store_midi, midi_bytes, seed, parameters,
+                                                               vectorized=vectorized))
+        return midi_bytes
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), HEADER_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                method, target, headers, body = request
+                status, content_type, payload, extra_headers = await self._dispatch(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, content_type, payload, keep_alive, extra_headers)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ValueError:
+            _write_response(writer, 400, "text/plain", b"Malformed request\n", False)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == "/stats":
+            stats = dict(self.stats, pending=self.pending, workers=self.workers, max_queue=self.max_queue)
+            if self.cache is not None:
+                stats["cache"] = self.cache.stats
+            return 200, "application/json", json.dumps(stats).encode(), {}
+        if url.path != "/render":
+            return 404, "text/plain", b"Not found\n", {}
+
+        try:
+            if method == "GET":
+                params = dict(parse_qsl(url.query))
+            elif method == "POST":
+                params = json.loads(body or b"{}")
+                if not isinstance(params, dict):
+                    raise ValueError("request body must be a JSON object")
+            else:
+                return 405, "text/plain", b"Use GET or POST\n", {"Allow": "GET, POST"}
+            kwargs = parse_render_parameters(params)
+        except ValueError as ex:
+            return 400, "text/plain", f"{ex}\n".encode(), {}
+
+        try:
+            midi_bytes = await self.render(**kwargs)
+        except ServerBusy:
+            return 503, "text/plain", b"Render queue full\n", {"Retry-After": "1"}
+        except Exception as ex:
+            self.stats["errors"] += 1
+            return 500, "text/plain", f"{ex}\n".encode(), {}
+
+        self.stats["served"] += 1
+        return 200, "audio/midi", midi_bytes, {"X-Seed": str(kwargs["seed"])}
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise ValueError("bad request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_SIZE:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+
+def _write_response(writer, status, content_type, payload, keep_alive, extra_headers=None):
+    headers = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(payload)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    headers += [f"{name}: {value}" for name, value in (extra_headers or {}).items()]
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + payload)
+
+
+async def _serve(args):
+    cache = None
+    if args.cache_mb or args.cache_dir:
+        from .cache import RenderCache
+
+        cache = RenderCache(max_bytes=int(args.cache_mb * 2 ** 20), directory=args.cache_dir)
+    server = await CompositionServer(args.host, args.port, args.workers, args.max_queue, cache=cache).start()
+    print(f"Serving on http://{server.host}:{server.port} with {server.workers} workers")
+    # SIGTERM would otherwise kill the process outright and orphan the pool's
+    # workers; both signals stop serving so close() always shuts the pool down
+    loop = asyncio.get_running_loop()
+    serving = asyncio.ensure_future(server.serve_forever())
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, serving.cancel)
+    try:
+        await serving
+    except asyncio.CancelledError:
+        pass
+    finally:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(signum)
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve composition renders over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--cache-mb", type=float, default=0, help="in-memory render cache size")
+    parser.add_argument("--cache-dir", help="directory for the on-disk render cache")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Incremental Standard MIDI File writer.
+
+``StreamingMIDIWriter`` writes a format 0 (single track) file while events
+are produced, so memory stays bounded by the longest note rather than by the
+length of the piece.  Times are in beats (quarter notes), matching the
+durations used throughout the pipeline.
+"""
+
+import heapq
+import shutil
+import struct
+import tempfile
+
+from .buffer import (ARTICULATION_GATE_TABLE, CONTROL_TEMPO, DEFAULT_VELOCITY, NoteBuffer, event_gate,
+                     event_velocity, note_velocities)
+
+DEFAULT_TICKS_PER_BEAT = 480
+DEFAULT_TEMPO = 120
+
+# Track data is spooled to disk past this size when the output can't seek
+SPOOL_MAX_SIZE = 1 << 20
+# Events written by write_events between flushes of the track chunk
+EVENTS_PER_DRAIN = 4096
+# Sections of a NoteBuffer converted to Python values at a time by write_buffer
+WRITE_BLOCK_SECTIONS = 1024
+
+# Order of timed events sharing a tick: note-offs, then meta events and
+# program changes, then note-ons
+ORDER_NOTE_OFF = 0
+ORDER_SETUP = 1
+ORDER_NOTE_ON = 2
+
+# Largest value a variable-length quantity can hold (four bytes)
+MAX_VARLEN = 0x0FFFFFFF
+# Tempos whose microseconds per beat fit the 24-bit field of a tempo event;
+# the exact minimum is 60e6 / 0xFFFFFF, rounded up to survive float32 storage
+MIN_TEMPO = 3.58
+MAX_TEMPO = 60000000
+
+
+def encode_varlen(value):
+    """Encode ``value`` as a MIDI variable-length quantity.
+
+    Raises ValueError outside ``0..MAX_VARLEN``, which the format can't hold.
+    """
+    if not 0 <= value <= MAX_VARLEN:
+        raise ValueError(f"Variable-length quantities must be in 0..{MAX_VARLEN:#x}, got {value}")
+    encoded = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        encoded.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(encoded)
+
+
+def meta_event(meta_type, data):
+    """Return the bytes of a meta event."""
+    return bytes([0xFF, meta_type]) + encode_varlen(len(data)) + data
+
+
+def tempo_event(tempo):
+    microseconds = round(60000000 / tempo)
+    if not 1 <= microseconds <= 0xFFFFFF:
+        raise ValueError(f"Tempos must be between {MIN_TEMPO} and {MAX_TEMPO} BPM, got {tempo}")
+    return meta_event(0x51, struct.pack(">I", microseconds)[1:])
+
+
+def time_signature_event(numerator, denominator):
+    # Denominator is stored as a power of two; 24 clocks per click, 8 32nds per beat
+    return meta_event(0x58, bytes([numerator, denominator.bit_length() - 1, 24, 8]))
+
+
+def iter_note_events(start_ticks, end_ticks, pitches, velocities, channel=0):
+    """Yield ``(tick, order, data)`` note messages for notes sorted by start tick.
+
+    Note-offs are kept in a heap, so the messages come out in time order in
+    one pass; several such streams can be combined with ``heapq.merge``
+    keyed on ``(tick, order)`` and written with ``write_events``.
+    """
+    status = 0x90 | channel
+    pending_offs = []
+    for start, end, pitch, velocity in zip(start_ticks, end_ticks, pitches, velocities):
+        while pending_offs and pending_offs[0][0] <= start:
+            tick, off_pitch = heapq.heappop(pending_offs)
+            yield tick, ORDER_NOTE_OFF, bytes([status, off_pitch, 0])
+        yield start, ORDER_NOTE_ON, bytes([status, pitch, velocity])
+        # A note lasts at least one tick, so its off never precedes its on
+        heapq.heappush(pending_offs, (max(end, start + 1), pitch))
+    while pending_offs:
+        tick, off_pitch = heapq.heappop(pending_offs)
+        yield tick, ORDER_NOTE_OFF, bytes([status, off_pitch, 0])
+
+
+class StreamingMIDIWriter:
+    """Write a single-track MIDI file to ``output`` as events arrive.
+
+    ``output`` is any writable binary file-like object.  For seekable outputs
+    the track length is patched in place by ``close``; otherwise the track
+    is spooled to a temporary file first.  Notes are placed back to back
+    from a running cursor, as in ``MIDIExporter.export_to_midi``.  With
+    ``program=None`` no program change is written, for callers that set up
+    their own channels through ``write_events``.
+    """
+
+    def __init__(self, output, ticks_per_beat=DEFAULT_TICKS_PER_BEAT, program=0, channel=0,
+                 velocity=DEFAULT_VELOCITY):
+        self.output = output
+        self.ticks_per_beat = ticks_per_beat
+        self.channel = channel
+        self.velocity = velocity
+        self.closed = False
+
+        # Absolute tick of the cursor, and of the last event written
+        self._cursor = 0
+        self._last_tick = 0
+        # (tick, pitch) of notes still sounding
+        self._pending_offs = []
+        self._chunk = bytearray()
+        self._track_length = 0
+        # Last channel status byte written, for running status
+        self._status = None
+
+        self.output.write(b"MThd" + struct.pack(">IHHH", 6, 0, 1, ticks_per_beat))
+        if getattr(self.output, "seekable", lambda: False)():
+            # Length placeholder, patched by close()
+            self.output.write(b"MTrk\x00\x00\x00\x00")
+            self._track = self.output
+            self._length_offset = self.output.tell() - 4
+        else:
+            self._track = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            self._length_offset = None
+
+        if program is not None:
+            self._event(0, bytes([0xC0 | channel, program]))
+        self._meta(0, 0x51, struct.pack(">I", 60000000 // DEFAULT_TEMPO)[1:])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def add_note(self, pitch, duration, velocity=None, gate=1.0):
+        """Play ``pitch`` at the cursor and advance ``duration`` beats.
+
+        The note sounds for ``gate`` of its duration (see ``ARTICULATION_GATES``).
+        """
+        start = self._cursor
+        self._cursor = start + round(duration * self.ticks_per_beat)
+        self._flush_offs(start)
+        velocity = self.velocity if velocity is None else velocity
+        self._event(start, bytes([0x90 | self.channel, pitch, velocity]))
+        heapq.heappush(self._pending_offs, (start + round(duration * gate * self.ticks_per_beat), pitch))
+
+    def add_tempo(self, tempo):
+        self._flush_offs(self._cursor)
+        self._event(self._cursor, tempo_event(tempo))
+
+    def add_time_signature(self, numerator, denominator):
+        self._flush_offs(self._cursor)
+        self._event(self._cursor, time_signature_event(numerator, denominator))
+
+    def write_section(self, section):
+        """Write one section given as a list of event dicts."""
+        for event in section:
+            event_type = event.get("type", "note")
+            if event_type == "note":
+                self.add_note(event["note"], event["duration"], event_velocity(event, self.velocity),
+                              event_gate(event))
+            elif event_type == "tempo":
+                self.add_tempo(event["value"])
+            elif event_type == "time_signature":
+                numerator, denominator = (int(part) for part in event["value"].split("/"))
+                self.add_time_signature(numerator, denominator)
+        self._drain()
+
+    def write_buffer(self, note_buffer):
+        """Write every section of a ``NoteBuffer`` without building event dicts."""
+        offsets = note_buffer.section_offsets.tolist()
+        controls = note_buffer.controls.tolist()
+        control_index = 0
+        for first in range(0, len(note_buffer), WRITE_BLOCK_SECTIONS):
+            # Resolved a block of sections at a time, so the Python values
+            # never cover more than one block of the buffer
+            last = min(first + WRITE_BLOCK_SECTIONS, len(note_buffer))
+            notes = note_buffer.notes[offsets[first]:offsets[last]]
+            pitches = notes["pitch"].tolist()
+            durations = notes["duration"].tolist()
+            velocities = note_velocities(notes, self.velocity).tolist()
+            gates = ARTICULATION_GATE_TABLE[notes["articulation"]].tolist()
+            for index in range(first, last):
+                start, end = offsets[index] - offsets[first], offsets[index + 1] - offsets[first]
+                position = 0
+                for pitch, duration, velocity, gate in zip(pitches[start:end], durations[start:end],
+                                                           velocities[start:end], gates[start:end]):
+                    control_index = self._write_controls(controls, control_index, index, position)
+                    self.add_note(pitch, duration, velocity, gate)
+                    position += 1
+                control_index = self._write_controls(controls, control_index, index, position)
+                self._drain()
+
+    def write_sections(self, sections):
+        """Write sections from any iterable (lists of dicts or ``NoteBuffer``s)."""
+        for section in sections:
+            if isinstance(section, NoteBuffer):
+                self.write_buffer(section)
+            else:
+                self.write_section(section)
+
+    def write_events(self, events):
+        """Write ``(tick, order, data)`` messages given in time order, on any channels.
+
+        ``data`` is a complete channel or meta message.  This is the
+        low-level path for multi-channel files; it does not move the cursor.
+        """
+        for count, (tick, _, data) in enumerate(events, start=1):
+            self._event(tick, data)
+            if count % EVENTS_PER_DRAIN == 0:
+                self._drain()
+        self._drain()
+
+    def close(self):
+        if self.closed:
+            return
+        self._flush_offs(None)
+        self._meta(self._last_tick, 0x2F, b"")
+        self._drain()
+
+        if self._length_offset is not None:
+            end = self.output.tell()
+            self.output.seek(self._length_offset)
+            self.output.write(struct.pack(">I", self._track_length))
+            self.output.seek(end)
+        else:
+            self.output.write(b"MTrk" + struct.pack(">I", self._track_length))
+            self._track.seek(0)
+            shutil.copyfileobj(self._track, self.output)
+            self._track.close()
+        self.closed = True
+
+    def _write_controls(self, controls, control_index, section, position):
+        while (control_index < len(controls) and controls[control_index][0] == section
+               and controls[control_index][1] <= position):
+            _, _, kind, tempo, numerator, denominator, _ = controls[control_index]
+            if kind == CONTROL_TEMPO:
+                self.add_tempo(tempo)
+            else:
+                self.add_time_signature(numerator, denominator)
+            control_index += 1
+        return control_index
+
+    def _flush_offs(self, until):
+        # Emit note-offs due at or before ``until`` (all of them if None)
+        while self._pending_offs and (until is None or self._pending_offs[0][0] <= until):
+            tick, pitch = heapq.heappop(self._pending_offs)
+            # Note-on with velocity 0 keeps running status across on/off pairs
+            self._event(tick, bytes([0x90 | self.channel, pitch, 0]))
+
+    def _meta(self, tick, meta_type, data):
+        self._event(tick, meta_event(meta_type, data))
+
+    def _event(self, tick, data):
+        # Meta events (0xFF) cancel running status
+        self._chunk += encode_varlen(tick - self._last_tick)
+        if data[0] == self._status:
+            self._chunk += data[1:]
+        else:
+            self._chunk += data
+            self._status = data[0] if data[0] < 0xF0 else None
+        self._last_tick = tick
+
+    def _drain(self):
+        self._track.write(self._chunk)
+        self._track_length += len(self._chunk)
+        self._chunk = bytearray()
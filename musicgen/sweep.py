@@ -0,0 +1,336 @@
+"""Parameter sweeps over the composition pipeline.
+
+A sweep renders every configuration of a grid of pipeline parameters
+(see ``PIPELINE_PARAMETERS``), or a random sample of it, once per seed,
+on a process pool.  Finished renders are appended to a JSON-lines index in
+the sweep directory as they complete; renders already in the index are
+skipped, so rerunning an interrupted sweep picks up where it stopped and
+overlapping sweeps share their work.  Each run ends by writing a CSV
+summary with one row per configuration.
+
+Run with ``python -m musicgen.sweep DIRECTORY --spec sweep.json``, where
+the spec holds ``grid`` (parameter name -> list of values) and optionally
+``samples``, ``search_seed`` and ``seeds``.  The spec is kept in the
+directory, so ``python -m musicgen.sweep DIRECTORY`` resumes it.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import product
+
+import numpy as np
+
+from .buffer import CONTROL_TEMPO, CONTROL_TIME_SIGNATURE
+from .cache import cache_key
+from .generator import AdvancedMusicGenerator
+from .midi import MIDIExporter
+
+SWEEP_INDEX = "index.jsonl"
+SWEEP_SUMMARY = "summary.csv"
+SWEEP_SPEC = "sweep.json"
+MIDI_DIRECTORY = "midi"
+
+# Per-render statistics averaged into the summary, in column order
+SUMMARY_STATISTICS = ("generate_ms", "export_ms", "sections", "notes", "beats", "mean_pitch", "pitch_range",
+                      "mean_velocity", "tempo_changes", "time_signature_changes", "midi_bytes")
+
+
+def expand_grid(grid):
+    """Return every configuration of ``grid``, a dict of name -> list of values."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+
+def sample_grid(grid, n, rng=None):
+    """Return ``n`` distinct configurations of ``grid`` drawn uniformly at random.
+
+    The grid is never expanded: configurations are decoded from sampled
+    indices, so huge grids are cheap to sample.  All of them come back, in
+    grid order, when ``n`` is at least the grid size.
+    """
+    rng = rng if rng is not None else random
+    names = sorted(grid)
+    sizes = [len(grid[name]) for name in names]
+    total = math.prod(sizes)
+    if n >= total:
+        return expand_grid(grid)
+
+    configs = []
+    for index in rng.sample(range(total), n):
+        # Mixed-radix decode, last name varying fastest as in expand_grid
+        values = []
+        for name, size in zip(reversed(names), reversed(sizes)):
+            index, position = divmod(index, size)
+            values.append(grid[name][position])
+        configs.append(dict(zip(names, reversed(values))))
+    return configs
+
+
+def config_key(parameters, seed):
+    """Return the hex digest identifying the render of ``parameters`` at ``seed``."""
+    return cache_key("sweep", seed, parameters)
+
+
+def composition_stats(composition):
+    """Output statistics of a ``NoteBuffer`` composition, as a flat dict."""
+    notes = composition.notes
+    pitches = notes["pitch"].astype(np.int64)
+    kinds = composition.controls["kind"]
+    return {
+        "sections": len(composition),
+        "notes": composition.n_notes,
+        "beats": float(notes["duration"].sum(dtype=np.float64)),
+        "mean_pitch": float(pitches.mean()) if len(pitches) else 0.0,
+        "pitch_range": int(pitches.max() - pitches.min()) if len(pitches) else 0,
+        "mean_velocity": float(composition.velocities().mean()) if len(pitches) else 0.0,
+        "tempo_changes": int((kinds == CONTROL_TEMPO).sum()),
+        "time_signature_changes": int((kinds == CONTROL_TIME_SIGNATURE).sum()),
+    }
+
+
+class SweepIndex:
+    """Append-only JSON-lines record of finished renders, keyed by ``config_key``.
+
+    Every record is flushed and synced as it is added, so after a crash
+    the index holds every completed render and at most one torn last line,
+    which is dropped on load.  A bad line anywhere else is corruption
+    rather than an interrupted write, and loading raises ValueError instead
+    of discarding the records after it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        if os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def add(self, record):
+        with open(self.path, "a", encoding="utf-8") as index_file:
+            index_file.write(json.dumps(record, sort_keys=True) + "\n")
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        self.records[record["key"]] = record
+
+    def _load(self):
+        valid_end = 0
+        torn_line = None
+        with open(self.path, "rb") as index_file:
+            for number, line in enumerate(index_file, start=1):
+                if torn_line is not None:
+                    raise ValueError(f"Sweep index {self.path} is corrupt at line {torn_line}, "
+                                     f"which is followed by more records")
+                try:
+                    # A record is complete only once its newline is written
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    record = json.loads(line)
+                except ValueError:
+                    torn_line = number
+                    continue
+                self.records[record["key"]] = record
+                valid_end += len(line)
+        if valid_end != os.path.getsize(self.path):
+            with open(self.path, "r+b") as index_file:
+                index_file.truncate(valid_end)
+
+
+class SweepRunner:
+    """Render configurations across ``workers`` processes, skipping indexed ones.
+
+    ``workers`` defaults to ``os.cpu_count()``; ``1`` renders in-process.
+    With ``export`` each render is also written to
+    ``<directory>/midi/<key>.mid``.
+    """
+
+    def __init__(self, directory, workers=None, export=True):
+        self.directory = directory
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.export = export
+        os.makedirs(os.path.join(directory, MIDI_DIRECTORY), exist_ok=True)
+        self.index = SweepIndex(os.path.join(directory, SWEEP_INDEX))
+        self.rendered = 0
+        self.skipped = 0
+
+    def plan(self, configs, seeds=(0,)):
+        """Return the distinct ``(key, seed, parameters)`` jobs of a sweep.
+
+        Every configuration is checked by building its generator, so a bad
+        grid fails here rather than partway through the sweep.
+        """
+        for seed in seeds:
+            if isinstance(seed, bool) or not isinstance(seed, int) or seed < 0:
+                raise ValueError(f"Seeds must be non-negative integers, got {seed!r}")
+        jobs = {}
+        for parameters in configs:
+            AdvancedMusicGenerator(0, parameters=parameters)
+            for seed in seeds:
+                key = config_key(parameters, seed)
+                jobs.setdefault(key, (key, seed, parameters))
+        return list(jobs.values())
+
+    def run(self, configs, seeds=(0,), progress=None):
+        """Render every configuration at every seed and write the summary.
+
+        Returns the index records of the whole sweep in plan order.
+        ``progress`` is called with each new record as it is indexed.
+        """
+        try:
+            jobs = self.plan(configs, seeds)
+            pending = [self._job(key, seed, parameters) for key, seed, parameters in jobs
+                       if key not in self.index]
+            self.skipped += len(jobs) - len(pending)
+
+            for record in self._render(pending):
+                self.index.add(record)
+                self.rendered += 1
+                if progress is not None:
+                    progress(record)
+
+            records = [self.index.get(key) for key, _, _ in jobs]
+            write_summary(records, os.path.join(self.directory, SWEEP_SUMMARY))
+            return records
+
+        except Exception as ex:
+            raise Exception("An error occurred during the parameter sweep: " + str(ex))
+
+    def _job(self, key, seed, parameters):
+        midi_path = os.path.join(self.directory, MIDI_DIRECTORY, key + ".mid") if self.export else None
+        return key, seed, parameters, midi_path
+
+    def _render(self, jobs):
+        if self.workers <= 1:
+            for job in jobs:
+                yield _render_job(job)
+            return
+
+        # A few jobs in flight per worker; results are indexed as they finish,
+        # so an interruption loses at most the renders still running
+        jobs = iter(jobs)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            running = set()
+            try:
+                while True:
+                    for job in jobs:
+                        running.add(executor.submit(_render_job, job))
+                        if len(running) >= self.workers * 4:
+                            break
+                    if not running:
+                        return
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                for future in running:
+                    future.cancel()
+
+
+def _render_job(job):
+    key, seed, parameters, midi_path = job
+    start = time.perf_counter()
+    composition = AdvancedMusicGenerator(seed, parameters=parameters).generate_piano_music(as_buffer=True)
+    generate_seconds = time.perf_counter() - start
+
+    export_seconds = 0.0
+    midi_bytes = 0
+    if midi_path is not None:
+        start = time.perf_counter()
+        # Written aside and renamed, so a killed worker never leaves a partial file
+        temp_path = midi_path + ".tmp"
+        MIDIExporter().stream_to_midi(composition, output_directory=os.path.dirname(temp_path),
+                                      filename=os.path.basename(temp_path))
+        os.replace(temp_path, midi_path)
+        export_seconds = time.perf_counter() - start
+        midi_bytes = os.path.getsize(midi_path)
+
+    record = {"key": key, "seed": seed, "parameters": parameters,
+              "generate_ms": generate_seconds * 1000, "export_ms": export_seconds * 1000,
+              "midi_bytes": midi_bytes, "midi_filename": os.path.basename(midi_path) if midi_path else None}
+    record.update(composition_stats(composition))
+    return record
+
+
+def summarize(records):
+    """Return one summary row per configuration, averaging its renders over seeds."""
+    groups = {}
+    for record in records:
+        groups.setdefault(json.dumps(record["parameters"], sort_keys=True), []).append(record)
+
+    rows = []
+    for renders in groups.values():
+        row = {name: _cell(value) for name, value in sorted(renders[0]["parameters"].items())}
+        row["renders"] = len(renders)
+        for statistic in SUMMARY_STATISTICS:
+            row[statistic] = round(sum(render[statistic] for render in renders) / len(renders), 3)
+        rows.append(row)
+    return rows
+
+
+def write_summary(records, path):
+    """Write ``summarize(records)`` to ``path`` as CSV and return the rows."""
+    rows = summarize(records)
+    parameter_names = sorted({name for record in records for name in record["parameters"]})
+    with open(path, "w", newline="", encoding="utf-8") as summary_file:
+        writer = csv.DictWriter(summary_file, fieldnames=parameter_names + ["renders", *SUMMARY_STATISTICS],
+                                restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def _cell(value):
+    # Lists and dicts are kept readable, and parseable, as compact JSON
+    return value if isinstance(value, (str, int, float)) else json.dumps(value, separators=(",", ":"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a grid or random search over pipeline parameters.")
+    parser.add_argument("directory", help="sweep directory; holds the spec, index, summary and MIDI files")
+    parser.add_argument("--spec", help="JSON sweep spec; defaults to the one saved in the directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-export", action="store_true", help="skip writing MIDI files")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.directory, exist_ok=True)
+    spec_path = os.path.join(args.directory, SWEEP_SPEC)
+    with open(args.spec or spec_path, encoding="utf-8") as spec_file:
+        spec = json.load(spec_file)
+    if args.spec:
+        with open(spec_path, "w", encoding="utf-8") as spec_file:
+            json.dump(spec, spec_file, indent=2, sort_keys=True)
+
+    grid = spec["grid"]
+    if spec.get("samples") is None:
+        configs = expand_grid(grid)
+    else:
+        configs = sample_grid(grid, spec["samples"], random.Random(spec.get("search_seed", 0)))
+
+    runner = SweepRunner(args.directory, workers=args.workers, export=not args.no_export)
+    started = time.perf_counter()
+    try:
+        runner.run(configs, spec.get("seeds", [0]),
+                   progress=lambda record: print(f"{record['key'][:12]}  seed {record['seed']}  "
+                                                 f"{record['generate_ms']:.1f} ms  {record['notes']} notes"))
+    except KeyboardInterrupt:
+        print(f"Interrupted after {runner.rendered} renders; rerun to resume")
+        return
+    print(f"{runner.rendered} rendered, {runner.skipped} already indexed in "
+          f"{time.perf_counter() - started:.1f} s; summary in {os.path.join(args.directory, SWEEP_SUMMARY)}")
+
+
+if __name__ == "__main__":
+    main()
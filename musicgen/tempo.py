@@ -0,0 +1,123 @@
+"""Tempo and time signature changes."""
+
+import numbers
+import random
+
+import numpy as np
+
+from .buffer import CONTROL_DTYPE, NoteBuffer, tempo_control, time_signature_control
+from .smf import MAX_TEMPO, MIN_TEMPO
+
+# Define tempo and time signature possibilities
+TEMPO_CHANGES = [80, 100, 120]  # BPM values
+TIME_SIGNATURE_CHANGES = [("4/4", 4), ("3/4", 3), ("6/8", 6)]  # Time signature and beats per bar
+# Chance of each kind of change after a section
+TEMPO_CHANGE_PROBABILITY = 0.3
+TIME_SIGNATURE_CHANGE_PROBABILITY = 0.2
+# Denominators a Standard MIDI File can express, as powers of two
+TIME_SIGNATURE_DENOMINATORS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _time_signature(value):
+    """Normalize ``"3/4"`` or ``("3/4", beats)`` to ``("3/4", beats)``, or raise ValueError."""
+    if isinstance(value, str):
+        value = (value, None)
+    try:
+        signature, beats = value
+        numerator, denominator = (int(part) for part in signature.split("/"))
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError(f"Time signatures must look like '3/4' or ('3/4', 3), got {value!r}")
+    if beats is None:
+        # Plain strings count one beat per numerator unit
+        beats = numerator
+    if not 1 <= numerator <= 255 or denominator not in TIME_SIGNATURE_DENOMINATORS:
+        raise ValueError(f"Time signature {signature!r} needs a numerator in 1..255 and a denominator "
+                         f"in {TIME_SIGNATURE_DENOMINATORS}")
+    if isinstance(beats, bool) or not isinstance(beats, numbers.Integral) or not 1 <= beats <= 255:
+        raise ValueError(f"Beats per bar of {signature!r} must be an integer in 1..255, got {beats!r}")
+    return signature, int(beats)
+
+
+class TempoChangeGenerator:
+    def __init__(self, rng=None, tempos=None, time_signatures=None, tempo_probability=TEMPO_CHANGE_PROBABILITY,
+                 time_signature_probability=TIME_SIGNATURE_CHANGE_PROBABILITY):
+        self.rng = rng if rng is not None else random
+        for name, values in [("tempos", tempos), ("time_signatures", time_signatures)]:
+            if values is not None and not isinstance(values, (list, tuple)):
+                raise ValueError(f"{name} must be a list, got {values!r}")
+        self.tempos = list(TEMPO_CHANGES if tempos is None else tempos)
+        self.time_signatures = [_time_signature(value) for value in
+                                (TIME_SIGNATURE_CHANGES if time_signatures is None else time_signatures)]
+        self.tempo_probability = tempo_probability
+        self.time_signature_probability = time_signature_probability
+        if not self.tempos or not self.time_signatures:
+            raise ValueError("Tempo changes need at least one tempo and one time signature")
+        # The range a MIDI tempo event can encode
+        if not all(_is_number(tempo) and MIN_TEMPO <= tempo <= MAX_TEMPO for tempo in self.tempos):
+            raise ValueError(f"Tempos must be numbers of beats per minute between {MIN_TEMPO} and "
+                             f"{MAX_TEMPO}, got {self.tempos!r}")
+        for name, probability in [("tempo_probability", tempo_probability),
+                                  ("time_signature_probability", time_signature_probability)]:
+            if not _is_number(probability) or not 0 <= probability <= 1:
+                raise ValueError(f"{name} must be a number in [0, 1], got {probability!r}")
+
+    def introduce_tempo_and_time_signature_changes(self, composition):
+        try:
+            tempo_changes = self.tempos
+            time_signature_changes = self.time_signatures
+
+            if isinstance(composition, NoteBuffer):
+                # Control events go in their own track, after each section's notes
+                controls = []
+                for i, length in enumerate(composition.section_lengths().tolist()):
+                    if self.rng.random() < self.tempo_probability:
+                        new_tempo = self.rng.choice(tempo_changes)
+                        controls.append(tempo_control(i, length, new_tempo))
+
+                    if self.rng.random() < self.time_signature_probability:
+                        new_time_signature, new_beats = self.rng.choice(time_signature_changes)
+                        controls.append(time_signature_control(i, length, new_time_signature, new_beats))
+
+                return composition.with_controls(np.array(controls, dtype=CONTROL_DTYPE))
+
+            # Sections with changes become new lists: the form stage repeats sections
+            # as the same list objects, and extending in place would add changes twice
+            changed = []
+            for section in composition:
+                changes = self._section_changes()
+                changed.append(section + changes if changes else section)
+            return changed
+        except Exception as ex:
+            raise Exception("An error occurred during tempo and time signature change introduction: " + str(ex))
+
+    def iter_tempo_and_time_signature_changes(self, composition):
+        """Lazily yield each section followed by any tempo/meter changes.
+
+        Sections are never modified: one with changes is yielded as a new
+        list, so sections repeated by the form stage stay intact.
+        """
+        for section in composition:
+            try:
+                changes = self._section_changes()
+            except Exception as ex:
+                raise Exception("An error occurred during tempo and time signature change introduction: " + str(ex))
+            yield section + changes if changes else section
+
+    def _section_changes(self):
+        changes = []
+
+        # Introduce tempo change with probability
+        if self.rng.random() < self.tempo_probability:
+            new_tempo = self.rng.choice(self.tempos)
+            changes.append({"type": "tempo", "value": new_tempo})
+
+        # Introduce time signature change with probability
+        if self.rng.random() < self.time_signature_probability:
+            new_time_signature, new_beats = self.rng.choice(self.time_signatures)
+            changes.append({"type": "time_signature", "value": new_time_signature, "beats": new_beats})
+
+        return changes
@@ -0,0 +1,250 @@
+"""Compiled chord vocabulary shared by every generator stage.
+
+Chord symbols such as ``"maj79"``, ``"bIIdom7"`` or ``"Dmin7b5"`` are parsed
+once into root, quality and extension and interned as small integer IDs.
+Per-ID attributes live in flat tables, so stages can work on IDs in their
+hot loops and only look symbols up at the edges.
+"""
+
+import re
+import threading
+
+import numpy as np
+
+# Define chord qualities with possible extensions
+CHORD_DEFINITIONS = [
+    ("maj7", ["", "9", "maj7#11", "13"]),
+    ("min7", ["", "9", "11", "b13"]),
+    ("dom7", ["", "9", "11", "13"]),
+    ("min7b5", ["", "b9", "11", "b13"]),
+    ("bIIImin7", ["", "9", "11", "b13"]),
+    ("bIIdom7", ["", "9", "11", "13"]),
+    ("bVIdom7", ["", "9", "11", "13"]),
+]
+
+# Define borrowed chord possibilities
+BORROWED_CHORDS = [
+    ("bII", "dom7"),
+    ("bIII", "min7"),
+    ("bVI", "min7"),
+]
+
+# Define possible key changes
+KEY_CHANGES = ["C", "D", "E", "F", "G", "A", "B"]
+
+# Define pitch ranges for different chord qualities, optionally qualified by
+# a borrowed-chord root
+PITCH_RANGES = {
+    "maj7": range(60, 73),
+    "min7": range(58, 71),
+    "dom7": range(57, 70),
+    "min7b5": range(55, 68),
+    "bIIImin7": range(56, 69),
+    "bIIdom7": range(58, 71),
+    "bVImin7": range(53, 66),
+    "bVIdom7": range(54, 67),
+    "min6": range(57, 70),
+    "min11": range(58, 71),
+    "dim7": range(51, 64),
+    "aug7": range(60, 73)
+    # Add more chord qualities and their corresponding pitch ranges here
+}
+
+DEFAULT_PITCH_RANGE = range(40, 80)  # Choose an appropriate default pitch range
+
+# Pitch classes of chord roots, as letters or as degrees of C; chords without
+# a root are read in C
+ROOT_PITCH_CLASSES = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11,
+                      "I": 0, "II": 2, "III": 4, "IV": 5, "V": 7, "VI": 9, "VII": 11}
+
+# Chord tones of each quality and extension, in semitones above the root
+QUALITY_INTERVALS = {
+    "maj7": (0, 4, 7, 11),
+    "min7": (0, 3, 7, 10),
+    "dom7": (0, 4, 7, 10),
+    "min7b5": (0, 3, 6, 10),
+    "min6": (0, 3, 7, 9),
+    "min11": (0, 3, 7, 10, 14, 17),
+    "dim7": (0, 3, 6, 9),
+    "aug7": (0, 4, 8, 10),
+}
+EXTENSION_INTERVALS = {"b9": 13, "9": 14, "11": 17, "#11": 18, "b13": 20, "13": 21}
+
+# Longest first, so "min7b5" wins over "min7"; a bare "7" is a dominant seventh
+QUALITIES = sorted(["maj7", "min7b5", "min7", "dom7", "min6", "min11", "dim7", "aug7", "7"],
+                   key=len, reverse=True)
+QUALITY_ALIASES = {"7": "dom7"}
+
+_ROOT_PATTERN = re.compile(r"(b?(?:VII|VI|V|IV|III|II|I)|[A-G][#b]?)")
+_EXTENSION_PATTERN = re.compile(r"[b#]?(?:13|11|9)")
+
+
+def parse_chord_symbol(symbol):
+    """Split ``symbol`` into ``(root, quality, extension)``.
+
+    ``root`` is a letter name, a roman degree for borrowed chords, or ``""``.
+    ``quality`` is ``None`` when no known quality follows the root, in which
+    case the whole remainder is returned as the extension.
+    """
+    for root_match in (_ROOT_PATTERN.match(symbol), None):
+        root = root_match.group(0) if root_match else ""
+        rest = symbol[len(root):]
+        for quality in QUALITIES:
+            if rest.startswith(quality):
+                return root, QUALITY_ALIASES.get(quality, quality), rest[len(quality):]
+    return "", None, symbol
+
+
+def root_pitch_class(root):
+    """Return the pitch class (0 = C) of a parsed root; ``""`` is C."""
+    if not root:
+        return 0
+    if root[0] == "b":
+        return (ROOT_PITCH_CLASSES[root[1:]] - 1) % 12
+    return (ROOT_PITCH_CLASSES[root[0]] + {"b": -1, "#": 1}.get(root[1:], 0)) % 12
+
+
+def chord_tone_mask(root, quality, extension):
+    """Return the pitch classes of a parsed chord as a 12-bit mask (bit 0 = C).
+
+    Unknown qualities are treated as major triads.
+    """
+    pitch_class = root_pitch_class(root)
+    intervals = list(QUALITY_INTERVALS.get(quality, (0, 4, 7)))
+    intervals += [EXTENSION_INTERVALS[token] for token in _EXTENSION_PATTERN.findall(extension)]
+
+    mask = 0
+    for interval in intervals:
+        mask |= 1 << ((pitch_class + interval) % 12)
+    return mask
+
+
+class ChordVocabulary:
+    """Interns chord symbols as IDs with O(1) access to their attributes.
+
+    ``pitch_low``/``pitch_high`` (exclusive) and the padded ``pitch_table``
+    returned by ``arrays()`` are indexed by ID, as are the ``root_classes``
+    and the ``tone_masks`` of each chord's pitch classes.  Unknown symbols
+    are parsed and added on first use, so IDs stay valid for the life of
+    the vocabulary.
+    """
+
+    def __init__(self, symbols=()):
+        self._ids = {}
+        self._with_root = {}
+        self._lock = threading.Lock()
+        self._arrays = None
+
+        self.symbols = []
+        self.roots = []
+        self.qualities = []
+        self.extensions = []
+        self.pitch_ranges = []
+        self.root_classes = []
+        self.tone_masks = []
+        for symbol in symbols:
+            self.intern(symbol)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._ids
+
+    def intern(self, symbol):
+        """Return the ID of ``symbol``, adding it to the vocabulary if needed."""
+        chord_id = self._ids.get(symbol)
+        if chord_id is not None:
+            return chord_id
+        with self._lock:
+            chord_id = self._ids.get(symbol)
+            if chord_id is None:
+                chord_id = self._add(symbol)
+        return chord_id
+
+    def intern_many(self, symbols):
+        """Return an ``int32`` array of IDs; integer input is passed through."""
+        if isinstance(symbols, np.ndarray) and symbols.dtype.kind in "iu":
+            return symbols.astype(np.int32, copy=False)
+        if len(symbols) and isinstance(symbols[0], (int, np.integer)):
+            return np.asarray(symbols, dtype=np.int32)
+        ids = self._ids
+        return np.fromiter(
+            (ids[s] if s in ids else self.intern(s) for s in symbols), dtype=np.int32, count=len(symbols))
+
+    def symbol(self, chord_id):
+        return self.symbols[chord_id]
+
+    def pitch_range(self, chord_id):
+        return self.pitch_ranges[chord_id]
+
+    def tone_mask(self, chord_id):
+        return self.tone_masks[chord_id]
+
+    def with_root(self, chord_id, root):
+        """Return the ID of ``chord_id`` re-rooted on ``root``."""
+        key = (chord_id, root)
+        new_id = self._with_root.get(key)
+        if new_id is None:
+            quality = self.qualities[chord_id] or ""
+            new_id = self.intern(root + quality + self.extensions[chord_id])
+            self._with_root[key] = new_id
+        return new_id
+
+    def arrays(self):
+        """Return ``(pitch_low, pitch_high, pitch_table, pitch_counts)``.
+
+        ``pitch_table[i, :pitch_counts[i]]`` lists the candidate pitches of
+        chord ``i``.  The arrays are rebuilt only after new symbols are added.
+        """
+        arrays = self._arrays
+        if arrays is None or len(arrays[0]) != len(self.symbols):
+            low = np.array([r.start for r in self.pitch_ranges], dtype=np.int16)
+            high = np.array([r.stop for r in self.pitch_ranges], dtype=np.int16)
+            counts = high - low
+            width = int(counts.max()) if len(counts) else 0
+            table = low[:, None] + np.arange(width, dtype=np.int16)
+            table = np.minimum(table, high[:, None] - 1)
+            arrays = self._arrays = (low, high, table, counts)
+        return arrays
+
+    def pitch_set(self, chord_id):
+        _, _, table, counts = self.arrays()
+        return table[chord_id, :counts[chord_id]]
+
+    def _add(self, symbol):
+        root, quality, extension = parse_chord_symbol(symbol)
+        pitch_range = PITCH_RANGES.get(root + (quality or ""), PITCH_RANGES.get(quality, DEFAULT_PITCH_RANGE))
+
+        self.symbols.append(symbol)
+        self.roots.append(root)
+        self.qualities.append(quality)
+        self.extensions.append(extension)
+        self.pitch_ranges.append(pitch_range)
+        self.root_classes.append(root_pitch_class(root))
+        self.tone_masks.append(chord_tone_mask(root, quality, extension))
+        # Publish the ID last so lock-free readers never see a partial entry
+        chord_id = len(self.symbols) - 1
+        self._ids[symbol] = chord_id
+        return chord_id
+
+
+def generated_symbols():
+    """Every chord symbol ``ChordGenerator`` can produce, in a stable order."""
+    symbols = [quality + extension for quality, extensions in CHORD_DEFINITIONS for extension in extensions]
+    symbols += [root + quality for root, quality in BORROWED_CHORDS]
+    return symbols
+
+
+_vocabulary = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_vocabulary():
+    """Return the process-wide vocabulary, compiling it on first use."""
+    global _vocabulary
+    if _vocabulary is None:
+        with _vocabulary_lock:
+            if _vocabulary is None:
+                _vocabulary = ChordVocabulary(generated_symbols())
+    return _vocabulary
@@ -0,0 +1,239 @@
+"""Counterpoint as a beam search over voice-leading costs.
+
+Lines are added below a melody one voice at a time.  Voice ``k`` may take
+any pitch of the chord's ``PITCH_RANGES`` entry transposed down ``k + 1``
+octaves, up to the untransposed range an octave higher, so the vocabulary
+stays the single source of register.  Each candidate is scored against the
+voices already fixed above it: chord tones, harmonic consonance, voice
+crossing and spacing, melodic leaps, and parallel or direct fifths and
+octaves.
+
+A voice's cost depends only on its previous pitch, so the search keeps at
+most ``beam_width`` pitches per note, each with its cheapest history (with a
+beam as wide as the candidate set this is an exact Viterbi solve).  The
+cost matrix of a step depends only on the chord and on the upper voices'
+previous and current pitches, which repeat constantly in generated music;
+matrices are memoized on exactly that key, so a step usually costs one
+cache lookup and a few small array operations, and long lines solve in
+linear time.
+"""
+
+import functools
+
+import numpy as np
+
+from .vocabulary import get_vocabulary
+
+DEFAULT_BEAM_WIDTH = 8
+# Memoized step cost matrices
+DEFAULT_CACHE_SIZE = 4096
+
+# Lowest and highest MIDI notes any counterpoint voice may use
+PITCH_FLOOR = 24
+PITCH_CEILING = 88
+
+# Previous pitches the memoized matrices have rows for; row 0 (-1) is the
+# start of a line
+PREVIOUS_PITCHES = np.concatenate([[-1], np.arange(PITCH_FLOOR, PITCH_CEILING + 1)])[:, None]
+# Every pitch a voice may take, the columns of the memoized pair costs
+ALL_PITCHES = np.arange(PITCH_FLOOR, PITCH_CEILING + 1)[None, :]
+
+# Harmonic interval classes that count as dissonant, and the perfect ones
+DISSONANT_INTERVALS = (1, 2, 6, 10, 11)
+PERFECT_INTERVALS = (0, 7)
+_DISSONANT = np.isin(np.arange(12), DISSONANT_INTERVALS)
+_PERFECT = np.isin(np.arange(12), PERFECT_INTERVALS)
+# Widest comfortable gap to the voice directly above, in semitones
+MAX_SPACING = 19
+
+# Penalties of the cost model; lower totals are better
+VOICE_LEADING_WEIGHTS = {
+    "non_chord_tone": 3.0,
+    "dissonance": 4.0,
+    "fourth": 1.0,
+    "unison": 2.0,
+    "crossing": 10.0,
+    "overlap": 3.0,
+    "spacing": 2.0,
+    "parallel_perfect": 12.0,
+    "direct_perfect": 2.0,
+    "similar_motion": 0.5,
+    "repeat": 0.5,
+    "leap": 0.4,
+    "tritone_leap": 3.0,
+    "large_leap": 6.0,
+}
+
+
+class VoiceLeadingSolver:
+    """Beam-search counterpoint below a melody over chord IDs.
+
+    ``beam_width`` bounds the pitches kept per note: wider beams find
+    cheaper lines and cost proportionally more time.  ``weights`` overrides
+    entries of ``VOICE_LEADING_WEIGHTS``.
+    """
+
+    def __init__(self, beam_width=DEFAULT_BEAM_WIDTH, weights=None, vocabulary=None,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        if beam_width < 1:
+            raise ValueError(f"beam_width must be at least 1, got {beam_width}")
+        self.beam_width = beam_width
+        self.weights = dict(VOICE_LEADING_WEIGHTS, **(weights or {}))
+        self.vocabulary = vocabulary if vocabulary is not None else get_vocabulary()
+        self._candidates = functools.lru_cache(maxsize=None)(self._compute_candidates)
+        self._chord_costs = functools.lru_cache(maxsize=None)(self._compute_chord_costs)
+        self._pair_costs = functools.lru_cache(maxsize=cache_size)(self._compute_pair_costs)
+
+    def cache_info(self):
+        """Hit and miss counts of the memoized costs against upper voices."""
+        return self._pair_costs.cache_info()
+
+    def solve(self, pitches, chords, voices=1):
+        """Return a ``(voices, len(pitches))`` ``uint8`` array of lines below ``pitches``.
+
+        ``chords`` holds the chord ID sounding under every note.  Lines are
+        ordered top to bottom; each is solved against the melody and the
+        lines above it.
+        """
+        lines = [np.asarray(pitches, dtype=np.int64)]
+        chords = list(chords)
+        if len(chords) != len(lines[0]):
+            raise ValueError(f"Expected {len(lines[0])} chords, one per note, got {len(chords)}")
+        for voice in range(voices):
+            lines.append(self._solve_voice(voice, chords, lines))
+        return np.array(lines[1:], dtype=np.uint8).reshape(voices, len(chords))
+
+    def line_cost(self, pitches, chords, lines):
+        """Total cost of the lines in ``lines`` (top to bottom) below ``pitches``.
+
+        Lines need not come from the solver, which makes this the yardstick
+        for comparing beam widths or other counterpoint generators.
+        """
+        voices = [np.asarray(pitches, dtype=np.int64)] + [np.asarray(line, dtype=np.int64) for line in lines]
+        total = 0.0
+        for voice in range(1, len(voices)):
+            line = voices[voice].tolist()
+            upper = list(zip(*(above.tolist() for above in voices[:voice])))
+            for step, chord_id in enumerate(chords):
+                before, pitch = np.array(line[step - 1] if step else -1), np.array(line[step])
+                total += float(self._chord_cost(chord_id, before, pitch))
+                for above, now in enumerate(upper[step]):
+                    was = upper[step - 1][above] if step else None
+                    total += float(self._pair_cost(above == 0, above == voice - 1, was, now, before, pitch))
+        return total
+
+    def _solve_voice(self, voice, chords, lines):
+        n = len(chords)
+        if not n:
+            return np.zeros(0, dtype=np.int64)
+        upper = list(zip(*(line.tolist() for line in lines)))
+        nearest = len(lines) - 1
+        width = self.beam_width
+
+        # Back pointers: the pitches kept at each step and the beam slot of their predecessor
+        kept = np.zeros((n, width), dtype=np.int16)
+        parents = np.zeros((n, width), dtype=np.int16)
+
+        beam = beam_costs = None
+        for step in range(n):
+            candidates, columns = self._candidates(voice, chords[step])
+            if beam is None:
+                # First note: no motion yet, which is row 0 of every matrix
+                costs = self._chord_costs(voice, chords[step])[0].copy()
+                for above, now in enumerate(upper[0]):
+                    costs += self._pair_costs(above == 0, above == nearest, None, now)[0, columns]
+                parent = np.zeros(len(candidates), dtype=np.int64)
+            else:
+                rows = beam - PITCH_FLOOR + 1
+                total = beam_costs[:, None] + self._chord_costs(voice, chords[step])[rows]
+                for above, (was, now) in enumerate(zip(upper[step - 1], upper[step])):
+                    total += self._pair_costs(above == 0, above == nearest, was, now)[rows[:, None], columns]
+                parent = total.argmin(axis=0)
+                costs = total[parent, np.arange(len(candidates))]
+
+            keep = np.argpartition(costs, width - 1)[:width] if len(costs) > width else np.arange(len(costs))
+            beam, beam_costs = candidates[keep], costs[keep]
+            kept[step, :len(keep)] = beam
+            parents[step, :len(keep)] = parent[keep]
+
+        line = np.empty(n, dtype=np.int64)
+        slot = int(beam_costs.argmin())
+        for step in range(n - 1, -1, -1):
+            line[step] = kept[step, slot]
+            slot = parents[step, slot]
+        return line
+
+    def _compute_candidates(self, voice, chord_id):
+        pitch_range = self.vocabulary.pitch_range(chord_id)
+        low = max(PITCH_FLOOR, pitch_range.start - 12 * (voice + 1))
+        high = max(low + 1, min(PITCH_CEILING + 1, pitch_range.stop - 12 * voice))
+        candidates = np.arange(low, high, dtype=np.int64)
+        candidates.flags.writeable = False
+        # Also the candidates' column numbers in ALL_PITCHES
+        return candidates, candidates - PITCH_FLOOR
+
+    # The memoized matrices have a row per PREVIOUS_PITCHES entry, and a
+    # column per candidate (chord costs) or per ALL_PITCHES entry (pair
+    # costs, which then depend on nothing but the upper voice); at the start
+    # of a line only row 0 exists
+
+    def _compute_chord_costs(self, voice, chord_id):
+        candidates = self._candidates(voice, chord_id)[0]
+        return _frozen(self._chord_cost(chord_id, PREVIOUS_PITCHES, candidates[None, :]))
+
+    def _compute_pair_costs(self, top, nearest, was, now):
+        previous = PREVIOUS_PITCHES if was is not None else PREVIOUS_PITCHES[:1]
+        return _frozen(self._pair_cost(top, nearest, was, now, previous, ALL_PITCHES))
+
+    def _chord_cost(self, chord_id, before, pitch):
+        """Chord-tone and melodic cost of moving from ``before`` to ``pitch``.
+
+        The arguments broadcast against each other; a ``before`` of -1
+        means the line starts at ``pitch``.
+        """
+        w = self.weights
+        tones = (self.vocabulary.tone_mask(chord_id) >> (pitch % 12)) & 1
+        leap = np.abs(pitch - before)
+        melodic = (w["repeat"] * (leap == 0)
+                   + w["leap"] * np.maximum(leap - 2, 0)
+                   + w["tritone_leap"] * (leap == 6)
+                   + w["large_leap"] * (leap > 12))
+        return w["non_chord_tone"] * (1 - tones) + np.where(before < 0, 0.0, melodic)
+
+    def _pair_cost(self, top, nearest, was, now, before, pitch):
+        """Cost of ``pitch`` against one upper voice moving from ``was`` to ``now``.
+
+        ``top`` marks the melody and ``nearest`` the voice directly above;
+        ``was`` is None at the start of the line.
+        """
+        w = self.weights
+        harmonic = (now - pitch) % 12
+        cost = (w["dissonance"] * _DISSONANT[harmonic]
+                + w["unison"] * (pitch == now)
+                + w["crossing"] * (pitch > now))
+        if top:
+            cost = cost + w["fourth"] * (harmonic == 5)
+        if nearest:
+            cost = cost + w["spacing"] * (now - pitch > MAX_SPACING)
+        if was is None:
+            return cost + np.zeros_like(before)
+
+        motion = pitch - before
+        perfect_now = _PERFECT[harmonic]
+        both_move = (motion != 0) & (now != was)
+        parallel = both_move & perfect_now & (harmonic == (was - before) % 12)
+        similar = both_move & (np.sign(motion) == np.sign(now - was))
+        cost = (cost
+                + w["parallel_perfect"] * parallel
+                + w["direct_perfect"] * (similar & perfect_now & ~parallel))
+        if top:
+            cost = cost + w["similar_motion"] * similar
+        if nearest:
+            cost = cost + w["overlap"] * (pitch > was)
+        return cost
+
+
+def _frozen(matrix):
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    matrix.flags.writeable = False
+    return matrix
@@ -0,0 +1,6 @@
+"""Shared setup for the behaviour tests; run with ``python -m pytest tests``."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,32 @@
+import numpy as np
+
+from musicgen.audio import AudioRenderer, note_waveform
+from musicgen.buffer import NoteBuffer
+from musicgen.generator import AdvancedMusicGenerator
+
+
+def test_render_adds_every_note_waveform():
+    sample_rate = 8000
+    # Overlapping notes, a repeated note and one whose release runs past the next start
+    composition = [[{"note": 60, "duration": 0.5}, {"note": 64, "duration": 0.25},
+                    {"note": 60, "duration": 0.5}, {"note": 67, "duration": 0.01}]]
+    renderer = AudioRenderer(sample_rate, tempo=120)
+    audio = renderer.render(composition)
+
+    expected = np.zeros_like(audio)
+    start = 0
+    for event in composition[0]:
+        n_samples = round(event["duration"] * 0.5 * sample_rate)
+        waveform = note_waveform(event["note"], 64, n_samples, sample_rate)
+        expected[start:start + len(waveform)] += waveform
+        start += n_samples
+    np.testing.assert_allclose(audio, expected, atol=1e-6)
+
+
+def test_chunks_match_whole_render():
+    composition = AdvancedMusicGenerator(4).generate_piano_music(as_buffer=True)
+    renderer = AudioRenderer(8000)
+    whole = renderer.render(composition)
+    chunks = np.concatenate(list(renderer.iter_chunks(composition, chunk_seconds=1.5)))
+    assert np.array_equal(chunks, whole)
+    assert np.array_equal(renderer.render(NoteBuffer.from_events(composition.to_events())), whole)
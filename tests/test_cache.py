@@ -0,0 +1,82 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from musicgen import cache, server
+from musicgen.cache import RenderCache, cache_key, code_version
+from musicgen.server import CompositionServer
+
+
+def test_key_depends_on_code_version(monkeypatch):
+    key = cache_key("midi", 1, {})
+    assert key == cache_key("midi", 1, {}, version=code_version())
+    monkeypatch.setattr(cache, "code_version", lambda: "edited")
+    assert cache_key("midi", 1, {}) != key
+
+
+def test_code_change_invalidates_disk_tier(tmp_path, monkeypatch):
+    RenderCache(directory=tmp_path).midi_bytes(3)
+    assert RenderCache(directory=tmp_path).lookup_midi(3) is not None
+
+    monkeypatch.setattr(cache, "code_version", lambda: "edited")
+    assert RenderCache(directory=tmp_path).lookup_midi(3) is None
+
+
+def test_midi_render_counts_one_miss_and_stores_only_midi():
+    render_cache = RenderCache()
+    first = render_cache.midi_bytes(5)
+    assert render_cache.stats["misses"] == 1
+    assert render_cache.stats["entries"] == 1
+
+    assert render_cache.midi_bytes(5) == first
+    assert render_cache.stats["hits"] == 1
+    assert render_cache.stats["misses"] == 1
+
+
+@pytest.mark.parametrize("method", ["generate", "lookup_midi", "midi_bytes"])
+def test_unseeded_renders_are_rejected(method):
+    with pytest.raises(ValueError):
+        getattr(RenderCache(), method)(None)
+
+
+def test_default_export_names_differ_by_parameters_and_options(tmp_path):
+    render_cache = RenderCache()
+    paths = {
+        render_cache.export_to_midi(4, tmp_path),
+        render_cache.export_to_midi(4, tmp_path, vectorized=True),
+        render_cache.export_to_midi(4, tmp_path, parameters={"progression_length": 4}),
+    }
+    assert len(paths) == 3
+    assert render_cache.export_to_midi(4, tmp_path) in paths
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(os.path.basename(path) for path in paths)
+
+
+def test_generate_returns_independent_copies():
+    render_cache = RenderCache()
+    composition = render_cache.generate(2)
+    composition.notes["pitch"] = 0
+    assert render_cache.generate(2) != composition
+
+
+def test_server_serves_repeats_from_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def counting_render(seed, vectorized=False, parameters=None):
+        calls.append(seed)
+        return b"MThd" + bytes([seed])
+
+    monkeypatch.setattr(server, "render_midi_bytes", counting_render)
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            composition_server = await CompositionServer(
+                port=0, workers=1, executor=executor, cache=RenderCache(directory=tmp_path)).start()
+            try:
+                return [await composition_server.render(9) for _ in range(3)]
+            finally:
+                await composition_server.close()
+
+    assert asyncio.run(main()) == [b"MThd\x09"] * 3
+    assert calls == [9]
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from musicgen.corpus import Corpus, CorpusWriter, MAX_SEED
+from musicgen.generator import AdvancedMusicGenerator
+
+
+@pytest.fixture(scope="module")
+def composition():
+    return AdvancedMusicGenerator(1).generate_piano_music(as_buffer=True)
+
+
+def test_round_trip(tmp_path, composition):
+    path = tmp_path / "pieces.mgc"
+    with CorpusWriter(path, {"name": "test"}) as writer:
+        writer.add(composition, seed=1)
+        writer.add(composition, seed=np.uint64(MAX_SEED))
+
+    corpus = Corpus(path)
+    assert len(corpus) == 2
+    assert corpus.seeds.tolist() == [1, MAX_SEED]
+    assert corpus[0]["pitch"].tolist() == composition.notes["pitch"].tolist()
+    assert corpus.metadata["name"] == "test"
+    assert [entry.name for entry in tmp_path.iterdir()] == ["pieces.mgc"]
+
+
+@pytest.mark.parametrize("seed", [None, -1, MAX_SEED + 1, 1.5, "3", True])
+def test_add_rejects_bad_seeds(tmp_path, composition, seed):
+    path = tmp_path / "pieces.mgc"
+    with CorpusWriter(path) as writer:
+        writer.add(composition, seed=2)
+        with pytest.raises(ValueError):
+            writer.add(composition, seed=seed)
+
+    # The rejected piece left no trace and the corpus is still readable
+    corpus = Corpus(path)
+    assert len(corpus) == 1
+    assert len(corpus.notes) == composition.n_notes
+
+
+def test_failed_close_leaves_no_corpus(tmp_path, composition):
+    path = tmp_path / "pieces.mgc"
+    writer = CorpusWriter(path, {"unserializable": object()})
+    writer.add(composition, seed=3)
+    with pytest.raises(TypeError):
+        writer.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_close_keeps_previous_corpus(tmp_path, composition):
+    path = tmp_path / "pieces.mgc"
+    with CorpusWriter(path) as writer:
+        writer.add(composition, seed=4)
+
+    writer = CorpusWriter(path, {"unserializable": object()})
+    writer.add(composition, seed=5)
+    with pytest.raises(TypeError):
+        writer.close()
+    assert Corpus(path).seeds.tolist() == [4]
+
+
+def test_error_in_with_block_discards_corpus(tmp_path, composition):
+    path = tmp_path / "pieces.mgc"
+    with pytest.raises(RuntimeError):
+        with CorpusWriter(path) as writer:
+            writer.add(composition, seed=6)
+            raise RuntimeError("generation failed")
+    assert list(tmp_path.iterdir()) == []
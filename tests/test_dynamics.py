@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+
+from musicgen.buffer import ARTICULATION_CODES, ARTICULATIONS, DYNAMIC_CODES, DYNAMIC_VELOCITY_TABLE
+from musicgen.dynamics import ACCENT_BOOST, DynamicsEngine, DynamicsGenerator, dynamic_marks
+from musicgen.melody import MelodyGenerator
+
+
+def melody(n_chords=200, as_buffer=True):
+    chords = [random.Random(n).randrange(12) for n in range(n_chords)]
+    return MelodyGenerator(random.Random(0)).generate_melody_with_variations(chords, as_buffer=as_buffer)
+
+
+def test_marks_are_the_nearest_to_velocities():
+    buffer = DynamicsGenerator(np_rng=np.random.default_rng(0)).apply_dynamics_and_articulation(melody())
+    velocities = buffer.notes["velocity"].astype(np.int64)
+    distances = np.abs(velocities[:, None] - DYNAMIC_VELOCITY_TABLE[None, 1:])
+    chosen = distances[np.arange(len(velocities)), buffer.notes["dynamic"] - 1]
+    assert (chosen == distances.min(axis=1)).all()
+
+
+def test_dict_and_buffer_paths_agree():
+    buffer = DynamicsGenerator(np_rng=np.random.default_rng(3)).apply_dynamics_and_articulation(melody())
+    sections = DynamicsGenerator(np_rng=np.random.default_rng(3)).apply_dynamics_and_articulation(
+        melody(as_buffer=False))
+    events = [event for section in sections for event in section]
+    assert [event["velocity"] for event in events] == buffer.notes["velocity"].tolist()
+    assert [DYNAMIC_CODES[event["dynamic"]] for event in events] == buffer.notes["dynamic"].tolist()
+
+
+def test_accent_phrases_alternate_strong_and_weak_notes():
+    engine = DynamicsEngine(np.random.default_rng(1), depth=0)
+    _, velocities, articulations = engine.curves([8] * 200)
+    phrases = velocities.reshape(200, 8).astype(np.int64)
+    accented = articulations.reshape(200, 8)[:, 0] == ARTICULATION_CODES["accent"]
+    assert accented.any()
+    assert ((phrases[accented, ::2] - phrases[accented, 1::2]) == ACCENT_BOOST).all()
+
+
+def test_lazy_path_matches_marks_and_chunks():
+    sections = list(DynamicsGenerator(np_rng=np.random.default_rng(2)).iter_dynamics_and_articulation(
+        melody(as_buffer=False), chunk_sections=16))
+    assert len(sections) == 200
+    events = [event for section in sections for event in section]
+    marks = dynamic_marks([event["velocity"] for event in events])
+    assert [DYNAMIC_CODES[event["dynamic"]] for event in events] == marks.tolist()
+
+
+def test_empty_input():
+    engine = DynamicsEngine(np.random.default_rng(0))
+    assert [len(curve) for curve in engine.curves([])] == [0, 0, 0]
+    assert engine.apply([]) == []
+    empty = melody(0)
+    assert engine.apply(empty).n_notes == 0
+    assert DynamicsGenerator(np_rng=np.random.default_rng(0)).apply_dynamics_and_articulation([[]]) == [[]]
+
+
+def test_blocks_of_sections_match_across_paths():
+    buffer = DynamicsEngine(np.random.default_rng(5)).apply(melody(), block_sections=64)
+    sections = DynamicsEngine(np.random.default_rng(5)).apply(melody(as_buffer=False), block_sections=64)
+    events = [event for section in sections for event in section]
+    assert [event["velocity"] for event in events] == buffer.notes["velocity"].tolist()
+    assert [event["articulation"] for event in events] == [
+        ARTICULATIONS[code - 1] for code in buffer.notes["articulation"].tolist()]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from musicgen import markov
+from musicgen.markov import MarkovProgressionEngine
+
+PROGRESSIONS = [
+    ["C", "Am", "F", "G", "C", "F", "G", "Am"],
+    ["Am", "F", "C", "G", "Am", "G", "F", "C"],
+    ["F", "G", "Em", "Am", "F", "C", "G", "G"],
+]
+
+
+def sample_both_ways(monkeypatch, engine, length, seed):
+    scanned = engine.sample(length, rng=np.random.default_rng(seed))
+    with monkeypatch.context() as patch:
+        # No context count qualifies for the scan, so every step is sampled in turn
+        patch.setattr(markov, "SCAN_MAX_CONTEXTS", 0)
+        sequential = engine.sample(length, rng=np.random.default_rng(seed))
+    return scanned, sequential
+
+
+@pytest.mark.parametrize("order", [1, 2])
+@pytest.mark.parametrize("seed", range(5))
+def test_scan_matches_sequential_sampling(monkeypatch, order, seed):
+    engine = MarkovProgressionEngine.from_progressions(PROGRESSIONS, order=order, smoothing=0.1)
+    scanned, sequential = sample_both_ways(monkeypatch, engine, 3000, seed)
+    assert scanned.tolist() == sequential.tolist()
+
+
+def test_scan_matches_sequential_sampling_across_blocks(monkeypatch):
+    monkeypatch.setattr(markov, "SCAN_BLOCK", 100)
+    engine = MarkovProgressionEngine.from_progressions(PROGRESSIONS, order=1)
+    scanned, sequential = sample_both_ways(monkeypatch, engine, 1037, 7)
+    assert scanned.tolist() == sequential.tolist()
+
+
+def test_memoryless_scan_matches_sequential_sampling(monkeypatch):
+    engine = MarkovProgressionEngine.default()
+    scanned, sequential = sample_both_ways(monkeypatch, engine, 5000, 3)
+    assert scanned.tolist() == sequential.tolist()
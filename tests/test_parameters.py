@@ -0,0 +1,195 @@
+import asyncio
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from musicgen import server
+from musicgen.cache import RenderCache
+from musicgen.generator import AdvancedMusicGenerator
+from musicgen.profiling import StageProfiler
+from musicgen.server import MAX_PROGRESSION_LENGTH, CompositionServer, parse_render_parameters
+from musicgen.smf import MAX_TEMPO, MIN_TEMPO
+from musicgen.sweep import SWEEP_INDEX, SweepRunner, expand_grid, sample_grid
+
+PARAMETERS = {"progression_length": 4, "form_structures": ["rondo"], "tempos": [60],
+              "tempo_change_probability": 1.0, "time_signatures": ["5/4"]}
+
+BAD_PARAMETERS = [
+    {"progression_length": 0},
+    {"progression_length": 2.5},
+    {"progression_length": True},
+    {"key_change_probability": "often"},
+    {"key_change_probability": 1.5},
+    {"phrasing_patterns": {}},
+    {"phrasing_patterns": {"x": []}},
+    {"phrasing_patterns": {"x": [0.5, -0.5]}},
+    {"phrasing_patterns": [0.5]},
+    {"phrasing_patterns": {"x": [1e7]}},
+    {"form_structures": []},
+    {"form_structures": ["sonata"]},
+    {"form_structures": [["AABA"]]},
+    {"form_structures": "AABA"},
+    {"tempos": [0]},
+    {"tempos": [-5]},
+    {"tempos": ["fast"]},
+    {"tempos": 120},
+    {"tempos": [0.001]},
+    {"tempos": [1e9]},
+    {"time_signatures": ["5/7"]},
+    {"time_signatures": ["4-4"]},
+    {"time_signatures": [("3/4", 0)]},
+    {"tempo_change_probability": None},
+    {"time_signature_change_probability": -0.1},
+    {"cadence_probabilities": {"authentic": 0.4}},
+    {"no_such_parameter": 1},
+]
+
+
+def test_defaults_match_explicit_defaults():
+    default = AdvancedMusicGenerator(11).generate_piano_music(as_buffer=True)
+    explicit = AdvancedMusicGenerator(11, parameters={
+        "progression_length": 8, "key_change_probability": 0.4, "tempos": [80, 100, 120],
+        "time_signatures": [["4/4", 4], ["3/4", 3], ["6/8", 6]], "tempo_change_probability": 0.3,
+        "time_signature_change_probability": 0.2, "form_structures": ["AABA", "rondo", "theme_variations"],
+    }).generate_piano_music(as_buffer=True)
+    assert default == explicit
+
+
+def test_parameters_shape_the_output():
+    composition = AdvancedMusicGenerator(11, parameters=PARAMETERS).generate_piano_music(as_buffer=True)
+    # Four chords, and rondo repeats the first section
+    assert len(composition) == 5
+    assert set(composition.controls["tempo"][composition.controls["kind"] == 1].tolist()) == {60.0}
+
+
+@pytest.mark.parametrize("parameters", BAD_PARAMETERS, ids=lambda parameters: json.dumps(parameters))
+def test_bad_parameters_raise_value_error(parameters):
+    with pytest.raises(ValueError):
+        AdvancedMusicGenerator(0, parameters=parameters)
+
+
+@pytest.mark.parametrize("tempo", [MIN_TEMPO, MAX_TEMPO])
+def test_extreme_accepted_tempos_export(tempo):
+    parameters = {"tempos": [tempo], "tempo_change_probability": 1.0, "phrasing_patterns": {"long": [64]}}
+    midi_bytes = server.render_midi_bytes(2, parameters=parameters)
+    assert midi_bytes.startswith(b"MThd")
+
+
+def test_server_caps_progression_length():
+    assert parse_render_parameters({"seed": 1, "parameters": {"progression_length": MAX_PROGRESSION_LENGTH}})
+    with pytest.raises(ValueError, match="at most"):
+        parse_render_parameters({"seed": 1, "parameters": {"progression_length": MAX_PROGRESSION_LENGTH + 1}})
+
+
+def test_render_cache_keys_on_parameters():
+    render_cache = RenderCache()
+    plain = render_cache.generate(4)
+    shaped = render_cache.generate(4, parameters=PARAMETERS)
+    assert shaped == AdvancedMusicGenerator(4, parameters=PARAMETERS).generate_piano_music(as_buffer=True)
+    assert shaped != plain
+    assert render_cache.midi_bytes(4, parameters=PARAMETERS) != render_cache.midi_bytes(4)
+
+
+def test_batch_jobs_use_parameters_and_hooks():
+    profiler = StageProfiler()
+    generator = AdvancedMusicGenerator(0, hooks=[profiler], parameters=PARAMETERS)
+    results = list(generator.generate_batch(2, seeds=[5, 6], workers=1, as_buffer=True))
+    assert results[0]["composition"] == AdvancedMusicGenerator(5, parameters=PARAMETERS).generate_piano_music(
+        as_buffer=True)
+    assert sum(record["stage"] == "chords" for record in profiler.records) == 2
+
+
+def test_batch_pool_uses_parameters():
+    generator = AdvancedMusicGenerator(0, parameters=PARAMETERS)
+    results = list(generator.generate_batch(2, seeds=[5, 6], workers=2, as_buffer=True))
+    assert [len(result["composition"]) for result in results] == [5, 5]
+
+
+def test_server_passes_parameters(monkeypatch):
+    def render(seed, vectorized=False, parameters=None):
+        return json.dumps(parameters).encode()
+
+    monkeypatch.setattr(server, "render_midi_bytes", render)
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            composition_server = await CompositionServer(port=0, workers=1, executor=executor).start()
+            try:
+                kwargs = parse_render_parameters({"seed": "1", "parameters": json.dumps(PARAMETERS)})
+                return await composition_server.render(**kwargs)
+            finally:
+                await composition_server.close()
+
+    assert json.loads(asyncio.run(main())) == PARAMETERS
+
+
+@pytest.mark.parametrize("parameters", ["{not json", "[1]", json.dumps({"tempos": [0]}), {"bogus": 1},
+                                        {"tempos": [0.001]}, {"tempos": [1e9]},
+                                        {"phrasing_patterns": {"long": [1e7]}}])
+def test_server_rejects_bad_parameters(parameters):
+    with pytest.raises(ValueError):
+        parse_render_parameters({"seed": 1, "parameters": parameters})
+
+
+def test_sample_grid_is_distinct_and_reproducible():
+    grid = {"progression_length": [2, 4, 8], "tempos": [[60], [90], [120]], "form_structures": [["rondo"]]}
+    assert len(expand_grid(grid)) == 9
+    sample = sample_grid(grid, 5, random.Random(1))
+    assert len({json.dumps(config, sort_keys=True) for config in sample}) == 5
+    assert sample == sample_grid(grid, 5, random.Random(1))
+    assert sample_grid(grid, 20) == expand_grid(grid)
+
+
+def test_sweep_rejects_bad_grid_before_rendering(tmp_path):
+    runner = SweepRunner(tmp_path, workers=1, export=False)
+    with pytest.raises(Exception, match="5/7"):
+        runner.run([{"progression_length": 4}, {"time_signatures": ["5/7"]}])
+    assert runner.rendered == 0
+
+
+def test_sweep_resumes_and_skips_indexed_renders(tmp_path):
+    configs = expand_grid({"progression_length": [2, 4], "tempos": [[60], [120]]})
+    runner = SweepRunner(tmp_path, workers=1)
+    records = runner.run(configs, seeds=[0, 1])
+    assert runner.rendered == 8
+    assert len(list((tmp_path / "midi").iterdir())) == 8
+    assert (tmp_path / "summary.csv").read_text().count("\n") == 5
+
+    # Simulate a crash partway through writing the index
+    index = tmp_path / SWEEP_INDEX
+    lines = index.read_bytes().splitlines(keepends=True)
+    index.write_bytes(b"".join(lines[:3]) + lines[3][:20])
+
+    resumed = SweepRunner(tmp_path, workers=2)
+    resumed_records = resumed.run(configs, seeds=[0, 1])
+    assert (resumed.rendered, resumed.skipped) == (5, 3)
+    assert [(record["key"], record["notes"]) for record in resumed_records] == [
+        (record["key"], record["notes"]) for record in records]
+    assert len(index.read_bytes().splitlines()) == 8
+
+
+def test_sweep_index_refuses_corruption_before_the_last_line(tmp_path):
+    configs = expand_grid({"progression_length": [2, 4]})
+    SweepRunner(tmp_path, workers=1, export=False).run(configs)
+    index = tmp_path / SWEEP_INDEX
+    lines = index.read_bytes().splitlines(keepends=True)
+    corrupt = lines[0][:20] + b"\n" + b"".join(lines[1:])
+    index.write_bytes(corrupt)
+
+    with pytest.raises(ValueError, match="line 1"):
+        SweepRunner(tmp_path, workers=1, export=False)
+    assert index.read_bytes() == corrupt
+
+
+def test_sweep_index_drops_an_unterminated_last_record(tmp_path):
+    configs = expand_grid({"progression_length": [2, 4]})
+    SweepRunner(tmp_path, workers=1, export=False).run(configs)
+    index = tmp_path / SWEEP_INDEX
+    index.write_bytes(index.read_bytes().rstrip(b"\n"))
+
+    resumed = SweepRunner(tmp_path, workers=1, export=False)
+    resumed.run(configs)
+    assert (resumed.rendered, resumed.skipped) == (1, 1)
+    assert len(index.read_bytes().splitlines()) == 2
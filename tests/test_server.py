@@ -0,0 +1,144 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from musicgen import server
+from musicgen.server import CompositionServer, ServerBusy, parse_render_parameters
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def slow_render(seed, vectorized=False, parameters=None):
+    time.sleep(0.2)
+    return b"MThd" + seed.to_bytes(8, "big")
+
+
+async def get(port, target):
+    """Send one ``GET`` request and return the response status code."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+@pytest.fixture
+def slow_renders(monkeypatch):
+    monkeypatch.setattr(server, "render_midi_bytes", slow_render)
+
+
+def run_server(test, workers=2, max_queue=2):
+    async def main():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            composition_server = await CompositionServer(
+                port=0, workers=workers, max_queue=max_queue, executor=executor).start()
+            try:
+                return await test(composition_server)
+            finally:
+                await composition_server.close()
+
+    return asyncio.run(main())
+
+
+def test_burst_beyond_queue_is_rejected(slow_renders):
+    async def burst(composition_server):
+        return await asyncio.gather(*(composition_server.render(seed) for seed in range(20)),
+                                    return_exceptions=True)
+
+    results = run_server(burst)
+    assert sum(isinstance(result, ServerBusy) for result in results) == 16
+    assert sum(isinstance(result, bytes) for result in results) == 4
+
+
+def test_burst_over_http_returns_503(slow_renders):
+    async def burst(composition_server):
+        statuses = await asyncio.gather(*(get(composition_server.port, f"/render?seed={seed}")
+                                          for seed in range(20)))
+        return statuses, composition_server.pending
+
+    statuses, pending = run_server(burst)
+    assert sorted(statuses) == [200] * 4 + [503] * 16
+    assert pending == 0
+
+
+def test_slots_are_released_after_a_burst(slow_renders):
+    async def two_bursts(composition_server):
+        await asyncio.gather(*(composition_server.render(seed) for seed in range(8)), return_exceptions=True)
+        return await asyncio.gather(*(composition_server.render(seed) for seed in range(4)))
+
+    assert len(run_server(two_bursts)) == 4
+
+
+def test_identical_requests_share_one_slot(slow_renders):
+    async def same_seed(composition_server):
+        return await asyncio.gather(*(composition_server.render(7) for _ in range(10)))
+
+    assert len(set(run_server(same_seed, workers=1, max_queue=0))) == 1
+
+
+@pytest.mark.parametrize("target", ["/render?seed=-1", "/render?seed=1.5", "/render?seed=abc",
+                                    f"/render?seed={2 ** 64}", "/render?seed=1&vectorized=maybe"])
+def test_bad_parameters_return_400(slow_renders, target):
+    async def request(composition_server):
+        return await get(composition_server.port, target)
+
+    assert run_server(request) == 400
+
+
+@pytest.mark.parametrize("params", [{"seed": -1}, {"seed": 1.5}, {"seed": 2.0}, {"seed": True},
+                                    {"seed": [1]}, {"seed": 2 ** 64}, {"seed": 1, "vectorized": "maybe"},
+                                    {"seed": 1, "vectorized": 2}])
+def test_parse_render_parameters_rejects(params):
+    with pytest.raises(ValueError):
+        parse_render_parameters(params)
+
+
+def test_parse_render_parameters_accepts():
+    assert parse_render_parameters({"seed": "42", "vectorized": "yes"}) == {
+        "seed": 42, "vectorized": True, "parameters": None}
+    assert parse_render_parameters({"seed": 0, "vectorized": False}) == {
+        "seed": 0, "vectorized": False, "parameters": None}
+    assert 0 <= parse_render_parameters({})["seed"] < 2 ** 32
+
+
+@pytest.mark.parametrize("signum", [signal.SIGTERM, signal.SIGINT])
+def test_signals_shut_down_the_worker_pool(signum):
+    process = subprocess.Popen([sys.executable, "-m", "musicgen.server", "--port", "0", "--workers", "2"],
+                               cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True, start_new_session=True,
+                               env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    try:
+        port = int(process.stdout.readline().split()[2].rsplit(":", 1)[1])
+        # A render starts the pool's worker processes
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/render?seed=1", timeout=60) as response:
+            assert response.status == 200
+
+        process.send_signal(signum)
+        assert process.wait(timeout=30) == 0
+        # No worker outlives the server in its process group
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                os.killpg(process.pid, 0)
+            except ProcessLookupError:
+                break
+            assert time.monotonic() < deadline, "pool workers outlived the server"
+            time.sleep(0.05)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+        process.stdout.close()
@@ -0,0 +1,79 @@
+import io
+
+import pretty_midi
+import pytest
+
+from musicgen.smf import MAX_TEMPO, MAX_VARLEN, MIN_TEMPO, StreamingMIDIWriter, encode_varlen, tempo_event
+
+
+class _Unseekable(io.BytesIO):
+    def seekable(self):
+        return False
+
+
+@pytest.mark.parametrize("value, encoded", [
+    (0, b"\x00"),
+    (0x40, b"\x40"),
+    (0x7F, b"\x7f"),
+    (0x80, b"\x81\x00"),
+    (0x2000, b"\xc0\x00"),
+    (0x3FFF, b"\xff\x7f"),
+    (0x4000, b"\x81\x80\x00"),
+    (0x100000, b"\xc0\x80\x00"),
+    (0x200000, b"\x81\x80\x80\x00"),
+    (MAX_VARLEN, b"\xff\xff\xff\x7f"),
+])
+def test_encode_varlen(value, encoded):
+    assert encode_varlen(value) == encoded
+
+
+@pytest.mark.parametrize("value", [-1, MAX_VARLEN + 1])
+def test_encode_varlen_rejects_out_of_range(value):
+    with pytest.raises(ValueError):
+        encode_varlen(value)
+
+
+@pytest.mark.parametrize("tempo", [MIN_TEMPO / 2, MAX_TEMPO * 2])
+def test_tempo_event_rejects_unencodable_tempos(tempo):
+    with pytest.raises(ValueError):
+        tempo_event(tempo)
+
+
+def write_piece(output):
+    with StreamingMIDIWriter(output, ticks_per_beat=480) as writer:
+        # Back-to-back note-ons share a status byte, so these exercise running status
+        writer.add_note(60, 1.0, velocity=100)
+        writer.add_note(64, 0.5, velocity=80, gate=0.5)
+        writer.add_tempo(90)
+        writer.add_time_signature(3, 4)
+        writer.add_note(67, 2.0, velocity=60)
+        writer.add_tempo(150)
+        writer.add_note(72, 1.5)
+    return output.getvalue()
+
+
+def test_round_trip_through_pretty_midi():
+    midi = pretty_midi.PrettyMIDI(io.BytesIO(write_piece(io.BytesIO())))
+
+    # Beats 0-1.5 at 120 BPM, 1.5-3.5 at 90 BPM, then 150 BPM
+    change_times, tempos = midi.get_tempo_changes()
+    assert tempos.tolist() == pytest.approx([120, 90, 150])
+    assert change_times.tolist() == pytest.approx([0.0, 0.75, 0.75 + 2 * 60 / 90])
+    assert [(signature.numerator, signature.denominator, signature.time)
+            for signature in midi.time_signature_changes] == [(3, 4, pytest.approx(0.75))]
+
+    third_start = 0.75
+    fourth_start = third_start + 2 * 60 / 90
+    notes = midi.instruments[0].notes
+    assert [(note.pitch, note.velocity) for note in notes] == [(60, 100), (64, 80), (67, 60), (72, 64)]
+    # Tempos are stored in whole microseconds per beat
+    assert [(note.start, note.end) for note in notes] == [
+        (0.0, 0.5),
+        (0.5, 0.625),
+        (pytest.approx(third_start), pytest.approx(fourth_start, abs=1e-5)),
+        (pytest.approx(fourth_start, abs=1e-5), pytest.approx(fourth_start + 1.5 * 60 / 150, abs=1e-5)),
+    ]
+
+
+def test_unseekable_output_matches_seekable():
+    assert write_piece(_Unseekable()) == write_piece(io.BytesIO())
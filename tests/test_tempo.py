@@ -0,0 +1,24 @@
+import random
+
+import pytest
+
+from musicgen.buffer import NoteBuffer
+from musicgen.generator import AdvancedMusicGenerator
+from musicgen.tempo import TempoChangeGenerator
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_event_and_buffer_paths_agree(seed):
+    events = AdvancedMusicGenerator(seed).generate_piano_music()
+    composition = AdvancedMusicGenerator(seed).generate_piano_music(as_buffer=True)
+    assert events == composition.to_events()
+    assert NoteBuffer.from_events(events) == composition
+
+
+def test_repeated_sections_get_their_own_changes():
+    section = [{"note": 60, "duration": 1.0}]
+    generator = TempoChangeGenerator(random.Random(0), tempo_probability=1, time_signature_probability=1)
+    changed = generator.introduce_tempo_and_time_signature_changes([section, section])
+
+    assert section == [{"note": 60, "duration": 1.0}]
+    assert [len(changed_section) for changed_section in changed] == [3, 3]